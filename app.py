@@ -1,6 +1,5 @@
 import streamlit as st
 import os
-import pandas as pd
 import datetime
 
 
@@ -8,12 +7,14 @@ search=os.path.join("paths","search.py")
 history=os.path.join("paths","history.py")
 settings=os.path.join("paths","settings.py")
 past=os.path.join("paths","past.py")
+jobs=os.path.join("paths","jobs.py")
 
 pages={
     "App":[
         st.Page(search,title="Search", icon="🔍"),
         st.Page(history,title="History", icon="📜"),
-        st.Page(past,title="Recap", icon="🤔")
+        st.Page(past,title="Recap", icon="🤔"),
+        st.Page(jobs,title="Jobs", icon="⏳")
     ],
     "Account":[
         st.Page(settings,title="Settings", icon="⚙️")
@@ -0,0 +1,82 @@
+"""
+Content Extraction Micro-benchmark
+
+Measures pages per second for the single-pass extraction engine
+(`modules.extraction.extract_markdown`) against the original multi-pass
+`find_all` extraction on a corpus of saved HTML files.
+
+Usage:
+------
+python benchmarks/bench_extraction.py [corpus_dir] [--rounds N]
+
+The corpus defaults to benchmarks/corpus; any directory of saved .html files works.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from modules import extraction
+
+
+def legacy_extract(html):
+    """The extraction previously inlined in scrape_page (html.parser + find_all)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.extract()
+    content = []
+    for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol']):
+        if element.name.startswith('h'):
+            content.append(f"\n{'#' * int(element.name[1])} {element.get_text().strip()}\n")
+        elif element.name == 'p':
+            text = element.get_text().strip()
+            if text:
+                content.append(f"{text}\n\n")
+        elif element.name in ['ul', 'ol']:
+            content.append("\n")
+            for li in element.find_all('li', recursive=False):
+                content.append(f"* {li.get_text().strip()}\n")
+            content.append("\n")
+    return '\n'.join(content)
+
+
+def run(name, extract, pages, rounds):
+    start = time.perf_counter()
+    output_chars = 0
+    for _ in range(rounds):
+        for html in pages:
+            output_chars += len(extract(html))
+    elapsed = time.perf_counter() - start
+    processed = rounds * len(pages)
+    print(f"{name:<32} {processed / elapsed:>10.1f} pages/s   "
+          f"{output_chars // rounds:>8} chars/round")
+    return processed / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.corpus, "*.html")))
+    if not files:
+        sys.exit(f"No .html files found in {args.corpus}")
+    pages = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    total_kb = sum(len(page) for page in pages) / 1024
+    print(f"Corpus: {len(pages)} pages, {total_kb:.0f} KB, {args.rounds} rounds")
+
+    baseline = run("legacy find_all (html.parser)", legacy_extract, pages, args.rounds)
+    single_pass = run(f"single-pass ({extraction.html_parser})", extraction.extract_markdown, pages, args.rounds)
+    print(f"Speedup: {single_pass / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
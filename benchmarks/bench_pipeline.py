@@ -0,0 +1,336 @@
+"""
+Offline End-to-end Pipeline Benchmark
+
+Runs web_search -> orchestrate_scraping -> smart_search against a local
+HTTP server that stands in for every external service:
+
+- the saved HTML corpus (benchmarks/corpus) as the web pages
+- a Brave-compatible /res/v1/web/search endpoint listing those pages
+- Gemini REST stand-ins (batchEmbedContents, generateContent)
+- an Ollama /api/chat stand-in
+
+each with a configurable latency. For every mode and concurrency level it
+reports p50/p95 end-to-end query latency, pages scraped per second and the
+peak RSS of the process and its children (e.g. Chrome).
+
+Usage:
+------
+python benchmarks/bench_pipeline.py [--modes scrape,single,pipelined,map_reduce]
+       [--concurrency 1,4] [--queries 8] [--urls 5] [--llm gemini|ollama]
+       [--page-latency 0.05] [--search-latency 0.1] [--embed-latency 0.05] [--llm-latency 0.5]
+
+Modes:
+  scrape      web_search + orchestrate_scraping only (no model calls)
+  selenium    like scrape, but every page escalates to Chrome (needs Chrome)
+  single      smart_search, one summarizer call (SUMMARY_MODE=single)
+  map_reduce  smart_search with SUMMARY_MODE=map_reduce
+  pipelined   smart_search with PIPELINED_SUMMARY=true
+
+Each mode/concurrency pair runs in a fresh process on a temporary copy of
+modules/, so the page, search and embedding caches start empty and nothing
+is written to the real search/ directory.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+corpus_dir = os.path.join(project_dir, 'benchmarks', 'corpus')
+
+result_marker = "BENCH_RESULT "
+embedding_dimensions = 64
+
+modes = {
+    "scrape": {"scrape_only": True, "env": {}},
+    "selenium": {"scrape_only": True, "env": {"MIN_STATIC_TEXT_CHARS": "1000000000"}},
+    "single": {"scrape_only": False, "env": {"SUMMARY_MODE": "single"}},
+    "map_reduce": {"scrape_only": False, "env": {"SUMMARY_MODE": "map_reduce"}},
+    "pipelined": {"scrape_only": False, "env": {"PIPELINED_SUMMARY": "true"}},
+}
+
+
+def fake_embedding(text):
+    """Deterministic unit-length vector for a text, so reranking has something to sort."""
+    digest = hashlib.sha256(text.encode('utf-8')).digest() * 2
+    vector = [byte / 255 - 0.5 for byte in digest[:embedding_dimensions]]
+    norm = sum(value * value for value in vector) ** 0.5 or 1.0
+    return [value / norm for value in vector]
+
+
+def fake_summary(prompt):
+    return f"# Benchmark summary\n\nThe model received {len(prompt)} characters of content."
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the corpus and the fake Brave, Gemini and Ollama endpoints."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        if url.path == "/res/v1/web/search":
+            time.sleep(server.latency['search'])
+            query = parse_qs(url.query).get('q', [''])[0]
+            slug = re.sub(r'[^a-z0-9]+', '-', query.lower()).strip('-') or 'query'
+            results = []
+            for index in range(server.results_per_query):
+                name = server.page_names[index % len(server.page_names)]
+                results.append({
+                    "title": f"{name} {index}",
+                    "url": f"{server.base_url}/pages/{slug}/{index}/{name}",
+                    "description": f"Result {index} about {query} from the {name} page",
+                })
+            self._send(200, {"query": {"original": query}, "web": {"results": results}})
+        elif url.path.startswith("/pages/"):
+            time.sleep(server.latency['page'])
+            html = server.pages.get(url.path.rsplit('/', 1)[-1])
+            if html is None:
+                self._send(404, b"not found", "text/plain")
+            else:
+                self._send(200, html, "text/html; charset=utf-8")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        path = urlparse(self.path).path
+        if path.endswith(":batchEmbedContents"):
+            time.sleep(server.latency['embed'])
+            embeddings = [{"values": fake_embedding(json.dumps(item.get("content")))}
+                          for item in request.get("requests", [])]
+            self._send(200, {"embeddings": embeddings})
+        elif path.endswith(":generateContent"):
+            time.sleep(server.latency['llm'])
+            prompt = json.dumps(request.get("contents"))
+            self._send(200, {"candidates": [{
+                "content": {"parts": [{"text": fake_summary(prompt)}], "role": "model"},
+                "finishReason": "STOP",
+            }]})
+        elif path == "/api/chat":
+            time.sleep(server.latency['llm'])
+            prompt = json.dumps(request.get("messages"))
+            self._send(200, {
+                "model": request.get("model"),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": fake_summary(prompt)},
+                "done": True,
+            })
+        else:
+            self._send(404, b"not found", "text/plain")
+
+
+def start_server(latency, results_per_query):
+    """Starts the stand-in server on a free local port in a daemon thread; returns it."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.results_per_query = results_per_query
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.pages = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '*.html'))):
+        with open(path, 'rb') as f:
+            server.pages[os.path.basename(path)] = f.read()
+    server.page_names = list(server.pages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class PeakMemory:
+    """Samples the RSS of this process plus its children (e.g. Chrome) and keeps the peak."""
+
+    def __init__(self, interval=0.05):
+        import psutil
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            try:
+                rss = self.process.memory_info().rss
+                for child in self.process.children(recursive=True):
+                    try:
+                        rss += child.memory_info().rss
+                    except Exception:
+                        pass
+                self.peak = max(self.peak, rss)
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(config):
+    """Runs one mode at one concurrency level in this process and prints its measurements."""
+    sys.path.insert(0, os.getcwd())
+    from modules.search_modules import web_search, smart_search, orchestrate_scraping
+
+    def run_query(index):
+        key = f"bench_{index}"
+        key_dir = os.path.join(os.getcwd(), 'search', f"search_{key}")
+        query = f"{config['mode']} benchmark query {index}"
+        start = time.perf_counter()
+        try:
+            urls = web_search(query, key, config['urls'])
+            if config['scrape_only']:
+                orchestrate_scraping([url['url'] for url in urls], key, key_dir)
+            else:
+                smart_search(query, key, urls, config['model'])
+            ok = True
+        except Exception as e:
+            print(f"Benchmark query failed: {str(e)}")
+            ok = False
+        latency = time.perf_counter() - start
+        pages = 0
+        try:
+            with open(os.path.join(key_dir, "run_metadata.json"), 'r', encoding='utf-8') as f:
+                tiers = json.load(f).get("scrape_tiers", {})
+            pages = sum(1 for tier in tiers.values() if tier != "failed")
+        except Exception:
+            pass
+        return ok, latency, pages
+
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=config['concurrency']) as executor:
+            outcomes = list(executor.map(run_query, range(config['queries'])))
+        wall = time.perf_counter() - start
+
+    print(result_marker + json.dumps({
+        'latencies': [latency for ok, latency, _ in outcomes if ok],
+        'failed': sum(1 for ok, _, _ in outcomes if not ok),
+        'pages': sum(pages for _, _, pages in outcomes),
+        'wall': wall,
+        'peak_rss': memory.peak,
+    }))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(max(math.ceil(fraction * len(ordered)), 1), len(ordered)) - 1]
+
+
+def run_config(mode, concurrency, args, server):
+    """Runs one mode/concurrency pair in a fresh process on a temporary copy of modules/."""
+    work_dir = tempfile.mkdtemp(prefix="searchupp_bench_")
+    try:
+        shutil.copytree(os.path.join(project_dir, 'modules'), os.path.join(work_dir, 'modules'),
+                        ignore=shutil.ignore_patterns('__pycache__'))
+        env = dict(os.environ)
+        env.update({
+            "BRAVE_KEY": "benchmark",
+            "BRAVE_API_URL": f"{server.base_url}/res/v1/web/search",
+            "GEMINI_KEY": "benchmark",
+            "GEMINI_API_ENDPOINT": server.base_url,
+            "OLLAMA_HOST": server.base_url,
+            "MODE": "Local" if args.llm == "ollama" else "Cloud",
+            "METRICS_TEXTFILE": "",
+        })
+        env.update(modes[mode]['env'])
+        config = {
+            'mode': mode,
+            'scrape_only': modes[mode]['scrape_only'],
+            'concurrency': concurrency,
+            'queries': args.queries,
+            'urls': args.urls,
+            'model': "bench-model" if args.llm == "ollama" else "gemini-1.5-flash-002",
+        }
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(config)],
+            cwd=work_dir, env=env, capture_output=True, text=True,
+        )
+        for line in reversed(result.stdout.splitlines()):
+            if line.startswith(result_marker):
+                return json.loads(line[len(result_marker):])
+        sys.exit(f"{mode} x{concurrency} failed:\n{(result.stderr or result.stdout)[-2000:]}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="scrape,single,pipelined,map_reduce",
+                        help="comma-separated modes to run")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated numbers of concurrent queries")
+    parser.add_argument("--queries", type=int, default=8, help="queries per mode and concurrency level")
+    parser.add_argument("--urls", type=int, default=5, help="URLs scraped per query")
+    parser.add_argument("--llm", choices=["gemini", "ollama"], default="gemini",
+                        help="summarizer stand-in (Cloud or Local mode)")
+    parser.add_argument("--page-latency", type=float, default=0.05, help="seconds per page response")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="seconds per Brave response")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per LLM call")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    selected = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in selected if mode not in modes]
+    if unknown:
+        sys.exit(f"Unknown modes: {', '.join(unknown)} (choose from {', '.join(modes)})")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    server = start_server({
+        'page': args.page_latency,
+        'search': args.search_latency,
+        'embed': args.embed_latency,
+        'llm': args.llm_latency,
+    }, max(args.urls * 2, 10))
+    print(f"Stand-in services on {server.base_url} ({len(server.pages)} corpus pages, "
+          f"{args.queries} queries x {args.urls} URLs per run, {args.llm} summarizer)\n")
+    print(f"{'mode':<12} {'conc':>4} {'p50 (s)':>9} {'p95 (s)':>9} {'pages/s':>9} {'peak RSS':>10} {'failed':>7}")
+    try:
+        for mode in selected:
+            for concurrency in levels:
+                result = run_config(mode, concurrency, args, server)
+                latencies = result['latencies']
+                print(f"{mode:<12} {concurrency:>4} {percentile(latencies, 0.5):>9.2f} "
+                      f"{percentile(latencies, 0.95):>9.2f} {result['pages'] / result['wall']:>9.1f} "
+                      f"{result['peak_rss'] / 2**20:>7.0f} MB {result['failed']:>7}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
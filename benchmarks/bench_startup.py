@@ -0,0 +1,100 @@
+"""
+Cold-start Benchmark
+
+Measures how long a fresh Python process takes to import what the Search
+page imports before its first paint, using `python -X importtime`, and
+lists the slowest imports. With --render it also runs paths/search.py
+once through Streamlit's AppTest harness in a fresh process and reports
+the time from process start to the end of the first script run.
+
+Usage:
+------
+python benchmarks/bench_startup.py [--rounds N] [--top N] [--render]
+
+Each round is a separate interpreter, so results are cold-import times
+(the OS file cache stays warm). Medians are reported.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported by paths/search.py before anything is drawn
+page_modules = ["modules.search_modules", "modules.history_store", "modules.jobs", "modules.ui_cache"]
+
+render_script = """
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("paths/search.py", default_timeout=120)
+app.run()
+if app.exception:
+    raise SystemExit(str(app.exception[0].message))
+if not app.title:
+    raise SystemExit("paths/search.py did not render (it needs Python 3.12 or newer)")
+"""
+
+
+def import_times(modules):
+    """Imports `modules` in a fresh interpreter; returns (wall seconds, {module: (self_us, cumulative_us)})."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=project_dir, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(result.stderr[-2000:])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, times
+
+
+def render_time():
+    """Runs the Search page once in a fresh interpreter; returns seconds from process start."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", render_script], cwd=project_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(result.stderr[-2000:])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument("--render", action="store_true", help="also time the first run of paths/search.py")
+    args = parser.parse_args()
+
+    walls = []
+    cumulative = {module: [] for module in page_modules}
+    last = {}
+    for _ in range(args.rounds):
+        wall, last = import_times(page_modules)
+        walls.append(wall)
+        for module in page_modules:
+            cumulative[module].append(last.get(module, (0, 0))[1] / 1e6)
+
+    print(f"Cold import of the Search page modules ({args.rounds} rounds, median)")
+    print(f"{'process wall time':<40} {statistics.median(walls) * 1000:>8.0f} ms")
+    for module in page_modules:
+        print(f"{module:<40} {statistics.median(cumulative[module]) * 1000:>8.0f} ms")
+
+    print(f"\nSlowest imports in the last round (cumulative, top {args.top})")
+    top_level = sorted(last.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in top_level:
+        print(f"{name:<50} {cumulative_us / 1000:>8.1f} ms  (self {self_us / 1000:.1f} ms)")
+
+    if args.render:
+        renders = [render_time() for _ in range(args.rounds)]
+        print(f"\nTime to first render of paths/search.py: {statistics.median(renders) * 1000:.0f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,99 @@
-import ollama 
-import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 import time
-from datetime import datetime
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .page_cache import get_cached_page
+from .artifact_store import read_page
+from .dedup import dedupe_pages
+from .http_client import get_ollama_client, llm_read_timeout
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_KEY"))
 extract_instructions=os.getenv("SEARCH_SUMMARY_INSTRUCTIONS")
+summary_error="Could not generate summary. Please try again!"
+map_chunk_tokens=int(os.getenv("MAP_CHUNK_TOKENS", "3000"))
+reduce_max_tokens=int(os.getenv("REDUCE_MAX_TOKENS", "6000"))
+dedupe_enabled=os.getenv("DEDUPE_PAGES", "true").lower() == "true"
+# Alternative Gemini API host, e.g. the local stand-in used by benchmarks/bench_pipeline.py
+gemini_api_endpoint=os.getenv("GEMINI_API_ENDPOINT")
+condense_instructions=os.getenv("PAGE_CONDENSE_INSTRUCTIONS", "You are a research assistant preparing notes for a later summary. From the webpage content provided, extract every fact, figure, definition, example and argument that is relevant to the user's search query as concise bullet points. Keep names, numbers and dates exact. Omit navigation, advertising and anything unrelated to the query. If nothing on the page is relevant, reply with 'No relevant content.'")
 
 
-def ollama_model(query, urls, key, key_dir, model="llama3.2:1b"):
+_genai = None
+_genai_lock = threading.Lock()
+_gemini_models = {}
+_gemini_models_lock = threading.Lock()
+
+def get_genai():
+    """
+    Returns the google.generativeai module, importing and configuring it on
+    first use. The SDK takes most of a second to import, so pages that never
+    call Gemini do not pay for it.
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            if gemini_api_endpoint:
+                # The REST transport accepts plain http:// endpoints
+                genai.configure(api_key=os.getenv("GEMINI_KEY"), transport="rest",
+                                client_options={"api_endpoint": gemini_api_endpoint})
+            else:
+                genai.configure(api_key=os.getenv("GEMINI_KEY"))
+            _genai = genai
+    return _genai
+
+def get_gemini_model(model, system_instruction):
+    """Returns a shared Gemini model object for a (model, system instruction) pair, creating it on first use."""
+    with _gemini_models_lock:
+        gemini = _gemini_models.get((model, system_instruction))
+        if gemini is None:
+            gemini = get_genai().GenerativeModel(model_name=model, system_instruction=system_instruction)
+            _gemini_models[(model, system_instruction)] = gemini
+    return gemini
+
+def read_scraped_pages(urls, key_dir, dedupe=None, stats=None):
+    """
+    Returns the scraped markdown for each URL, in URL order.
+
+    Pages are read from the copy stored for the search by the artifact
+    store, so the summary matches the saved artifacts even if another search
+    has re-scraped the URL since; the cross-search page cache is only a
+    fallback for pages missing there. URLs without content are skipped. Unless disabled (DEDUPE_PAGES=false or dedupe=False),
+    boilerplate and near-duplicate paragraphs are removed with
+    `dedupe_pages`; the removal counts and estimated tokens removed are
+    logged and, when `stats` is given, stored in it.
+    """
+    all_content = []
+    
+    for url in urls:
+        content = None
+        try:
+            content = read_page(key_dir, url)
+        except Exception as e:
+            print(f"Error reading stored page for {url}: {str(e)}")
+        if content is None:
+            content = get_cached_page(url)
+        
+        if content and content.strip():
+            all_content.append(content.strip())
+    
+    if dedupe if dedupe is not None else dedupe_enabled:
+        tokens_before = sum(estimate_tokens(page) for page in all_content)
+        all_content, dedupe_stats = dedupe_pages(all_content)
+        all_content = [page for page in all_content if page]
+        dedupe_stats['tokens_removed'] = tokens_before - sum(estimate_tokens(page) for page in all_content)
+        if dedupe_stats['boilerplate_lines'] or dedupe_stats['duplicate_paragraphs']:
+            print(f"Removed {dedupe_stats['boilerplate_lines']} boilerplate lines and "
+                  f"{dedupe_stats['duplicate_paragraphs']} duplicate paragraphs "
+                  f"(~{dedupe_stats['tokens_removed']} tokens)")
+        if stats is not None:
+            stats.update(dedupe_stats)
+    
+    return all_content
+
+def ollama_model(query, urls, key, key_dir, model="llama3.2:1b", pages=None):
     """
     Content Summarization Function using Ollama AI
 
@@ -38,10 +120,13 @@ def ollama_model(query, urls, key, key_dir, model="llama3.2:1b"):
         Directory containing scraped content
     model : str, optional
         Ollama AI model version to use (default: "llama3.2:1b")
+    pages : list, optional
+        Already prepared page contents (e.g. selected passages) to use
+        instead of reading the scraped files
 
     Summarization Workflow:
     ----------------------
-    1. Locate and read markdown files from scraped URLs
+    1. Read scraped pages from the page cache or the URL-specific markdown files
     2. Prepare comprehensive input for Ollama AI
     3. Generate summary using predefined extraction instructions
     4. Save summary to a markdown file in the key directory
@@ -54,7 +139,7 @@ def ollama_model(query, urls, key, key_dir, model="llama3.2:1b"):
 
     File Management:
     ---------------
-    - Reads markdown files from URL-specific directories
+    - Reads pages from the page cache, falling back to URL-specific directories
     - Generates summary files with descriptive naming
     - Ensures organized storage of generated summaries
 
@@ -69,24 +154,8 @@ def ollama_model(query, urls, key, key_dir, model="llama3.2:1b"):
     ollama_model('Python programming', urls, 'python_search', '/output/dir')
     # Generates AI-powered summaries for the given URLs
     """
-    all_content = []
-    today_date = datetime.now().strftime("%d-%m-%Y")
-    
     print("\nReading scraped content...")
-    for url in urls:
-        filename = url.split('//')[-1]
-        filename = re.sub(r'[<>:"/\\|?*#]', '-', filename)
-        filename = filename.replace('.', '_')
-        file_path = os.path.join(key_dir, filename, f"{today_date}.md")
-        
-        try:
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        all_content.append(content)
-        except Exception as e:
-            print(f"Error reading file {file_path}: {str(e)}")
+    all_content = pages if pages is not None else read_scraped_pages(urls, key_dir)
     
     if not all_content:
         print("No content found in scraped files.")
@@ -96,7 +165,7 @@ def ollama_model(query, urls, key, key_dir, model="llama3.2:1b"):
     
     print(f"\nGenerating summary using {model}...")
     try:
-        response: ollama.ChatResponse = ollama.chat(model=model, messages=[
+        response = get_ollama_client().chat(model=model, messages=[
         {
             'role': 'system',
             'content': extract_instructions,
@@ -112,7 +181,7 @@ def ollama_model(query, urls, key, key_dir, model="llama3.2:1b"):
         print("Error generating summary. Please try again.")
         return "Could not generate summary. Please try again!"
 
-def gemini_smart_summary(query, urls, key, key_dir, model="gemini-1.5-flash-002"):
+def gemini_smart_summary(query, urls, key, key_dir, model="gemini-1.5-flash-002", pages=None):
     """
     Content Summarization Function using Google Gemini AI
 
@@ -139,10 +208,13 @@ def gemini_smart_summary(query, urls, key, key_dir, model="gemini-1.5-flash-002"
         Directory containing scraped content
     model : str, optional
         Gemini AI model version to use (default: "gemini-1.5-flash-002")
+    pages : list, optional
+        Already prepared page contents (e.g. selected passages) to use
+        instead of reading the scraped files
 
     Summarization Workflow:
     ----------------------
-    1. Locate and read markdown files from scraped URLs
+    1. Read scraped pages from the page cache or the URL-specific markdown files
     2. Prepare comprehensive input for Gemini AI
     3. Generate summary using predefined extraction instructions
     4. Save summary to a markdown file in the key directory
@@ -155,7 +227,7 @@ def gemini_smart_summary(query, urls, key, key_dir, model="gemini-1.5-flash-002"
 
     File Management:
     ---------------
-    - Reads markdown files from URL-specific directories
+    - Reads pages from the page cache, falling back to URL-specific directories
     - Generates summary files with descriptive naming
     - Ensures organized storage of generated summaries
 
@@ -171,24 +243,8 @@ def gemini_smart_summary(query, urls, key, key_dir, model="gemini-1.5-flash-002"
     # Generates AI-powered summaries for the given URLs
     """
 
-    all_content = []
-    today_date = datetime.now().strftime("%d-%m-%Y")
-    
     print("\nReading scraped content...")
-    for url in urls:
-        filename = url.split('//')[-1]
-        filename = re.sub(r'[<>:"/\\|?*#]', '-', filename)
-        filename = filename.replace('.', '_')
-        file_path = os.path.join(key_dir, filename, f"{today_date}.md")
-        
-        try:
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        all_content.append(content)
-        except Exception as e:
-            print(f"Error reading file {file_path}: {str(e)}")
+    all_content = pages if pages is not None else read_scraped_pages(urls, key_dir)
     
     if not all_content:
         print("No content found in scraped files.")
@@ -197,10 +253,7 @@ def gemini_smart_summary(query, urls, key, key_dir, model="gemini-1.5-flash-002"
     text = f"User Search Query: {query}\n\n Scraped Webpage Contents:\n\n" + "\n\n---\n\n".join(all_content)
     
     print("\nGenerating smart summary using Gemini...")
-    model = genai.GenerativeModel(
-        model_name=model,
-        system_instruction=extract_instructions
-    )
+    model = get_gemini_model(model, extract_instructions)
     
     try:
         result = model.generate_content(text)
@@ -210,3 +263,234 @@ def gemini_smart_summary(query, urls, key, key_dir, model="gemini-1.5-flash-002"
         if hasattr(e, 'status_code'):
             print(f"API Error Status Code: {e.status_code}")
         return "Could not generate summary. Please try again!"
+
+def generate_text(system_instruction, text, model, local=False):
+    """
+    Runs a single LLM call with the given system instruction.
+
+    Dispatches to Ollama when `local` is True and to Gemini otherwise.
+    Exceptions are left to the caller.
+    """
+    if local:
+        response = get_ollama_client().chat(model=model, messages=[
+            {'role': 'system', 'content': system_instruction},
+            {'role': 'user', 'content': text},
+        ])
+        return response['message']['content']
+    gemini = get_gemini_model(model, system_instruction)
+    return gemini.generate_content(text, request_options={'timeout': llm_read_timeout}).text
+
+def condense_page(query, content, model, local=False):
+    """
+    Page Condensation Function
+
+    Reduces one scraped page to the notes that matter for the query, so the 
+    final synthesis works from a short digest instead of the raw page.
+
+    Parameters:
+    -----------
+    query : str
+        The original search query
+    content : str
+        Markdown of a single scraped page
+    model : str
+        Model used for condensation
+    local : bool, optional
+        Use Ollama instead of Gemini (default: False)
+
+    Returns:
+    --------
+    str
+        Condensed notes for the page
+    """
+    text = f"User Search Query: {query}\n\n Scraped Webpage Content:\n\n{content}"
+    return generate_text(condense_instructions, text, model, local)
+
+def synthesize_summary(query, notes, model, local=False):
+    """
+    Final Synthesis Function
+
+    Writes the search summary from per-page notes using the standard 
+    summary instructions. Returns the fallback message on failure, like 
+    the single-shot summarizers.
+    """
+    if not notes:
+        print("No content found to synthesize.")
+        return "Could not generate summary. Please try again!"
+    
+    text = f"User Search Query: {query}\n\n Condensed Webpage Notes:\n\n" + "\n\n---\n\n".join(notes)
+    
+    print(f"\nSynthesizing summary from {len(notes)} pages using {model}...")
+    try:
+        return generate_text(extract_instructions, text, model, local)
+    except Exception as e:
+        print(f"Failed to generate summary: {str(e)}")
+        return "Could not generate summary. Please try again!"
+
+def fallback_summary(query, pages, excerpt_chars=800):
+    """
+    Extractive Fallback Summary Function
+
+    Builds a digest from the opening headings and paragraphs of each page, 
+    with its source URL. Used when the model summary cannot be produced 
+    within the latency budget, so the user still gets an answer in time.
+
+    Parameters:
+    -----------
+    query : str
+        The original search query
+    pages : list
+        Scraped markdown pages, as returned by read_scraped_pages
+    excerpt_chars : int, optional
+        Approximate excerpt length per page (default: 800)
+
+    Returns:
+    --------
+    str
+        Markdown digest, or the standard fallback message if there are no pages
+    """
+    if not pages:
+        return summary_error
+    
+    sections = [
+        f"# {query}\n",
+        "_The AI summary did not finish within the time budget. Key excerpts from the sources are shown instead._\n",
+    ]
+    for page in pages:
+        source = "Source"
+        excerpt = []
+        length = 0
+        for line in page.splitlines():
+            line = line.strip()
+            if line.startswith("# Source URL:"):
+                source = line[len("# Source URL:"):].strip()
+            elif line and not line.startswith("# Scraped on:") and length < excerpt_chars:
+                if line.startswith("#"):
+                    line = f"**{line.lstrip('#').strip()}**"
+                excerpt.append(line)
+                length += len(line)
+        sections.append(f"## {source}\n\n" + "\n\n".join(excerpt) + "\n")
+    return "\n".join(sections)
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), good enough to compare prompt sizes."""
+    return (len(text) + 3) // 4
+
+def split_into_chunks(content, max_tokens):
+    """
+    Splits page markdown into chunks of at most `max_tokens` (estimated), 
+    breaking on blank lines and then on lines so paragraphs stay intact 
+    where possible.
+    """
+    max_chars = max_tokens * 4
+    if len(content) <= max_chars:
+        return [content]
+    chunks = []
+    current = ""
+    for block in re.split(r"\n\s*\n", content):
+        pieces = [block] if len(block) <= max_chars else block.splitlines()
+        for piece in pieces:
+            while len(piece) > max_chars:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(piece[:max_chars])
+                piece = piece[max_chars:]
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def map_reduce_summary(query, pages, model, local=False, workers=4, stats=None):
+    """
+    Map-Reduce Summarization Function
+
+    Summarizes any number of pages without building one giant prompt. Each 
+    page is split into chunks of at most MAP_CHUNK_TOKENS, every chunk is 
+    condensed against the query in parallel (map), and the notes are 
+    combined into the final summary (reduce). When the notes themselves 
+    exceed REDUCE_MAX_TOKENS they are condensed again in groups first, so 
+    small local models never see an oversized prompt.
+
+    Parameters:
+    -----------
+    query : str
+        The original search query
+    pages : list
+        Scraped markdown pages, as returned by read_scraped_pages
+    model : str
+        Model used for both stages
+    local : bool, optional
+        Use Ollama instead of Gemini (default: False)
+    workers : int, optional
+        Maximum parallel condensation calls (default: 4)
+    stats : dict, optional
+        Filled with per-stage token counts and timings when given
+
+    Returns:
+    --------
+    str
+        The generated summary, or the standard fallback message
+
+    Example:
+    --------
+    stats = {}
+    summary = map_reduce_summary('Python tips', read_scraped_pages(urls, key_dir),
+                                 'llama3.2:1b', local=True, stats=stats)
+    print(stats['map']['input_tokens'], stats['reduce']['seconds'])
+    """
+    stats = {} if stats is None else stats
+    chunks = [chunk for page in pages for chunk in split_into_chunks(page, map_chunk_tokens)]
+    if not chunks:
+        print("No content found in scraped files.")
+        return summary_error
+
+    def condense(chunk):
+        try:
+            return condense_page(query, chunk, model, local)
+        except Exception as e:
+            print(f"Failed to condense chunk, using raw content: {str(e)}")
+            return chunk
+
+    print(f"\nMap stage: condensing {len(chunks)} chunks from {len(pages)} pages with {workers} workers...")
+    map_start = time.time()
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        notes = list(executor.map(condense, chunks))
+    notes = [note for note in notes if note and note.strip() != "No relevant content."]
+    stats['map'] = {
+        'pages': len(pages),
+        'chunks': len(chunks),
+        'input_tokens': sum(estimate_tokens(chunk) for chunk in chunks),
+        'output_tokens': sum(estimate_tokens(note) for note in notes),
+        'seconds': round(time.time() - map_start, 2),
+    }
+    print(f"Map stage: {stats['map']}")
+
+    # Collapse the notes in groups until they fit one reduce prompt
+    rounds = 0
+    while len(notes) > 1 and sum(estimate_tokens(note) for note in notes) > reduce_max_tokens and rounds < 3:
+        groups = [[]]
+        for note in notes:
+            if groups[-1] and sum(estimate_tokens(n) for n in groups[-1]) + estimate_tokens(note) > reduce_max_tokens:
+                groups.append([])
+            groups[-1].append(note)
+        if len(groups) == len(notes):
+            break
+        print(f"Notes exceed {reduce_max_tokens} tokens, collapsing {len(notes)} notes into {len(groups)} groups...")
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            notes = list(executor.map(condense, ["\n\n---\n\n".join(group) for group in groups]))
+        rounds += 1
+
+    reduce_start = time.time()
+    summary = synthesize_summary(query, notes, model, local)
+    stats['reduce'] = {
+        'collapse_rounds': rounds,
+        'input_tokens': sum(estimate_tokens(note) for note in notes),
+        'output_tokens': estimate_tokens(summary),
+        'seconds': round(time.time() - reduce_start, 2),
+    }
+    print(f"Reduce stage: {stats['reduce']}")
+    return summary
@@ -0,0 +1,515 @@
+"""
+Artifact Store
+
+Scraped pages are stored once, compressed, under the SHA-256 of their
+content in search/blobs/; each search/search_<id>/manifest.json maps the
+search's URLs to blobs. Retention by age and total size plus garbage
+collection of unreferenced blobs keep the search/ directory bounded.
+
+Usage:
+------
+python -m modules.artifact_store gc [--days N] [--max-mb N] [--dry-run]
+python -m modules.artifact_store migrate
+python -m modules.artifact_store stats
+"""
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Artifact store configuration (overridable through the .env file)
+artifact_store_mode = os.getenv("ARTIFACT_STORE", "blobs").lower()
+artifact_retention_days = float(os.getenv("ARTIFACT_RETENTION_DAYS", "0"))
+artifact_max_mb = float(os.getenv("ARTIFACT_MAX_MB", "0"))
+
+search_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search')
+blobs_dir = os.path.join(search_dir, 'blobs')
+manifest_file_name = "manifest.json"
+
+# zstd when the zstandard package is installed, gzip otherwise; reads handle both
+blob_codec = "zst" if zstandard is not None else "gz"
+codecs = ("zst", "gz")
+
+# Unreferenced blobs younger than this are kept: a search may be about to reference them
+gc_grace_seconds = 3600
+# Blobs released by the page cache only need to outlive a concurrent manifest write
+release_grace_seconds = 60
+
+_manifest_lock = threading.Lock()
+
+
+def page_dir_name(url):
+    """Returns the per-URL directory name used by the legacy one-file-per-page layout."""
+    filename = url.split('//')[-1]
+    filename = re.sub(r'[<>:"/\\|?*#]', '-', filename)
+    return filename.replace('.', '_')
+
+
+def legacy_page_file(url, key_dir):
+    """
+    Returns the dated markdown path for a URL inside a search directory,
+    creating the per-URL directory if needed (ARTIFACT_STORE=files).
+    """
+    storage_path = os.path.join(key_dir, page_dir_name(url))
+    os.makedirs(storage_path, exist_ok=True)
+    today_date = datetime.now().strftime("%d-%m-%Y")
+    return os.path.join(storage_path, f"{today_date}.md")
+
+
+def _blob_path(digest, codec):
+    return os.path.join(blobs_dir, digest[:2], f"{digest}.{codec}")
+
+
+def _compress(data, codec):
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data, codec):
+    if codec == "zst":
+        if zstandard is None:
+            raise RuntimeError("Reading a zstd blob needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def put_blob(data):
+    """
+    Stores bytes under their SHA-256 and returns (digest, codec).
+
+    Identical content is stored once: if a readable blob already exists
+    it is only touched, which also protects it from a concurrent GC.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    for codec in codecs:
+        if codec == "zst" and zstandard is None:
+            continue
+        path = _blob_path(digest, codec)
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+                return digest, codec
+            except FileNotFoundError:
+                break
+    path = _blob_path(digest, blob_codec)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_compress(data, blob_codec))
+    os.replace(temp_path, path)
+    return digest, blob_codec
+
+
+def get_blob(digest, codec):
+    """Returns the decompressed bytes of a blob."""
+    with open(_blob_path(digest, codec), 'rb') as f:
+        return _decompress(f.read(), codec)
+
+
+def read_manifest(key_dir):
+    """Returns a search's manifest ({'pages': {url: entry}}), empty if it has none."""
+    try:
+        with open(os.path.join(key_dir, manifest_file_name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'pages': {}}
+
+
+def _write_manifest(key_dir, manifest):
+    path = os.path.join(key_dir, manifest_file_name)
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(temp_path, path)
+
+
+def store_page(key_dir, url, text):
+    """
+    Page Artifact Store Function
+
+    Saves the scraped markdown of one URL for a search. With the default
+    ARTIFACT_STORE=blobs the text goes into the shared, compressed,
+    content-addressed blob store and the search's manifest.json points to
+    it, so a page hit by many searches is stored once and a search
+    directory holds a handful of files instead of a directory per URL.
+    ARTIFACT_STORE=files keeps the original dated .md file per URL.
+
+    Parameters:
+    -----------
+    key_dir : str
+        Directory of the search
+    url : str
+        The page URL
+    text : str
+        Markdown to store (including the source header)
+
+    Returns:
+    --------
+    str
+        Where the page went, for logging
+
+    Example:
+    --------
+    store_page('search/search_42', 'https://example.com', '# Source URL: ...')
+    print(read_page('search/search_42', 'https://example.com'))
+    """
+    if artifact_store_mode == "files":
+        output_file = legacy_page_file(url, key_dir)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return output_file
+
+    data = text.encode('utf-8')
+    digest, codec = put_blob(data)
+    with _manifest_lock:
+        manifest = read_manifest(key_dir)
+        manifest.setdefault('pages', {})[url] = {
+            'blob': digest,
+            'codec': codec,
+            'size': len(data),
+            'stored': datetime.now().strftime("%d-%m-%Y %H:%M:%S"),
+        }
+        _write_manifest(key_dir, manifest)
+    return f"blob {digest[:12]}"
+
+
+def _legacy_pages(key_dir):
+    """Yields (url, path) of the newest dated .md file in each legacy per-URL directory."""
+    for page_dir in sorted(glob.glob(os.path.join(key_dir, '*', ''))):
+        files = glob.glob(os.path.join(page_dir, '*.md'))
+        if not files:
+            continue
+        path = max(files, key=os.path.getmtime)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                first_line = f.readline()
+        except Exception:
+            continue
+        match = re.match(r"# Source URL: (\S+)", first_line)
+        yield (match.group(1) if match else os.path.basename(os.path.dirname(path))), path
+
+
+def read_page(key_dir, url):
+    """Returns the stored markdown for a URL in a search (manifest first, then legacy files), or None."""
+    entry = read_manifest(key_dir).get('pages', {}).get(url)
+    if entry:
+        try:
+            return get_blob(entry['blob'], entry['codec']).decode('utf-8')
+        except Exception as e:
+            print(f"Error reading blob for {url}: {str(e)}")
+    files = glob.glob(os.path.join(key_dir, page_dir_name(url), '*.md'))
+    if not files:
+        return None
+    with open(max(files, key=os.path.getmtime), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def iter_pages(key_dir):
+    """Yields (url, content) for every page stored for a search, in either layout."""
+    manifest_pages = read_manifest(key_dir).get('pages', {})
+    for url, entry in manifest_pages.items():
+        try:
+            yield url, get_blob(entry['blob'], entry['codec']).decode('utf-8')
+        except Exception as e:
+            print(f"Error reading blob for {url}: {str(e)}")
+    for url, path in _legacy_pages(key_dir):
+        if url in manifest_pages:
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            yield url, f.read()
+
+
+def _search_dirs():
+    """Returns the numbered search directories, oldest first."""
+    dirs = []
+    for key_dir in glob.glob(os.path.join(search_dir, 'search_*')):
+        search_id = os.path.basename(key_dir)[len('search_'):]
+        if search_id.isdigit() and os.path.isdir(key_dir):
+            results_file = os.path.join(key_dir, "web_search.json")
+            created = os.path.getmtime(results_file if os.path.exists(results_file) else key_dir)
+            dirs.append((created, int(search_id), key_dir))
+    return sorted(dirs)
+
+
+def _legacy_bytes(key_dir):
+    return sum(os.path.getsize(path) for _, path in _legacy_pages(key_dir))
+
+
+def expire_search_pages(key_dir):
+    """
+    Removes the stored pages of one search (manifest entries and legacy page
+    directories), keeping its results, summary and metadata. The blobs are
+    freed by the next `collect_garbage` if no other search uses them.
+    Returns the number of removed pages.
+    """
+    removed = 0
+    with _manifest_lock:
+        manifest = read_manifest(key_dir)
+        if manifest.get('pages'):
+            removed += len(manifest['pages'])
+            manifest['pages'] = {}
+            manifest['expired'] = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+            _write_manifest(key_dir, manifest)
+    for _, path in list(_legacy_pages(key_dir)):
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def _page_cache_blobs():
+    """Returns the blobs referenced by the page cache, or none if it cannot be read."""
+    try:
+        # Imported here: the page cache stores its pages through this module
+        from .page_cache import cached_blobs
+        return cached_blobs()
+    except Exception as e:
+        print(f"Error reading page cache references: {str(e)}")
+        return {}
+
+
+def _blob_files():
+    """Returns {(digest, codec): (path, size, mtime)} for every blob on disk."""
+    blobs = {}
+    for path in glob.glob(os.path.join(blobs_dir, '*', '*')):
+        name = os.path.basename(path)
+        digest, _, codec = name.partition('.')
+        if codec not in codecs:
+            continue
+        stat = os.stat(path)
+        blobs[(digest, codec)] = (path, stat.st_size, stat.st_mtime)
+    return blobs
+
+
+def collect_garbage(retention_days=None, max_mb=None, dry_run=False):
+    """
+    Artifact Garbage Collection Function
+
+    Applies the retention policy, then deletes blobs no search references.
+
+    Key Features:
+    - Age: pages of searches older than `retention_days` are expired
+    - Size: while referenced blobs plus legacy page files exceed `max_mb`,
+      pages of the oldest remaining searches are expired
+    - Page cache: its entries count as blob references (expired entries are
+      dropped first), so cached pages share blobs with searches and are
+      included in the size; PAGE_CACHE_MAX_MB bounds the cache itself
+    - Expired searches keep web_search.json, summary.md and their metadata,
+      so History and Recap still work; their pages leave the full-text index
+    - Unreferenced blobs are deleted once older than a grace period, so a
+      search writing its manifest concurrently never loses a blob
+    - Expired search API responses are pruned from search/search_cache
+
+    Parameters:
+    -----------
+    retention_days : float, optional
+        Maximum age of stored pages (default: ARTIFACT_RETENTION_DAYS, 0 keeps all)
+    max_mb : float, optional
+        Size budget for stored pages (default: ARTIFACT_MAX_MB, 0 is unlimited)
+    dry_run : bool, optional
+        Only report what would be removed
+
+    Returns:
+    --------
+    dict
+        Counts of expired searches and pages, deleted blobs, freed bytes
+        and pruned search cache entries
+
+    Example:
+    --------
+    collect_garbage(retention_days=30, max_mb=500, dry_run=True)
+    """
+    retention_days = artifact_retention_days if retention_days is None else retention_days
+    max_mb = artifact_max_mb if max_mb is None else max_mb
+    blobs = _blob_files()
+    now = time.time()
+
+    # Reference counts of blobs and the bytes each search keeps alive
+    searches = []
+    references = {}
+    for created, search_id, key_dir in _search_dirs():
+        pages = read_manifest(key_dir).get('pages', {})
+        referenced = {(entry['blob'], entry['codec']) for entry in pages.values()}
+        for blob in referenced:
+            references[blob] = references.get(blob, 0) + 1
+        searches.append({'id': search_id, 'dir': key_dir, 'created': created,
+                         'pages': len(pages), 'blobs': referenced, 'legacy_bytes': _legacy_bytes(key_dir)})
+    # The cross-search page cache keeps its (unexpired) entries' blobs alive
+    for blob in _page_cache_blobs():
+        references[blob] = references.get(blob, 0) + 1
+    total = (sum(blobs[blob][1] for blob in references if blob in blobs)
+             + sum(search['legacy_bytes'] for search in searches))
+
+    expired = []
+
+    def expire(search):
+        nonlocal total
+        for blob in search['blobs']:
+            references[blob] -= 1
+            if references[blob] == 0 and blob in blobs:
+                total -= blobs[blob][1]
+        total -= search['legacy_bytes']
+        expired.append(search)
+
+    for search in searches:
+        has_pages = search['blobs'] or search['legacy_bytes']
+        if has_pages and retention_days > 0 and now - search['created'] > retention_days * 86400:
+            expire(search)
+    for search in searches:
+        if not max_mb or total <= max_mb * 1024 * 1024:
+            break
+        if search not in expired and (search['blobs'] or search['legacy_bytes']):
+            expire(search)
+
+    stats = {'expired_searches': len(expired), 'expired_pages': 0, 'deleted_blobs': 0, 'freed_bytes': 0}
+    for search in expired:
+        if dry_run:
+            stats['expired_pages'] += search['pages']
+            stats['freed_bytes'] += search['legacy_bytes']
+            continue
+        stats['expired_pages'] += expire_search_pages(search['dir'])
+        stats['freed_bytes'] += search['legacy_bytes']
+        try:
+            # Imported here: the full-text index reads pages through this module
+            from .search_index import remove_search_pages
+            remove_search_pages(search['id'])
+        except Exception as e:
+            print(f"Error removing expired pages from the full-text index: {str(e)}")
+
+    for blob, (path, size, mtime) in blobs.items():
+        if references.get(blob, 0) > 0 or now - mtime < gc_grace_seconds:
+            continue
+        stats['deleted_blobs'] += 1
+        stats['freed_bytes'] += size
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    if not dry_run:
+        for shard in glob.glob(os.path.join(blobs_dir, '*', '')):
+            try:
+                os.rmdir(shard)
+            except OSError:
+                pass
+        try:
+            # Imported here like the other stores GC looks after
+            from .search_cache import prune_search_cache
+            stats['search_cache_entries'] = prune_search_cache()
+        except Exception as e:
+            print(f"Error pruning the search cache: {str(e)}")
+
+    prefix = "Would free" if dry_run else "Freed"
+    print(f"{prefix} {stats['freed_bytes'] / 2**20:.1f} MB: {stats['expired_pages']} pages of "
+          f"{stats['expired_searches']} searches expired, {stats['deleted_blobs']} unreferenced blobs")
+    return stats
+
+
+def release_blobs(blobs):
+    """
+    Deletes blobs dropped by the page cache right away instead of waiting
+    for `collect_garbage`, skipping any a search manifest references or
+    that were written in the last `release_grace_seconds`. Returns the
+    freed bytes.
+    """
+    if not blobs:
+        return 0
+    referenced = set()
+    for _, _, key_dir in _search_dirs():
+        for entry in read_manifest(key_dir).get('pages', {}).values():
+            referenced.add((entry['blob'], entry['codec']))
+    now = time.time()
+    freed = 0
+    for digest, codec in blobs:
+        if (digest, codec) in referenced:
+            continue
+        path = _blob_path(digest, codec)
+        try:
+            stat = os.stat(path)
+            if now - stat.st_mtime < release_grace_seconds:
+                continue
+            os.remove(path)
+            freed += stat.st_size
+        except FileNotFoundError:
+            pass
+    return freed
+
+
+def migrate_search_dirs():
+    """
+    Moves pages stored in the legacy one-directory-per-URL layout into the
+    blob store and the searches' manifests. Returns the number of migrated pages.
+    """
+    migrated = 0
+    for _, _, key_dir in _search_dirs():
+        for url, path in list(_legacy_pages(key_dir)):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            data = text.encode('utf-8')
+            digest, codec = put_blob(data)
+            with _manifest_lock:
+                manifest = read_manifest(key_dir)
+                manifest.setdefault('pages', {}).setdefault(url, {
+                    'blob': digest,
+                    'codec': codec,
+                    'size': len(data),
+                    'stored': datetime.fromtimestamp(os.path.getmtime(path)).strftime("%d-%m-%Y %H:%M:%S"),
+                })
+                _write_manifest(key_dir, manifest)
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            migrated += 1
+    print(f"Migrated {migrated} pages into the blob store")
+    return migrated
+
+
+def artifact_stats():
+    """
+    Returns the number and on-disk size of blobs, the size of their
+    uncompressed content and how many blobs the page cache references.
+    """
+    blobs = _blob_files()
+    stored = {}
+    for _, _, key_dir in _search_dirs():
+        for entry in read_manifest(key_dir).get('pages', {}).values():
+            stored[entry['blob']] = entry['size']
+    cached = _page_cache_blobs()
+    for (digest, _), size in cached.items():
+        stored[digest] = size
+    return {
+        'blobs': len(blobs),
+        'blob_bytes': sum(size for _, size, _ in blobs.values()),
+        'content_bytes': sum(stored.values()),
+        'page_cache_blobs': len(cached),
+        'codec': blob_codec,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["gc", "migrate", "stats"])
+    parser.add_argument("--days", type=float, help="retention in days (default: ARTIFACT_RETENTION_DAYS)")
+    parser.add_argument("--max-mb", type=float, help="size budget in MB (default: ARTIFACT_MAX_MB)")
+    parser.add_argument("--dry-run", action="store_true", help="only report what gc would remove")
+    args = parser.parse_args()
+    if args.command == "gc":
+        collect_garbage(args.days, args.max_mb, args.dry_run)
+    elif args.command == "migrate":
+        migrate_search_dirs()
+    else:
+        print(json.dumps(artifact_stats(), indent=4))
+
+
+if __name__ == "__main__":
+    main()
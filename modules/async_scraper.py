@@ -0,0 +1,203 @@
+import os
+import re
+import asyncio
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from .driver_pool import random_user_agent
+from .http_client import (connect_timeout, retry_statuses, retry_delay, record_request,
+                          record_failure, take_retry_token)
+
+# Async fetch configuration (overridable through the .env file)
+max_fetch_concurrency = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "32"))
+max_host_concurrency = int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", "4"))
+async_fetch_timeout = float(os.getenv("STATIC_FETCH_TIMEOUT", "10"))
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=...">
+meta_charset_pattern = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Retries per page, drawn from the 'pages' retry budget of the HTTP client module
+page_fetch_retries = 1
+
+
+async def _get_html(client, url):
+    headers = {
+        'User-Agent': random_user_agent(),
+        'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+    response = await client.get(url, headers=headers)
+    response.raise_for_status()
+    content_type = response.headers.get('Content-Type', '')
+    if 'html' not in content_type.lower():
+        raise ValueError(f"Unsupported content type: {content_type or 'unknown'}")
+    return _decode_html(response)
+
+
+def _decode_html(response):
+    """
+    Decodes a page body. The charset of the Content-Type header is trusted
+    unless it is missing or the ISO-8859-1 default many servers send; then
+    the page's <meta charset>, UTF-8 and finally a detected encoding are tried.
+    """
+    encoding = response.charset_encoding
+    if encoding and encoding.lower() not in ('iso-8859-1', 'latin-1'):
+        return response.text
+    content = response.content
+    match = meta_charset_pattern.search(content[:4096])
+    candidates = [match.group(1).decode('ascii', 'ignore')] if match else []
+    for candidate in candidates + ['utf-8']:
+        try:
+            return content.decode(candidate)
+        except (LookupError, UnicodeDecodeError):
+            pass
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(content).best()
+        if best is not None:
+            return str(best)
+    except ImportError:
+        pass
+    return content.decode(encoding or 'cp1252', errors='replace')
+
+
+def _is_transient(error):
+    """True for failures worth retrying: transport errors, 429 and transient 5xx."""
+    import httpx
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in retry_statuses
+    return isinstance(error, httpx.TransportError)
+
+
+async def _get_html_with_retries(client, url, timeout, limits):
+    """
+    Fetches a page under the concurrency `limits`, retrying a transient
+    failure with full-jitter backoff while the 'pages' retry budget allows.
+    """
+    record_request("pages")
+    attempt = 0
+    while True:
+        try:
+            async with limits[0], limits[1]:
+                return await asyncio.wait_for(_get_html(client, url), timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            transient = _is_transient(e)
+            if not transient or attempt >= page_fetch_retries or not take_retry_token("pages"):
+                if transient:
+                    record_failure("pages")
+                raise
+            # The backoff is slept without holding a concurrency slot
+            delay = retry_delay(attempt, getattr(e, 'response', None))
+            print(f"Retrying page fetch for {url} in {delay:.2f}s after error: {str(e) or type(e).__name__}")
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def _cancel_when_set(cancel_event, tasks):
+    while not cancel_event.is_set():
+        await asyncio.sleep(0.1)
+    print("Cancelling outstanding page fetches")
+    for task in tasks:
+        task.cancel()
+
+
+async def fetch_pages_async(urls, on_page, on_miss=None, max_concurrency=None,
+                            per_host=None, timeout=None, cancel_event=None):
+    """
+    Asynchronous Page Fetch Engine
+
+    Fetches many pages concurrently on a single event loop, handing each HTML
+    document to `on_page` as soon as it arrives.
+
+    Key Features:
+    - Global concurrency cap across all hosts
+    - Per-host concurrency cap so one site is never hammered
+    - Per-request timeout covering connect, headers and body, with a separate
+      connect timeout (HTTP_CONNECT_TIMEOUT)
+    - One retry of connection errors, 429 and transient 5xx with full-jitter
+      backoff (honouring Retry-After), within the 'pages' retry budget of the
+      HTTP client module; counters appear in `http_pool_stats()['pages']`
+    - Cooperative cancellation through a threading.Event
+    - `on_page` runs in a worker thread so parsing never blocks the loop
+
+    Parameters:
+    -----------
+    urls : list
+        URLs to fetch; duplicates are fetched once
+    on_page : callable
+        `on_page(url, html) -> bool`, returns False when the page is unusable
+    on_miss : callable, optional
+        `on_miss(url)` is called for every URL whose fetch failed, timed out
+        or was rejected by `on_page`, so callers can escalate it immediately
+    max_concurrency : int, optional
+        Global cap (default: SCRAPE_MAX_CONCURRENCY or 32)
+    per_host : int, optional
+        Per-host cap (default: SCRAPE_PER_HOST_CONCURRENCY or 4)
+    timeout : float, optional
+        Per-request timeout in seconds (default: STATIC_FETCH_TIMEOUT or 10)
+    cancel_event : threading.Event, optional
+        Setting this event cancels every fetch still in flight
+
+    Returns:
+    --------
+    dict
+        Maps each URL that finished to True (saved) or False (missed).
+        Cancelled URLs are absent.
+    """
+    import httpx
+    timeout = timeout or async_fetch_timeout
+    global_limit = asyncio.Semaphore(max_concurrency or max_fetch_concurrency)
+    host_limits = {}
+    results = {}
+    loop = asyncio.get_running_loop()
+
+    limits = httpx.Limits(max_connections=max_concurrency or max_fetch_concurrency,
+                          max_keepalive_connections=max_concurrency or max_fetch_concurrency)
+    # gzip and brotli (when installed) are negotiated by httpx automatically
+    transport = httpx.AsyncHTTPTransport(limits=limits)
+    client_timeout = httpx.Timeout(timeout, connect=min(connect_timeout, timeout))
+    async with httpx.AsyncClient(transport=transport, timeout=client_timeout, follow_redirects=True) as client:
+
+        async def fetch_one(url):
+            host = urlparse(url).netloc
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host or max_host_concurrency))
+            saved = False
+            try:
+                html = await _get_html_with_retries(client, url, timeout, (host_limit, global_limit))
+                saved = await loop.run_in_executor(None, on_page, url, html)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                print(f"Static fetch timed out for {url}")
+            except Exception as e:
+                print(f"Static fetch failed for {url}: {str(e)}")
+            results[url] = bool(saved)
+            if not saved and on_miss is not None:
+                on_miss(url)
+
+        tasks = [asyncio.create_task(fetch_one(url)) for url in dict.fromkeys(urls)]
+        watcher = None
+        if cancel_event is not None:
+            watcher = asyncio.create_task(_cancel_when_set(cancel_event, tasks))
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if watcher is not None:
+            watcher.cancel()
+
+    return results
+
+
+def fetch_pages(urls, on_page, **kwargs):
+    """
+    Synchronous wrapper around `fetch_pages_async`.
+
+    Runs the engine on a fresh event loop so it can be called from Streamlit
+    scripts and worker threads alike. If the calling thread already has a
+    running loop, the engine is run on a helper thread instead.
+    """
+    coroutine = fetch_pages_async(urls, on_page, **kwargs)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
@@ -0,0 +1,213 @@
+"""
+Headless Batch Runner
+
+Runs many searches from the command line without Streamlit, e.g. for
+scheduled research digests. Each query goes through the same `web_search`
+-> `smart_search` pipeline as the Search page, gets a row in the search
+history and writes the usual search/search_<id>/ artifacts.
+
+Usage:
+------
+python -m modules.batch queries.txt [--concurrency N] [--advanced]
+cat queries.txt | python -m modules.batch -
+
+One query per line; blank lines and lines starting with '#' are skipped.
+All queries run in one process, so they share the Chrome driver pool, the
+pooled HTTP sessions and the page, search and embedding caches.
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from .search_modules import web_search, smart_search, plan_search, get_scrape_tier_stats
+from .ai_modules import summary_error
+from .history_store import add_search
+from .driver_pool import get_driver_pool
+from .http_client import http_pool_stats
+
+# Batch configuration (overridable through the .env file)
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "2"))
+
+# Same search defaults as the Search page
+simple_search_number = int(os.getenv("SIMPLE_SEARCH_NUMBER", "5"))
+complex_search_number = int(os.getenv("COMPLEX_SEARCH_NUMBER", "10"))
+simple_llm_model = os.getenv("SIMPLE_LLM_MODEL", "gemini-1.5-flash-002")
+complex_llm_model = os.getenv("COMPLEX_LLM_MODEL", "gemini-exp-1206")
+
+
+def default_tiers(advanced=False):
+    """Returns the planner tiers of the Search page, with the complex tier first for advanced searches."""
+    tiers = [{"name": "simple", "model": simple_llm_model, "max_urls": simple_search_number}]
+    if advanced:
+        tiers.insert(0, {"name": "complex", "model": complex_llm_model, "max_urls": complex_search_number})
+    return tiers
+
+
+def read_queries(path):
+    """Returns the queries in a file (or stdin for '-'), skipping blank lines and comments."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(max(math.ceil(fraction * len(ordered)), 1), len(ordered))
+    return ordered[rank - 1]
+
+
+def run_query(query, num_searches, model, deadline_seconds=0, tiers=None):
+    """
+    Runs one search end to end and returns its outcome.
+
+    The result dict holds the history `id`, `query`, `ok`, `seconds`, the
+    summary path and, on failure, the `error`. Exceptions are caught so one
+    failing query does not stop the batch.
+    """
+    start_time = time.time()
+    result = {'id': None, 'query': query, 'ok': False, 'seconds': 0.0, 'summary_path': None, 'error': None}
+    try:
+        record = add_search(query)
+        result['id'] = record['id']
+        plan = None
+        if deadline_seconds > 0:
+            plan = plan_search(deadline_seconds, tiers if tiers is not None else default_tiers())
+            num_searches, model = plan['num_urls'], plan['model']
+        urls = web_search(query, record['id'], num_searches)
+        deadline_at = start_time + deadline_seconds if plan else None
+        summary = smart_search(query, record['id'], urls, model, plan=plan, deadline_at=deadline_at)
+        result['ok'] = bool(summary) and summary != summary_error
+        if os.path.exists(record['summary_path']):
+            result['summary_path'] = record['summary_path']
+        if not result['ok']:
+            result['error'] = "no summary generated"
+    except Exception as e:
+        print(f"Batch query failed: {query}: {str(e)}")
+        result['error'] = str(e)
+    result['seconds'] = round(time.time() - start_time, 2)
+    return result
+
+
+def run_batch(queries, num_searches, model, concurrency=None, deadline_seconds=0, tiers=None):
+    """
+    Batch Search Function
+
+    Runs a list of queries with bounded concurrency and reports throughput
+    and latency.
+
+    Key Features:
+    - At most `concurrency` searches in flight at once
+    - Shared driver pool, HTTP sessions and caches across all queries
+    - Same history rows and search/search_<id>/ artifacts as the Search page
+    - Failures are recorded per query instead of aborting the batch
+
+    Parameters:
+    -----------
+    queries : list of str
+        Queries to search
+    num_searches : int
+        Number of URLs to scrape per query
+    model : str
+        Model used for summarization
+    concurrency : int, optional
+        Searches in flight at once (default: BATCH_CONCURRENCY, 2)
+    deadline_seconds : float, optional
+        Per-query latency budget; when set, `plan_search` picks the URL
+        count and model from `tiers` like on the Search page
+    tiers : list of dict, optional
+        Planner tiers used with `deadline_seconds` (default: the simple
+        Search page tier, see `default_tiers`)
+
+    Returns:
+    --------
+    dict
+        'results' (one dict per query, in input order) and 'stats' with
+        wall time, throughput and latency percentiles
+
+    Example:
+    --------
+    report = run_batch(['python tips', 'rust vs go'], 5, 'gemini-1.5-flash-002')
+    print(report['stats']['queries_per_minute'])
+    """
+    concurrency = max(1, concurrency or batch_concurrency)
+    batch_start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(
+            lambda query: run_query(query, num_searches, model, deadline_seconds, tiers), queries))
+    wall = time.time() - batch_start
+
+    latencies = [result['seconds'] for result in results if result['ok']]
+    succeeded = len(latencies)
+    stats = {
+        'queries': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 2),
+        'queries_per_minute': round(succeeded / wall * 60, 2) if wall > 0 else 0.0,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p95': percentile(latencies, 0.95),
+        'latency_max': max(latencies, default=0.0),
+        'scrape_tiers': get_scrape_tier_stats(),
+    }
+    return {'results': results, 'stats': stats}
+
+
+def print_report(report):
+    """Prints the per-query outcomes and the throughput/latency summary."""
+    stats = report['stats']
+    print("\nBatch results")
+    for result in report['results']:
+        status = "ok" if result['ok'] else f"FAILED ({result['error']})"
+        print(f"  [{result['id']}] {result['query'][:60]:<60} {result['seconds']:>8.2f}s  {status}")
+    print(f"\n{stats['succeeded']}/{stats['queries']} queries succeeded in {stats['wall_seconds']:.2f}s "
+          f"with concurrency {stats['concurrency']}")
+    print(f"Throughput: {stats['queries_per_minute']:.2f} queries/minute")
+    print(f"Latency (successful queries): p50 {stats['latency_p50']:.2f}s, "
+          f"p95 {stats['latency_p95']:.2f}s, max {stats['latency_max']:.2f}s")
+    print(f"Scrape tiers: {stats['scrape_tiers']}")
+    print(f"Driver pool: {get_driver_pool().stats()}")
+    print(f"HTTP pools: {http_pool_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="file with one query per line, or '-' for stdin")
+    parser.add_argument("--concurrency", type=int, default=batch_concurrency,
+                        help="searches in flight at once (default: BATCH_CONCURRENCY)")
+    parser.add_argument("--advanced", action="store_true",
+                        help="use the Advanced Search URL count and model")
+    parser.add_argument("--num", type=int, help="URLs to scrape per query")
+    parser.add_argument("--model", help="model used for summarization")
+    parser.add_argument("--deadline", type=float, default=float(os.getenv("SEARCH_DEADLINE_SECONDS", "0")),
+                        help="per-query latency budget in seconds (default: SEARCH_DEADLINE_SECONDS)")
+    parser.add_argument("--report", help="also write the results and stats to this JSON file")
+    args = parser.parse_args()
+
+    num_searches = args.num or (complex_search_number if args.advanced else simple_search_number)
+    model = args.model or (complex_llm_model if args.advanced else simple_llm_model)
+    tiers = default_tiers(args.advanced)
+
+    queries = read_queries(args.queries)
+    if not queries:
+        sys.exit("No queries to run")
+    print(f"Running {len(queries)} queries with concurrency {args.concurrency}...")
+    report = run_batch(queries, num_searches, model, args.concurrency, args.deadline, tiers)
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+    sys.exit(0 if report['stats']['failed'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Database files whose schema has been created by this process
+_initialized_paths = set()
+# Reentrant: `after_create` may open other databases for the first time
+_init_lock = threading.RLock()
+
+
+def connect(path, create_schema, after_create=None):
+    """
+    Opens a SQLite database file, creating its directory, switching it to
+    WAL and running `create_schema(connection)` the first time this process
+    opens `path`. `after_create()` then runs once, right after the schema
+    exists, and may itself open the database (e.g. to import legacy data).
+    The caller closes the returned connection.
+    """
+    if path not in _initialized_paths:
+        with _init_lock:
+            if path not in _initialized_paths:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                connection = sqlite3.connect(path, timeout=30)
+                try:
+                    with connection:
+                        connection.execute("PRAGMA journal_mode=WAL")
+                        create_schema(connection)
+                finally:
+                    connection.close()
+                _initialized_paths.add(path)
+                if after_create is not None:
+                    after_create()
+    return sqlite3.connect(path, timeout=30)
+
+
+@contextmanager
+def transaction(path, create_schema, after_create=None):
+    """Yields a connection to a database inside a transaction and closes it afterwards."""
+    connection = connect(path, create_schema, after_create)
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
@@ -0,0 +1,189 @@
+import os
+import re
+import hashlib
+from urllib.parse import urlparse
+
+# Deduplication configuration (overridable through the .env file)
+near_duplicate_threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+boilerplate_max_words = int(os.getenv("BOILERPLATE_MAX_WORDS", "15"))
+
+shingle_size = 4
+num_permutations = 64
+band_rows = 4
+# Paragraphs shorter than this are compared exactly instead of by MinHash
+min_shingle_words = 8
+header_prefixes = ("# Source URL:", "# Scraped on:")
+
+# MinHash permutations, built on first use so importing this module does not load numpy
+_permutations = None
+
+
+def _normalize(line):
+    return " ".join(re.findall(r"\w+", line.lower()))
+
+
+def _page_domain(page):
+    for line in page.splitlines()[:3]:
+        if line.startswith("# Source URL:"):
+            return urlparse(line[len("# Source URL:"):].strip()).netloc.lower().removeprefix("www.")
+    return ""
+
+
+def _minhash_permutations():
+    """Returns (prime, a, b) of the MinHash permutations (a * x + b) % prime."""
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+        rng = np.random.default_rng(1)
+        # Mersenne-style prime above 2**32 so (a * x + b) % prime fits in uint64
+        _permutations = (
+            np.uint64(4294967311),
+            rng.integers(1, 2 ** 31, size=num_permutations, dtype=np.uint64),
+            rng.integers(0, 2 ** 31, size=num_permutations, dtype=np.uint64),
+        )
+    return _permutations
+
+
+def minhash_signature(words):
+    """Returns the MinHash signature (uint64 vector) of the word shingles of a paragraph."""
+    import numpy as np
+    prime, perm_a, perm_b = _minhash_permutations()
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    return ((np.outer(perm_a, hashes) + perm_b[:, None]) % prime).min(axis=1)
+
+
+def new_dedupe_state():
+    """Returns the state `dedupe_next_page` keeps between the pages of one search."""
+    return {
+        'buckets': {},
+        'signatures': [],
+        'domain_lines': set(),
+        'stats': {'boilerplate_lines': 0, 'duplicate_paragraphs': 0, 'chars_before': 0, 'chars_after': 0},
+    }
+
+
+def _clean_lines(domain, lines, boilerplate, state):
+    """Drops boilerplate, repeated short lines and near-duplicate paragraphs from one page's lines."""
+    buckets = state['buckets']
+    signatures = state['signatures']
+    stats = state['stats']
+    kept = []
+    seen_short = set()
+    for line in lines:
+        normalized = _normalize(line)
+        if not normalized or line.startswith(header_prefixes):
+            kept.append(line)
+            continue
+        if (domain, normalized) in boilerplate:
+            stats['boilerplate_lines'] += 1
+            continue
+        words = normalized.split()
+        if len(words) < min_shingle_words:
+            if len(words) >= 3 and normalized in seen_short:
+                stats['duplicate_paragraphs'] += 1
+                continue
+            seen_short.add(normalized)
+            kept.append(line)
+            continue
+
+        signature = minhash_signature(words)
+        bands = [(band, signature[band:band + band_rows].tobytes())
+                 for band in range(0, num_permutations, band_rows)]
+        candidates = {match for band in bands for match in buckets.get(band, ())}
+        if any((signatures[match] == signature).mean() >= near_duplicate_threshold for match in candidates):
+            stats['duplicate_paragraphs'] += 1
+            continue
+        for band in bands:
+            buckets.setdefault(band, []).append(len(signatures))
+        signatures.append(signature)
+        kept.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def dedupe_next_page(page, state):
+    """
+    Cleans one page against the pages of the same search cleaned before it
+    with the same `state` (from `new_dedupe_state`), for pipelined summaries
+    where pages arrive one at a time.
+
+    Near-duplicates are found as in `dedupe_pages`. Boilerplate can only be
+    recognised from the second page of a domain on: short lines already seen
+    on an earlier page of the domain are dropped, and the earlier page keeps
+    them. Returns the cleaned page; counts accumulate in state['stats'].
+    """
+    domain = _page_domain(page)
+    lines = page.splitlines()
+    normalized_lines = set()
+    for line in lines:
+        normalized = _normalize(line)
+        if normalized and not line.startswith(header_prefixes) and len(normalized.split()) <= boilerplate_max_words:
+            normalized_lines.add((domain, normalized))
+    boilerplate = normalized_lines & state['domain_lines']
+    state['domain_lines'] |= normalized_lines
+    cleaned = _clean_lines(domain, lines, boilerplate, state)
+    state['stats']['chars_before'] += len(page)
+    state['stats']['chars_after'] += len(cleaned)
+    return cleaned
+
+
+def dedupe_pages(pages):
+    """
+    Near-duplicate and Boilerplate Removal Function
+
+    Cleans the scraped markdown of one search before it is sent to a model.
+
+    Cleaning Steps:
+    ---------------
+    1. Boilerplate: short lines (up to BOILERPLATE_MAX_WORDS words) that
+       appear on two or more pages of the same domain, such as navigation
+       entries, cookie banners and footers, are dropped from all of them
+    2. Exact repeats: a short line seen before in the same page is dropped
+    3. Near-duplicates: longer paragraphs are compared by MinHash over word
+       shingles, with LSH banding to find candidates. A paragraph whose
+       estimated similarity to an earlier paragraph (of any page) reaches
+       NEAR_DUPLICATE_THRESHOLD is dropped, so syndicated copies appear once
+
+    The source URL and scrape date header lines are always kept, and pages
+    keep their order.
+
+    Parameters:
+    -----------
+    pages : list
+        Scraped markdown pages, as returned by read_scraped_pages
+
+    Returns:
+    --------
+    tuple
+        (cleaned pages, stats dict with 'boilerplate_lines',
+        'duplicate_paragraphs', 'chars_before' and 'chars_after')
+
+    Example:
+    --------
+    pages, stats = dedupe_pages(read_scraped_pages(urls, key_dir))
+    """
+    parsed = [(_page_domain(page), page.splitlines()) for page in pages]
+
+    # Lines repeated across pages of one domain are boilerplate
+    pages_per_line = {}
+    domain_pages = {}
+    for index, (domain, lines) in enumerate(parsed):
+        domain_pages[domain] = domain_pages.get(domain, 0) + 1
+        for line in lines:
+            normalized = _normalize(line)
+            if normalized and len(normalized.split()) <= boilerplate_max_words:
+                pages_per_line.setdefault((domain, normalized), set()).add(index)
+    boilerplate = {key for key, seen in pages_per_line.items() if len(seen) > 1 and domain_pages[key[0]] > 1}
+
+    state = new_dedupe_state()
+    stats = state['stats']
+    stats['chars_before'] = sum(len(page) for page in pages)
+    cleaned = []
+    for domain, lines in parsed:
+        page = _clean_lines(domain, lines, boilerplate, state)
+        stats['chars_after'] += len(page)
+        cleaned.append(page)
+    return cleaned, stats
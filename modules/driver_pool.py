@@ -0,0 +1,334 @@
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Pool configuration (overridable through the .env file)
+pool_size = int(os.getenv("DRIVER_POOL_SIZE", "5"))
+max_pages_per_driver = int(os.getenv("DRIVER_MAX_PAGES", "25"))
+max_driver_memory_mb = int(os.getenv("DRIVER_MAX_MEMORY_MB", "1500"))
+
+# Lean browser profile (overridable through the .env file)
+lean_browser = os.getenv("LEAN_BROWSER", "true").lower() == "true"
+page_load_strategy = os.getenv("PAGE_LOAD_STRATEGY", "eager" if lean_browser else "normal")
+lean_excluded_sites = [site.strip().lower() for site in os.getenv("LEAN_BROWSER_EXCLUDE_SITES", "").split(",") if site.strip()]
+extra_blocked_patterns = [pattern.strip() for pattern in os.getenv("BLOCKED_URL_PATTERNS", "").split(",") if pattern.strip()]
+
+# Requests the lean profile never lets through: scraping only keeps headings, paragraphs and lists
+blocked_resource_patterns = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav", "*.m3u8", "*.mpd",
+]
+blocked_host_patterns = [
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagservices.com*", "*googletagmanager.com*",
+    "*google-analytics.com*", "*adservice.google.*", "*amazon-adsystem.com*", "*facebook.net*",
+    "*connect.facebook.com*", "*scorecardresearch.com*", "*quantserve.com*", "*hotjar.com*",
+    "*taboola.com*", "*outbrain.com*", "*criteo.com*", "*criteo.net*", "*adnxs.com*",
+    "*segment.io*", "*segment.com/analytics*", "*newrelic.com*", "*nr-data.net*", "*chartbeat.com*",
+]
+blocked_url_patterns = blocked_resource_patterns + blocked_host_patterns + extra_blocked_patterns
+
+# Elements the extraction keeps; lean navigations wait for the first of them instead of a full load
+content_selector = "h1, h2, h3, h4, h5, h6, p, ul, ol"
+
+_ua = None
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def random_user_agent():
+    """Returns a random desktop user agent, creating the UserAgent source on first use."""
+    global _ua
+    if _ua is None:
+        from fake_useragent import UserAgent
+        _ua = UserAgent()
+    return _ua.random
+
+
+def default_chrome_options():
+    """
+    Builds the headless Chrome options used for scraping.
+
+    The user agent is deliberately left out: pooled drivers get a fresh
+    user agent through the DevTools protocol every time they are checked out.
+    """
+    from selenium.webdriver.chrome.options import Options
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--enable-javascript')
+    chrome_options.add_argument('--ignore-certificate-errors')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    # 'eager' returns at DOMContentLoaded instead of waiting for every subresource
+    chrome_options.page_load_strategy = page_load_strategy
+    return chrome_options
+
+
+def uses_lean_profile(url):
+    """True unless the lean profile is off or the URL's host is in LEAN_BROWSER_EXCLUDE_SITES."""
+    if not lean_browser:
+        return False
+    host = (urlparse(url).hostname or "").lower()
+    return not any(host == site or host.endswith("." + site) for site in lean_excluded_sites)
+
+
+def apply_site_profile(driver, url):
+    """
+    Sets a pooled driver's request blocking for the next navigation.
+
+    Images, fonts, media and known ad/analytics hosts are blocked through
+    the DevTools protocol, except on sites listed in
+    LEAN_BROWSER_EXCLUDE_SITES (for sites that break without them), which
+    load everything. Returns True if the lean profile applies to `url`.
+    """
+    lean = uses_lean_profile(url)
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns if lean else []})
+    except Exception as e:
+        print(f"Could not set blocked URLs on WebDriver: {str(e)}")
+    return lean
+
+
+def driver_memory_mb(driver):
+    """
+    Returns the resident memory (in MB) of the Chrome processes behind a driver.
+
+    Memory is measured across the chromedriver service process and all of its
+    children using psutil. Returns 0 when psutil is not installed or the
+    processes cannot be inspected, which disables memory-based recycling.
+    """
+    try:
+        import psutil
+        service_process = psutil.Process(driver.service.process.pid)
+        processes = [service_process] + service_process.children(recursive=True)
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+    except Exception:
+        return 0
+
+
+class DriverPool:
+    """
+    Process-wide Pool of Reusable Chrome WebDrivers
+
+    Launching Chrome is the most expensive part of scraping a page, so instead
+    of starting and quitting a browser per URL the pool keeps up to `max_size`
+    drivers alive and hands them out one URL at a time.
+
+    Key Features:
+    - Bounded size: callers block until a driver is free once the limit is reached
+    - Health checks: idle drivers are pinged before checkout and replaced if dead
+    - Isolation: cookies, storage and cache are cleared between pages and each
+      checkout gets a new random user agent
+    - Recycling: drivers are quit after `max_pages` pages or once their
+      processes use more than `max_memory_mb` of resident memory
+
+    Parameters:
+    -----------
+    chrome_options : selenium.webdriver.chrome.options.Options
+        Options used to launch every driver in the pool
+    max_size : int, optional
+        Maximum number of live drivers (default: DRIVER_POOL_SIZE or 5)
+    max_pages : int, optional
+        Pages served by a driver before it is recycled (default: DRIVER_MAX_PAGES or 25)
+    max_memory_mb : int, optional
+        Memory threshold in MB before a driver is recycled (default: DRIVER_MAX_MEMORY_MB or 1500)
+
+    Example:
+    --------
+    pool = DriverPool(default_chrome_options())
+    with pool.checkout() as driver:
+        scrape_page(driver, 'https://example.com', '/output/dir')
+    """
+
+    def __init__(self, chrome_options, max_size=None, max_pages=None, max_memory_mb=None):
+        self.chrome_options = chrome_options
+        self.max_size = max_size or pool_size
+        self.max_pages = max_pages or max_pages_per_driver
+        self.max_memory_mb = max_memory_mb or max_driver_memory_mb
+        self._idle = []
+        self._live = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {"launched": 0, "reused": 0, "recycled": 0, "unhealthy": 0}
+
+    def _launch(self):
+        from selenium import webdriver
+        driver = webdriver.Chrome(options=self.chrome_options)
+        try:
+            # Request blocking (see apply_site_profile) needs the Network domain enabled
+            driver.execute_cdp_cmd("Network.enable", {})
+        except Exception as e:
+            print(f"Could not enable network domain on WebDriver: {str(e)}")
+        with self._condition:
+            self._stats["launched"] += 1
+        print("Launched new pooled WebDriver instance")
+        return {"driver": driver, "pages": 0, "created": time.time()}
+
+    def _quit(self, record):
+        try:
+            record["driver"].quit()
+        except Exception as e:
+            print(f"Error closing pooled WebDriver: {str(e)}")
+        with self._condition:
+            self._live -= 1
+            self._condition.notify()
+
+    def _is_healthy(self, record):
+        try:
+            record["driver"].execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, record):
+        """Clears all per-page state so the next URL starts from a clean browser."""
+        driver = record["driver"]
+        current_url = driver.current_url
+        origin = urlparse(current_url)
+        if origin.scheme in ("http", "https"):
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": f"{origin.scheme}://{origin.netloc}",
+                "storageTypes": "all",
+            })
+        driver.delete_all_cookies()
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        driver.get("about:blank")
+
+    def acquire(self):
+        """
+        Checks out a healthy driver, launching one if the pool has room.
+
+        Blocks while all `max_size` drivers are in use. Every returned driver
+        has a freshly randomized user agent.
+        """
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Driver pool has been shut down")
+                while not self._idle and self._live >= self.max_size:
+                    self._condition.wait()
+                if self._idle:
+                    record = self._idle.pop()
+                else:
+                    record = None
+                    self._live += 1
+
+            if record is None:
+                try:
+                    record = self._launch()
+                except Exception:
+                    with self._condition:
+                        self._live -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_healthy(record):
+                print("Discarding unhealthy pooled WebDriver")
+                with self._condition:
+                    self._stats["unhealthy"] += 1
+                self._quit(record)
+                continue
+            else:
+                with self._condition:
+                    self._stats["reused"] += 1
+
+            user_agent = random_user_agent()
+            try:
+                record["driver"].execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": user_agent})
+            except Exception as e:
+                print(f"Could not set user agent on pooled WebDriver: {str(e)}")
+            print(f"Using User-Agent: {user_agent}")
+            return record
+
+    def release(self, record):
+        """
+        Returns a driver to the pool, resetting or recycling it as needed.
+        """
+        record["pages"] += 1
+        recycle = self._closed or record["pages"] >= self.max_pages
+        if not recycle and self.max_memory_mb:
+            memory = driver_memory_mb(record["driver"])
+            if memory > self.max_memory_mb:
+                print(f"Recycling pooled WebDriver using {memory:.0f} MB")
+                recycle = True
+
+        if not recycle:
+            try:
+                self._reset(record)
+            except Exception as e:
+                print(f"Could not reset pooled WebDriver: {str(e)}")
+                recycle = True
+
+        if recycle:
+            with self._condition:
+                self._stats["recycled"] += 1
+            self._quit(record)
+            return
+
+        with self._condition:
+            self._idle.append(record)
+            self._condition.notify()
+
+    @contextmanager
+    def checkout(self):
+        """Context manager that yields a pooled driver and always returns it."""
+        record = self.acquire()
+        try:
+            yield record["driver"]
+        finally:
+            self.release(record)
+
+    def stats(self):
+        """Returns launch/reuse/recycle counters and current pool occupancy."""
+        with self._condition:
+            stats = dict(self._stats)
+            stats["live"] = self._live
+            stats["idle"] = len(self._idle)
+        return stats
+
+    def shutdown(self):
+        """Quits every idle driver; drivers still checked out are quit on release."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for record in idle:
+            self._quit(record)
+
+
+def get_driver_pool(chrome_options=None):
+    """
+    Returns the process-wide driver pool for a set of Chrome options.
+
+    Pools are created on first use and shared by every later caller, so
+    consecutive searches in the same Streamlit process reuse warm browsers.
+    Callers passing custom options get a separate pool per distinct argument set.
+    """
+    if chrome_options is None:
+        chrome_options = default_chrome_options()
+    pool_key = (tuple(chrome_options.arguments), chrome_options.page_load_strategy)
+    with _pools_lock:
+        pool = _pools.get(pool_key)
+        if pool is None:
+            pool = DriverPool(chrome_options)
+            _pools[pool_key] = pool
+    return pool
+
+
+@atexit.register
+def shutdown_driver_pools():
+    """Quits every pooled driver when the process exits."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
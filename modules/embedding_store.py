@@ -0,0 +1,258 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+store_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search', 'embeddings')
+
+# Embedding store configuration (overridable through the .env file)
+embedding_store_max_rows = int(os.getenv("EMBEDDING_STORE_MAX_ROWS", "100000"))
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path, timeout=30, stale_after=120):
+    """Cross-process lock based on exclusive creation of a lock file."""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale_after:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Timed out waiting for {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+
+def text_key(text):
+    """Returns the hash used to look up the embedding of a text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+class EmbeddingStore:
+    """
+    Persistent Embedding Store
+
+    Stores embeddings for one model as a compact float32 matrix file
+    (`<model>.f32`) plus an append-only JSON-lines index mapping text
+    hashes to rows. The matrix is memory-mapped when the store is opened,
+    so repeat lookups cost no network round trip and almost no memory.
+
+    Key Features:
+    - Keyed by (model, text hash); the model selects the files
+    - Batch-embeds only the texts that are not stored yet
+    - Appends cost O(new rows): the index is appended to, never rewritten,
+      and other processes read only the lines added since their last look
+    - Bounded: once EMBEDDING_STORE_MAX_ROWS rows are stored the store
+      starts over empty, so it never grows without limit
+    - Safe to share between threads and processes
+    - Reports hits, misses and hit ratio
+
+    Parameters:
+    -----------
+    model : str
+        Embedding model name, e.g. "models/text-embedding-004"
+
+    Example:
+    --------
+    store = get_embedding_store("models/text-embedding-004")
+    vectors = store.embed(["first text", "second text"], embed_batch)
+    print(store.stats())
+    """
+
+    def __init__(self, model, max_rows=None):
+        slug = re.sub(r'[^A-Za-z0-9_.-]', '_', model)
+        self.model = model
+        self.max_rows = max_rows or embedding_store_max_rows
+        self.vectors_path = os.path.join(store_dir, f"{slug}.f32")
+        self.index_path = os.path.join(store_dir, f"{slug}.index.jsonl")
+        # Index format of earlier versions, rewritten as JSON lines on the next append
+        self.legacy_index_path = os.path.join(store_dir, f"{slug}.index.json")
+        self.lock_path = os.path.join(store_dir, f"{slug}.lock")
+        self._lock = threading.Lock()
+        self._reset()
+        self._hits = 0
+        self._misses = 0
+        self._rotations = 0
+        with self._lock:
+            self._load()
+
+    def _reset(self):
+        self._rows = {}
+        self._dim = None
+        self._vectors = None
+        self._index_inode = None
+        self._index_offset = 0
+
+    def _load(self):
+        """Reads index lines appended since the last load and remaps the matrix if rows were added."""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            if not self._rows:
+                self._load_legacy()
+            return
+        if stat.st_ino != self._index_inode or stat.st_size < self._index_offset:
+            # First load, or another process started the store over
+            self._reset()
+            self._index_inode = stat.st_ino
+        if stat.st_size == self._index_offset:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        # A line still being written has no newline yet; it is read next time
+        data = data[:data.rfind(b"\n") + 1]
+        for line in data.splitlines():
+            entry = json.loads(line)
+            if 'dim' in entry:
+                self._dim = entry['dim']
+            else:
+                self._rows[entry['key']] = entry['row']
+        self._index_offset += len(data)
+        self._map_vectors()
+
+    def _load_legacy(self):
+        try:
+            with open(self.legacy_index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return
+        self._dim = index['dim']
+        self._rows = index['rows']
+        self._map_vectors()
+
+    def _map_vectors(self):
+        import numpy as np
+        if self._rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                      shape=(len(self._rows), self._dim))
+
+    def _start_over(self, dim, rows=None):
+        """
+        Replaces the index with one holding only `rows` (default: none) and,
+        when starting empty, the matrix with an empty file. Files are
+        replaced, not truncated, so memory maps of other processes stay valid.
+        """
+        lines = [json.dumps({'model': self.model, 'dim': dim})]
+        lines.extend(json.dumps({'key': key, 'row': row}) for key, row in (rows or {}).items())
+        files = [(self.index_path, ("\n".join(lines) + "\n").encode('utf-8'))]
+        if not rows:
+            files.insert(0, (self.vectors_path, b""))
+        for path, content in files:
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        self._reset()
+        self._load()
+
+    def _append(self, keys, vectors):
+        import numpy as np
+        os.makedirs(store_dir, exist_ok=True)
+        with _file_lock(self.lock_path):
+            self._load()
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._rows:
+                    new.setdefault(key, vector)
+            if not new:
+                return
+            if not os.path.exists(self.index_path):
+                # Start the JSON-lines index, carrying over the rows of a legacy index
+                self._start_over(self._dim or vectors.shape[1], rows=dict(self._rows))
+                if os.path.exists(self.legacy_index_path):
+                    os.remove(self.legacy_index_path)
+            elif len(self._rows) + len(new) > self.max_rows:
+                print(f"Embedding store for {self.model} reached {self.max_rows} rows, starting over")
+                self._rotations += 1
+                self._start_over(self._dim)
+            start = len(self._rows)
+            # Rows are written at explicit offsets so a torn write never shifts later rows
+            mode = 'r+b' if os.path.exists(self.vectors_path) else 'wb'
+            with open(self.vectors_path, mode) as f:
+                f.seek(start * self._dim * 4)
+                f.write(np.ascontiguousarray(list(new.values()), dtype=np.float32).tobytes())
+            # Index lines are appended only after their vectors are on disk
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps({'key': key, 'row': start + offset}) + "\n"
+                                for offset, key in enumerate(new)))
+            self._load()
+
+    def embed(self, texts, embed_batch):
+        """
+        Returns a float32 matrix with one embedding row per text.
+
+        Parameters:
+        -----------
+        texts : list
+            Texts to embed
+        embed_batch : callable
+            `embed_batch(texts) -> list of vectors`, called once with all misses
+
+        Returns:
+        --------
+        numpy.ndarray
+            Array of shape (len(texts), dim)
+        """
+        # numpy is loaded on first use, not when the app imports this module
+        import numpy as np
+        if not texts:
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            self._load()
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._rows:
+                    missing.setdefault(key, text)
+            self._misses += sum(1 for key in keys if key in missing)
+            self._hits += sum(1 for key in keys if key not in missing)
+            # Copied before appending: a store that starts over drops these rows
+            found = {key: np.array(self._vectors[self._rows[key]]) for key in keys if key not in missing}
+
+            if missing:
+                print(f"Embedding {len(missing)} new texts ({len(texts) - len(missing)} cached)")
+                vectors = np.asarray(embed_batch(list(missing.values())), dtype=np.float32)
+                found.update(zip(missing.keys(), vectors))
+                self._append(list(missing.keys()), vectors)
+
+            return np.array([found[key] for key in keys], dtype=np.float32)
+
+    def stats(self):
+        """Returns stored vectors, hits, misses, the hit ratio and restarts since the store was opened."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'stored': len(self._rows),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / total if total else 0.0,
+                'rotations': self._rotations,
+            }
+
+
+def get_embedding_store(model):
+    """Returns the process-wide store for an embedding model, opening it on first use."""
+    with _stores_lock:
+        store = _stores.get(model)
+        if store is None:
+            store = EmbeddingStore(model)
+            _stores[model] = store
+    return store
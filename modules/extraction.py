@@ -0,0 +1,116 @@
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, PreformattedString, Tag
+
+# Prefer the C-backed lxml parser, falling back to Python's built-in parser
+try:
+    import lxml  # noqa: F401
+    html_parser = "lxml"
+except ImportError:
+    html_parser = "html.parser"
+
+heading_tags = {"h1", "h2", "h3", "h4", "h5", "h6"}
+list_tags = {"ul", "ol"}
+skip_tags = {"script", "style", "noscript", "template", "svg"}
+# Elements whose boundaries separate words when their text is concatenated
+break_tags = heading_tags | {"p", "div", "br", "li", "td", "th", "tr", "blockquote", "pre"}
+
+
+def _element_text(element, nested_lists=None):
+    """
+    Concatenates the text under an element, visiting every text node once.
+    Whitespace is collapsed and block boundaries become single spaces.
+
+    When `nested_lists` is given, ul/ol descendants are not read but appended
+    to it instead, so list items can render their sub-lists separately.
+    """
+    parts = []
+    stack = [element]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Tag):
+            if node.name in skip_tags:
+                continue
+            if nested_lists is not None and node is not element and node.name in list_tags:
+                nested_lists.append(node)
+                continue
+            if node.name in break_tags:
+                parts.append(" ")
+            stack.extend(reversed(node.contents))
+        elif isinstance(node, NavigableString) and not isinstance(node, PreformattedString):
+            parts.append(node)
+    return " ".join("".join(parts).split())
+
+
+def _emit_list(list_element, depth, content):
+    """Appends the items of a ul/ol (and its sub-lists, indented) to `content`."""
+    stack = list(reversed(list_element.contents))
+    while stack:
+        child = stack.pop()
+        if not isinstance(child, Tag) or child.name in skip_tags:
+            continue
+        if child.name == "li":
+            nested_lists = []
+            text = _element_text(child, nested_lists)
+            if text:
+                content.append(f"{'  ' * depth}* {text}\n")
+            for nested_list in nested_lists:
+                _emit_list(nested_list, depth + 1, content)
+        elif child.name in list_tags:
+            _emit_list(child, depth + 1, content)
+        else:
+            # Wrapper elements between a list and its items
+            stack.extend(reversed(child.contents))
+
+
+def extract_markdown(html):
+    """
+    Single-pass Content Extraction Function
+
+    Converts page HTML into structured markdown by walking the parsed tree
+    once in document order. Headings, paragraphs and lists become markdown
+    blocks; every text node is emitted at most once, so a paragraph inside a
+    list item only appears in that bullet and nested lists become indented
+    sub-bullets instead of being repeated.
+
+    Key Features:
+    - Uses the C-backed lxml parser when installed, html.parser otherwise
+    - Skips scripts, styles, noscript fallbacks, templates and inline SVG
+    - Iterative traversal, safe for very deep DOMs
+
+    Parameters:
+    -----------
+    html : str
+        The page HTML
+
+    Returns:
+    --------
+    str
+        The markdown body (without the source URL header)
+
+    Example:
+    --------
+    extract_markdown('<h1>Title</h1><ul><li><p>One</p></li></ul>')
+    # Returns '\\n# Title\\n\\n\\n\\n* One\\n\\n\\n'
+    """
+    soup = BeautifulSoup(html, html_parser)
+    content = []
+    stack = [soup]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, Tag) or node.name in skip_tags:
+            continue
+        if node.name in heading_tags:
+            text = _element_text(node)
+            if text:
+                content.append(f"\n{'#' * int(node.name[1])} {text}\n")
+        elif node.name == "p":
+            text = _element_text(node)
+            if text:
+                content.append(f"{text}\n\n")
+        elif node.name in list_tags:
+            content.append("\n")
+            _emit_list(node, 0, content)
+            content.append("\n")
+        else:
+            stack.extend(reversed(node.contents))
+    return "\n".join(content)
@@ -0,0 +1,224 @@
+import os
+import sys
+import csv
+from datetime import datetime, timedelta
+
+from .database import transaction
+
+search_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search')
+history_db_path = os.path.join(search_dir, 'history.sqlite3')
+legacy_csv_path = os.path.join(search_dir, 'search_history.csv')
+
+# History page configuration (overridable through the .env file)
+history_page_size = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+
+# Dates are stored as sortable ISO strings and shown in the app's original format
+storage_format = "%Y-%m-%d %H:%M:%S"
+display_format = "%d-%m-%Y %H:%M:%S"
+
+
+def _create_schema(connection):
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS searches ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL, query TEXT NOT NULL, "
+        "search_path TEXT NOT NULL, summary_path TEXT NOT NULL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS searches_datetime ON searches(datetime)")
+    connection.execute("CREATE INDEX IF NOT EXISTS searches_query ON searches(query)")
+
+
+def _import_legacy_csv():
+    if os.path.exists(legacy_csv_path):
+        import_history_csv(legacy_csv_path)
+
+
+def _history_db():
+    """Returns a transaction on the history database (created, and the legacy CSV imported, on first use)."""
+    return transaction(history_db_path, _create_schema, _import_legacy_csv)
+
+
+def _record(row):
+    record_id, stored, query, search_path, summary_path = row
+    try:
+        shown = datetime.strptime(stored, storage_format).strftime(display_format)
+    except ValueError:
+        shown = stored
+    return {'id': record_id, 'datetime': shown, 'query': query,
+            'search_path': search_path, 'summary_path': summary_path}
+
+
+def search_paths(search_id):
+    """Returns the (search results, summary) paths of a search, relative to the project directory."""
+    return (os.path.join("search", f"search_{search_id}", "web_search.json"),
+            os.path.join("search", f"search_{search_id}", "summary.md"))
+
+
+def add_search(query, when=None):
+    """
+    Search History Insert Function
+
+    Records a new search in one transaction. The ID is allocated by the
+    database, so concurrent sessions never share a search directory.
+
+    Parameters:
+    -----------
+    query : str
+        The search query
+    when : datetime, optional
+        Time of the search (default: now)
+
+    Returns:
+    --------
+    dict
+        The new record: 'id', 'datetime', 'query', 'search_path' and 'summary_path'
+
+    Example:
+    --------
+    record = add_search('python tips')
+    urls = web_search(record['query'], record['id'])
+    """
+    stored = (when or datetime.now()).strftime(storage_format)
+    with _history_db() as connection:
+        cursor = connection.execute(
+            "INSERT INTO searches (datetime, query, search_path, summary_path) VALUES (?, ?, '', '')",
+            (stored, query),
+        )
+        search_id = cursor.lastrowid
+        search_path, summary_path = search_paths(search_id)
+        connection.execute(
+            "UPDATE searches SET search_path = ?, summary_path = ? WHERE id = ?",
+            (search_path, summary_path, search_id),
+        )
+    return _record((search_id, stored, query, search_path, summary_path))
+
+
+def get_search(search_id):
+    """Returns the history record with the given ID, or None."""
+    with _history_db() as connection:
+        row = connection.execute(
+            "SELECT id, datetime, query, search_path, summary_path FROM searches WHERE id = ?", (search_id,)
+        ).fetchone()
+    return _record(row) if row else None
+
+
+def list_searches(limit=None):
+    """Returns history records, newest first, optionally only the first `limit`."""
+    sql = "SELECT id, datetime, query, search_path, summary_path FROM searches ORDER BY datetime DESC, id DESC"
+    params = ()
+    if limit is not None:
+        sql += " LIMIT ?"
+        params = (limit,)
+    with _history_db() as connection:
+        return [_record(row) for row in connection.execute(sql, params).fetchall()]
+
+
+def page_searches(limit=None, cursor=None, date_from=None, date_to=None, text=None):
+    """
+    Paginated Search History Query
+
+    Returns one page of history records, newest first, using a keyset
+    (seek) query on the (datetime, id) index: every page costs the same no
+    matter how deep into the history it is. Date range and text filters
+    are applied by SQLite rather than in Python.
+
+    Parameters:
+    -----------
+    limit : int, optional
+        Page size (default: HISTORY_PAGE_SIZE or 20)
+    cursor : tuple, optional
+        Cursor returned with the previous page; None for the first page
+    date_from : date, optional
+        Only searches on or after this day
+    date_to : date, optional
+        Only searches on or before this day
+    text : str, optional
+        Only searches whose query contains this text (case-insensitive)
+
+    Returns:
+    --------
+    tuple
+        (records, next_cursor); next_cursor is None on the last page
+
+    Example:
+    --------
+    records, cursor = page_searches(20, text='python')
+    more, cursor = page_searches(20, cursor, text='python')
+    """
+    limit = limit or history_page_size
+    conditions = []
+    params = []
+    if cursor is not None:
+        conditions.append("(datetime < ? OR (datetime = ? AND id < ?))")
+        params.extend([cursor[0], cursor[0], cursor[1]])
+    if date_from is not None:
+        conditions.append("datetime >= ?")
+        params.append(date_from.strftime("%Y-%m-%d"))
+    if date_to is not None:
+        conditions.append("datetime < ?")
+        params.append((date_to + timedelta(days=1)).strftime("%Y-%m-%d"))
+    if text:
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append("query LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+
+    sql = "SELECT id, datetime, query, search_path, summary_path FROM searches"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY datetime DESC, id DESC LIMIT ?"
+    # One extra row tells whether another page exists
+    params.append(limit + 1)
+    with _history_db() as connection:
+        rows = connection.execute(sql, params).fetchall()
+    next_cursor = (rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+    return [_record(row) for row in rows[:limit]], next_cursor
+
+
+def count_searches():
+    """Returns the number of recorded searches."""
+    with _history_db() as connection:
+        return connection.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+
+
+def import_history_csv(csv_path):
+    """
+    One-time Search History Importer
+
+    Copies the rows of a legacy search_history.csv into the database and
+    renames the file to `<name>.imported` so it is never imported twice.
+    Row N of the CSV keeps ID N, matching its existing search_N directory,
+    and later searches continue after the highest imported ID.
+
+    Parameters:
+    -----------
+    csv_path : str
+        Path of the legacy CSV file
+
+    Returns:
+    --------
+    int
+        Number of imported rows
+    """
+    rows = []
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for index, row in enumerate(csv.DictReader(f)):
+            try:
+                stored = datetime.strptime(row['datetime'], display_format).strftime(storage_format)
+            except (KeyError, TypeError, ValueError):
+                stored = row.get('datetime') or ''
+            default_search, default_summary = search_paths(index)
+            rows.append((index, stored, row.get('query') or '',
+                         row.get('search_path') or default_search, row.get('summary_path') or default_summary))
+
+    with _history_db() as connection:
+        connection.executemany(
+            "INSERT OR IGNORE INTO searches (id, datetime, query, search_path, summary_path) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+    os.replace(csv_path, f"{csv_path}.imported")
+    print(f"Imported {len(rows)} searches from {csv_path}")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    # python -m modules.history_store [path/to/search_history.csv]
+    import_history_csv(sys.argv[1] if len(sys.argv) > 1 else legacy_csv_path)
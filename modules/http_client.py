@@ -0,0 +1,238 @@
+import os
+import time
+import random
+import threading
+import email.utils
+
+# HTTP client configuration (overridable through the .env file)
+connect_timeout = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+read_timeout = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+llm_read_timeout = float(os.getenv("LLM_READ_TIMEOUT", "300"))
+max_retries = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+retry_budget_ratio = float(os.getenv("HTTP_RETRY_BUDGET_RATIO", "0.2"))
+pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+
+# Responses worth retrying: rate limiting and transient server errors
+retry_statuses = {429, 500, 502, 503, 504}
+retry_methods = {"GET", "HEAD", "OPTIONS"}
+backoff_base = 0.3
+backoff_cap = 8.0
+# Retry tokens every service starts with, so a cold process can still retry
+min_retry_tokens = 5.0
+# Requests whose earned tokens can be banked: a long healthy run must not
+# save up enough retries to multiply load during a later outage
+retry_budget_window = 100
+max_retry_tokens = max(min_retry_tokens, retry_budget_window * retry_budget_ratio)
+
+_sessions = {}
+_services = {}
+_lock = threading.Lock()
+_ollama_client = None
+
+
+def _service(name):
+    service = _services.get(name)
+    if service is None:
+        service = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "budget_exhausted": 0,
+            "retry_tokens": min_retry_tokens,
+        }
+        _services[name] = service
+    return service
+
+
+def get_session(name):
+    """
+    Returns the shared requests.Session for an outbound service.
+
+    Each service (e.g. 'brave') gets one session with a pooled,
+    keep-alive connection adapter and gzip/deflate (plus brotli when the
+    brotli package is installed) content encoding, shared by all threads.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from requests.utils import DEFAULT_ACCEPT_ENCODING
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers['Accept-Encoding'] = DEFAULT_ACCEPT_ENCODING
+            _sessions[name] = session
+            _service(name)
+    return session
+
+
+def retry_delay(attempt, response=None):
+    """Full-jitter exponential backoff, honouring Retry-After when the server sends one."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), backoff_cap)
+            except ValueError:
+                try:
+                    parsed = email.utils.parsedate_to_datetime(retry_after)
+                except (TypeError, ValueError):
+                    # Malformed date: fall back to jittered backoff
+                    parsed = None
+                if parsed is not None:
+                    return min(max(parsed.timestamp() - time.time(), 0), backoff_cap)
+    return random.uniform(0, min(backoff_cap, backoff_base * (2 ** attempt)))
+
+
+def record_request(name):
+    """Counts a request of a service and earns it HTTP_RETRY_BUDGET_RATIO retry tokens."""
+    with _lock:
+        service = _service(name)
+        service["requests"] += 1
+        service["retry_tokens"] = min(service["retry_tokens"] + retry_budget_ratio, max_retry_tokens)
+
+
+def record_failure(name):
+    """Counts a request of a service that failed after its retries."""
+    with _lock:
+        _service(name)["failures"] += 1
+
+
+def take_retry_token(name):
+    """Spends one retry token; returns False when the service's retry budget is exhausted."""
+    with _lock:
+        service = _service(name)
+        if service["retry_tokens"] < 1:
+            service["budget_exhausted"] += 1
+            return False
+        service["retry_tokens"] -= 1
+        service["retries"] += 1
+        return True
+
+
+def http_request(name, method, url, timeout=None, retries=None, **kwargs):
+    """
+    Pooled, Retrying HTTP Request Function
+
+    Sends a request through the shared session of a service with explicit
+    connect and read timeouts, retrying transient failures.
+
+    Key Features:
+    - Connection pooling and keep-alive per service
+    - Explicit (connect, read) timeouts; a stalled server can no longer hang the caller
+    - Retries connection errors, timeouts, 429 and 5xx for idempotent methods
+    - Full-jitter exponential backoff, honouring Retry-After
+    - Retry budget: each request earns HTTP_RETRY_BUDGET_RATIO retry tokens and
+      each retry spends one, so an outage cannot multiply upstream load; at
+      most the tokens of the last 100 requests can be banked
+
+    Parameters:
+    -----------
+    name : str
+        Service name used to pick the session and account statistics
+    method : str
+        HTTP method
+    url : str
+        Request URL
+    timeout : float or tuple, optional
+        Read timeout or (connect, read) tuple (default: HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    retries : int, optional
+        Maximum retries for this request (default: HTTP_MAX_RETRIES)
+    **kwargs
+        Passed through to requests (params, headers, json, ...)
+
+    Returns:
+    --------
+    requests.Response
+        The final response; retryable statuses are returned once retries run out
+
+    Example:
+    --------
+    response = http_request("brave", "GET", url, params={'q': 'python'})
+    """
+    import requests
+    session = get_session(name)
+    if timeout is None:
+        timeout = (connect_timeout, read_timeout)
+    elif not isinstance(timeout, tuple):
+        timeout = (min(connect_timeout, timeout), timeout)
+    retries = max_retries if retries is None else retries
+    if method.upper() not in retry_methods:
+        retries = 0
+
+    record_request(name)
+
+    attempt = 0
+    while True:
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries or not take_retry_token(name):
+                record_failure(name)
+                raise
+            delay = retry_delay(attempt)
+            print(f"Retrying {name} request to {url} in {delay:.2f}s after error: {str(e)}")
+        else:
+            if response.status_code not in retry_statuses or attempt >= retries or not take_retry_token(name):
+                if response.status_code >= 500:
+                    record_failure(name)
+                return response
+            delay = retry_delay(attempt, response)
+            print(f"Retrying {name} request to {url} in {delay:.2f}s after HTTP {response.status_code}")
+            response.close()
+        attempt += 1
+        time.sleep(delay)
+
+
+def get_ollama_client():
+    """
+    Returns the shared Ollama client.
+
+    The client keeps one pooled keep-alive connection to the Ollama server
+    with an explicit connect timeout and a long read timeout (LLM_READ_TIMEOUT)
+    for generation.
+    """
+    global _ollama_client
+    with _lock:
+        if _ollama_client is None:
+            import httpx
+            import ollama
+            _ollama_client = ollama.Client(timeout=httpx.Timeout(llm_read_timeout, connect=connect_timeout))
+    return _ollama_client
+
+
+def http_pool_stats():
+    """
+    Returns per-service request statistics and connection pool occupancy.
+
+    For each service: requests sent, retries, failures, retries refused by
+    the budget, remaining retry tokens, and for each host pool of its
+    requests session the number of connections opened, requests served and
+    idle keep-alive connections. Services without a requests session (the
+    asyncio page fetcher, 'pages') report their counters with no pools.
+    """
+    with _lock:
+        sessions = dict(_sessions)
+        stats = {name: dict(service) for name, service in _services.items()}
+    for name in stats:
+        stats[name]["retry_tokens"] = round(stats[name]["retry_tokens"], 2)
+        stats[name]["pools"] = []
+    for name, session in sessions.items():
+        pools = []
+        for adapter in set(session.adapters.values()):
+            manager = adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                pools.append({
+                    "host": f"{key.key_scheme}://{key.key_host}:{key.key_port}",
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                    # Unused pool slots are held as None placeholders
+                    "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0,
+                })
+        stats[name]["pools"] = pools
+    return stats
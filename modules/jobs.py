@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .database import transaction
+
+# Background job configuration (overridable through the .env file)
+job_workers = int(os.getenv("JOB_WORKERS", "2"))
+
+search_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search')
+jobs_db_path = os.path.join(search_dir, 'jobs.sqlite3')
+
+active_statuses = ("queued", "running")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancellation has been requested."""
+
+
+def _create_schema(connection):
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "id TEXT PRIMARY KEY, search_id INTEGER NOT NULL, query TEXT NOT NULL, "
+        "params TEXT NOT NULL, status TEXT NOT NULL, stage TEXT NOT NULL, "
+        "progress REAL NOT NULL, message TEXT NOT NULL, cancel_requested INTEGER NOT NULL, "
+        "pid INTEGER, created REAL NOT NULL, updated REAL NOT NULL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs(created)")
+
+
+def _jobs_db():
+    """Returns a transaction on the jobs database, created on first use."""
+    return transaction(jobs_db_path, _create_schema)
+
+
+job_columns = ("id", "search_id", "query", "params", "status", "stage", "progress",
+               "message", "cancel_requested", "pid", "created", "updated")
+
+
+def _job(row):
+    job = dict(zip(job_columns, row))
+    job['params'] = json.loads(job['params'])
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    return job
+
+
+def _update(job_id, **fields):
+    fields['updated'] = time.time()
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with _jobs_db() as connection:
+        connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+
+def get_job(job_id):
+    """Returns a job as a dict (status, stage, progress, message, ...), or None."""
+    with _jobs_db() as connection:
+        row = connection.execute(f"SELECT {', '.join(job_columns)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job(row) if row else None
+
+
+def list_jobs(limit=20):
+    """Returns the most recent jobs, newest first."""
+    with _jobs_db() as connection:
+        rows = connection.execute(
+            f"SELECT {', '.join(job_columns)} FROM jobs ORDER BY created DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [_job(row) for row in rows]
+
+
+def cancel_job(job_id):
+    """
+    Requests cancellation of a job.
+
+    A queued job is cancelled before it starts; a running job stops at its
+    next stage boundary (after the search, before summarizing, ...).
+    Returns False if the job has already finished.
+    """
+    with _jobs_db() as connection:
+        cursor = connection.execute(
+            "UPDATE jobs SET cancel_requested = 1, updated = ? WHERE id = ? AND status IN (?, ?)",
+            (time.time(), job_id, *active_statuses),
+        )
+    return cursor.rowcount > 0
+
+
+def _check_cancelled(job_id):
+    job = get_job(job_id)
+    if job is None or job['cancel_requested']:
+        raise JobCancelled(job_id)
+
+
+def run_search_job(job_id):
+    """
+    Background Search Job
+
+    Runs the search -> scrape -> summarize pipeline of one job in a worker
+    process, recording the stage and progress in the jobs database as it
+    goes so any page (or a reloaded tab) can follow it.
+
+    Parameters:
+    -----------
+    job_id : str
+        ID returned by `submit_search_job`
+
+    Returns:
+    --------
+    str
+        Final job status: 'done', 'failed' (also when no summary could be
+        generated) or 'cancelled'
+    """
+    job = get_job(job_id)
+    if job is None:
+        return "failed"
+    params = job['params']
+    try:
+        _check_cancelled(job_id)
+        # Claim the job, so one submitted twice (e.g. requeued after a pool restart) runs once
+        with _jobs_db() as connection:
+            claimed = connection.execute(
+                "UPDATE jobs SET status = 'running', stage = 'searching', progress = 0.02, message = '', "
+                "pid = ?, updated = ? WHERE id = ? AND status = 'queued'",
+                (os.getpid(), time.time(), job_id),
+            ).rowcount
+        if not claimed:
+            return get_job(job_id)['status']
+        from .search_modules import web_search, smart_search
+        from .ai_modules import summary_error
+
+        start_time = time.time()
+        urls = web_search(job['query'], job['search_id'], params['num_searches'])
+        _check_cancelled(job_id)
+
+        def progress(stage, fraction, message=""):
+            try:
+                _update(job_id, stage=stage, progress=round(0.1 + 0.9 * fraction, 3), message=message)
+            except sqlite3.Error as e:
+                # A missed progress update is not worth failing the search for
+                print(f"Error updating job {job_id}: {str(e)}")
+            _check_cancelled(job_id)
+
+        deadline_seconds = params.get('deadline_seconds') or 0
+        plan = params.get('plan')
+        deadline_at = start_time + deadline_seconds if plan and deadline_seconds else None
+        summary = smart_search(job['query'], job['search_id'], urls, params['model'],
+                               plan=plan, deadline_at=deadline_at, progress=progress)
+        if not summary or summary == summary_error:
+            # Scraped pages and timings are kept, but there is no summary to show
+            _update(job_id, status="failed", stage="done", progress=1.0, message="No summary could be generated")
+            return "failed"
+        # A cancel that arrived while the model was answering does not throw the summary away
+        message = "Cancelled too late, the summary was kept" if get_job(job_id)['cancel_requested'] else ""
+        _update(job_id, status="done", stage="done", progress=1.0, message=message)
+        return "done"
+    except JobCancelled:
+        print(f"Job {job_id} cancelled")
+        _update(job_id, status="cancelled", message="Cancelled")
+        return "cancelled"
+    except Exception as e:
+        print(f"Job {job_id} failed: {str(e)}")
+        _update(job_id, status="failed", message=str(e)[:500])
+        return "failed"
+
+
+def _get_executor(broken=None):
+    """
+    Returns the process-wide worker pool, starting it (and recovering stale
+    jobs) on first use. Passing the pool a submit found broken replaces it.
+    """
+    global _executor
+    with _executor_lock:
+        if broken is not None and _executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _executor is None:
+            # Spawned workers do not inherit the web server's threads and sockets
+            _executor = ProcessPoolExecutor(max_workers=job_workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+            _recover_jobs(_executor)
+    return _executor
+
+
+def _recover_jobs(executor):
+    """Marks jobs interrupted by a restart or a worker crash as failed and requeues jobs that never started."""
+    with _jobs_db() as connection:
+        connection.execute(
+            "UPDATE jobs SET status = 'failed', message = 'Interrupted by a restart or a worker crash', updated = ? WHERE status = 'running'",
+            (time.time(),),
+        )
+        queued = [row[0] for row in connection.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created").fetchall()]
+    for job_id in queued:
+        executor.submit(run_search_job, job_id)
+
+
+def submit_search_job(query, search_id, num_searches, model, plan=None, deadline_seconds=0):
+    """
+    Background Search Submission Function
+
+    Queues a full search for the worker process pool and returns at once,
+    so the search keeps running across Streamlit reruns and page reloads
+    and several searches can run side by side (up to JOB_WORKERS).
+
+    Parameters:
+    -----------
+    query : str
+        The search query
+    search_id : int
+        History ID of the search, naming its search directory
+    num_searches : int
+        Number of URLs to scrape
+    model : str
+        Model used for summarization
+    plan : dict, optional
+        Plan from `plan_search`, enforced from the moment the job starts
+    deadline_seconds : float, optional
+        End-to-end latency budget belonging to `plan`
+
+    Returns:
+    --------
+    dict
+        The queued job
+
+    Example:
+    --------
+    record = add_search('python tips')
+    job = submit_search_job(record['query'], record['id'], 5, 'gemini-1.5-flash-002')
+    print(get_job(job['id'])['stage'])
+    """
+    job_id = uuid.uuid4().hex[:12]
+    params = {'num_searches': num_searches, 'model': model, 'plan': plan, 'deadline_seconds': deadline_seconds}
+    now = time.time()
+    executor = _get_executor()
+    with _jobs_db() as connection:
+        connection.execute(
+            "INSERT INTO jobs (id, search_id, query, params, status, stage, progress, message, "
+            "cancel_requested, pid, created, updated) VALUES (?, ?, ?, ?, 'queued', 'queued', 0, '', 0, NULL, ?, ?)",
+            (job_id, search_id, query, json.dumps(params), now, now),
+        )
+    try:
+        try:
+            executor.submit(run_search_job, job_id)
+        except BrokenProcessPool:
+            # A crashed worker took the pool down. Its replacement requeues the queued jobs;
+            # submitting this one again is harmless because a job is claimed before it runs
+            print("Job worker pool is broken, starting a new one")
+            _get_executor(broken=executor).submit(run_search_job, job_id)
+    except Exception as e:
+        print(f"Could not submit job {job_id}: {str(e)}")
+        _update(job_id, status="failed", message=f"Could not start the job: {str(e)}"[:500])
+    return get_job(job_id)
@@ -0,0 +1,211 @@
+import os
+import time
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .artifact_store import put_blob, get_blob, release_blobs
+from .database import transaction
+
+# Page cache configuration (overridable through the .env file)
+page_cache_ttl_hours = float(os.getenv("PAGE_CACHE_TTL_HOURS", "24"))
+page_cache_max_mb = float(os.getenv("PAGE_CACHE_MAX_MB", "200"))
+
+# Eviction goes down to this fraction of the limit, so blobs are released in batches
+evict_low_water = 0.9
+
+cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search', 'page_cache')
+# Markdown files of the original layout, moved into the blob store on first use
+pages_dir = os.path.join(cache_dir, 'pages')
+index_path = os.path.join(cache_dir, 'index.sqlite3')
+
+# Query parameters that never change page content
+tracking_params = ('utm_', 'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref_src')
+
+
+def normalize_url(url):
+    """
+    Normalizes a URL so that trivially different spellings share a cache entry.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, sorts the query string and strips trailing slashes.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(tracking_params)]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ''))
+
+
+def _create_schema(connection):
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS pages ("
+        "key TEXT PRIMARY KEY, url TEXT NOT NULL, size INTEGER NOT NULL, "
+        "created REAL NOT NULL, accessed REAL NOT NULL, blob TEXT, codec TEXT)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages(accessed)")
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(pages)")}
+    for column in ("blob", "codec"):
+        if column not in columns:
+            connection.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+    connection.execute("CREATE INDEX IF NOT EXISTS pages_blob ON pages(blob)")
+    _migrate_page_files(connection)
+
+
+def _migrate_page_files(connection):
+    """Moves pages cached as markdown files into the blob store (one-time)."""
+    for key, in connection.execute("SELECT key FROM pages WHERE blob IS NULL").fetchall():
+        path = os.path.join(pages_dir, f"{key}.md")
+        try:
+            with open(path, 'rb') as f:
+                digest, codec = put_blob(f.read())
+            connection.execute("UPDATE pages SET blob = ?, codec = ? WHERE key = ?", (digest, codec, key))
+            os.remove(path)
+        except FileNotFoundError:
+            connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+        except Exception as e:
+            print(f"Error migrating cached page {key}: {str(e)}")
+    try:
+        os.rmdir(pages_dir)
+    except OSError:
+        pass
+
+
+def _index():
+    """Returns a transaction on the cache index, created on first use."""
+    return transaction(index_path, _create_schema)
+
+
+def _remove(connection, key):
+    """Deletes an entry and returns its (digest, codec), or None if there was none."""
+    row = connection.execute("SELECT blob, codec FROM pages WHERE key = ?", (key,)).fetchone()
+    connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+    return tuple(row) if row and row[0] else None
+
+
+def _release(blobs):
+    """Deletes the blobs of removed entries that no other entry and no search still references."""
+    blobs = {blob for blob in blobs if blob}
+    if not blobs:
+        return
+    try:
+        with _index() as connection:
+            unused = {(digest, codec) for digest, codec in blobs if connection.execute(
+                "SELECT 1 FROM pages WHERE blob = ? AND codec = ? LIMIT 1", (digest, codec)).fetchone() is None}
+        release_blobs(unused)
+    except Exception as e:
+        print(f"Error releasing page cache blobs: {str(e)}")
+
+
+def get_cached_page(url):
+    """
+    Page Cache Lookup Function
+
+    Returns the cached markdown for a URL, or None if it is missing or older
+    than PAGE_CACHE_TTL_HOURS. Hits refresh the entry's LRU position.
+
+    Parameters:
+    -----------
+    url : str
+        The page URL (normalized before lookup)
+
+    Returns:
+    --------
+    str or None
+        The cached markdown content
+    """
+    key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+    now = time.time()
+    try:
+        with _index() as connection:
+            row = connection.execute("SELECT created, blob, codec FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[0] > page_cache_ttl_hours * 3600:
+                _remove(connection, key)
+                content = None
+            else:
+                content = get_blob(row[1], row[2]).decode('utf-8')
+                connection.execute("UPDATE pages SET accessed = ? WHERE key = ?", (now, key))
+        if content is None:
+            _release([(row[1], row[2])])
+        return content
+    except FileNotFoundError:
+        with _index() as connection:
+            _remove(connection, key)
+        return None
+    except Exception as e:
+        print(f"Error reading page cache for {url}: {str(e)}")
+        return None
+
+
+def put_cached_page(url, content):
+    """
+    Page Cache Store Function
+
+    Stores the markdown for a URL in the shared blob store (so a page that is
+    also saved for a search is kept once, compressed). Over PAGE_CACHE_MAX_MB,
+    least recently used entries are evicted and their blobs deleted unless a
+    search or another entry still uses them.
+
+    Parameters:
+    -----------
+    url : str
+        The page URL (normalized before storing)
+    content : str
+        The extracted markdown to cache
+    """
+    normalized = normalize_url(url)
+    key = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    data = content.encode('utf-8')
+    now = time.time()
+    try:
+        digest, codec = put_blob(data)
+        with _index() as connection:
+            replaced = _remove(connection, key)
+            connection.execute(
+                "INSERT INTO pages (key, url, size, created, accessed, blob, codec) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, normalized, len(data), now, now, digest, codec),
+            )
+            evicted = _evict(connection)
+        _release(evicted + ([replaced] if replaced != (digest, codec) else []))
+    except Exception as e:
+        print(f"Error writing page cache for {url}: {str(e)}")
+
+
+def _evict(connection):
+    """Removes least recently used entries once over the limit and returns their blobs."""
+    max_bytes = page_cache_max_mb * 1024 * 1024
+    total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+    evicted = []
+    if total <= max_bytes:
+        return evicted
+    for key, size in connection.execute("SELECT key, size FROM pages ORDER BY accessed ASC").fetchall():
+        evicted.append(_remove(connection, key))
+        total -= size
+        if total <= max_bytes * evict_low_water:
+            break
+    return evicted
+
+
+def cached_blobs():
+    """
+    Drops entries older than PAGE_CACHE_TTL_HOURS and returns the
+    {(digest, codec): size} of the blobs the remaining entries reference.
+    """
+    cutoff = time.time() - page_cache_ttl_hours * 3600
+    with _index() as connection:
+        connection.execute("DELETE FROM pages WHERE created < ?", (cutoff,))
+        rows = connection.execute("SELECT blob, codec, size FROM pages").fetchall()
+    return {(digest, codec): size for digest, codec, size in rows}
+
+
+def page_cache_stats():
+    """Returns the number of cached pages and their total size in bytes."""
+    with _index() as connection:
+        count, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+    return {"pages": count, "bytes": size}
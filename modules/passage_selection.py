@@ -0,0 +1,124 @@
+import os
+from .ai_modules import estimate_tokens
+
+# Passage selection configuration (overridable through the .env file)
+passage_tokens = int(os.getenv("PASSAGE_TOKENS", "200"))
+passage_token_budget = int(os.getenv("PASSAGE_TOKEN_BUDGET", "4000"))
+passages_per_source = int(os.getenv("PASSAGES_PER_SOURCE", "6"))
+
+header_prefixes = ("# Source URL:", "# Scraped on:")
+
+
+def split_passages(page, max_tokens=None):
+    """
+    Splits one scraped page into passages of about `max_tokens` tokens.
+
+    Lines are grouped in order, and a heading always starts a new passage, so
+    passages follow the page's sections. Returns (source_url, passages).
+    """
+    max_tokens = max_tokens or passage_tokens
+    source = ""
+    passages = []
+    current = []
+    size = 0
+    for line in page.splitlines():
+        if line.startswith("# Source URL:"):
+            source = line[len("# Source URL:"):].strip()
+            continue
+        if line.startswith(header_prefixes) or not line.strip():
+            continue
+        if current and (size + estimate_tokens(line) > max_tokens or line.startswith("#")):
+            passages.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += estimate_tokens(line)
+    if current:
+        passages.append("\n".join(current))
+    return source, passages
+
+
+def select_passages(query, pages, embed, token_budget=None, per_source=None, stats=None):
+    """
+    Query-relevant Passage Selection Function
+
+    Bounds the model input to a constant size, however many pages were
+    scraped, by keeping only the passages closest to the query.
+
+    Selection Strategy:
+    ------------------
+    1. Split every page into passages of about PASSAGE_TOKENS tokens
+    2. Embed the query and all passages in one call (cached embeddings are
+       reused) and score them by cosine similarity as one matrix product
+    3. Take passages best-first while they fit in `token_budget`, at most
+       `per_source` per page so no single source crowds out the rest
+    4. Rebuild one page per source with its passages in original order
+
+    Parameters:
+    -----------
+    query : str
+        The search query
+    pages : list
+        Scraped markdown pages, as returned by read_scraped_pages
+    embed : callable
+        `embed(texts) -> numpy.ndarray` with one embedding row per text
+    token_budget : int, optional
+        Estimated token budget for all passages (default: PASSAGE_TOKEN_BUDGET or 4000)
+    per_source : int, optional
+        Maximum passages per page (default: PASSAGES_PER_SOURCE or 6)
+    stats : dict, optional
+        Filled with passage counts and token totals when given
+
+    Returns:
+    --------
+    list
+        Pages reduced to their selected passages, each with its source URL header
+
+    Example:
+    --------
+    store = get_embedding_store(embedding_model)
+    pages = select_passages(query, pages, lambda texts: store.embed(texts, embed_batch))
+    """
+    import numpy as np
+    token_budget = token_budget or passage_token_budget
+    per_source = per_source or passages_per_source
+    sources = []
+    passages = []
+    for page_index, page in enumerate(pages):
+        source, page_passages = split_passages(page)
+        sources.append(source)
+        passages.extend((page_index, order, text) for order, text in enumerate(page_passages))
+    if not passages:
+        return pages
+
+    vectors = embed([query] + [text for _, _, text in passages])
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = vectors[1:] @ vectors[0]
+
+    chosen = []
+    used = 0
+    per_page = [0] * len(pages)
+    for index in np.argsort(-scores):
+        page_index, _, text = passages[index]
+        size = estimate_tokens(text)
+        if per_page[page_index] >= per_source or used + size > token_budget:
+            continue
+        chosen.append(index)
+        per_page[page_index] += 1
+        used += size
+
+    selected = []
+    for page_index, source in enumerate(sources):
+        kept = sorted((passages[index][1], passages[index][2]) for index in chosen if passages[index][0] == page_index)
+        if kept:
+            body = "\n\n".join(text for _, text in kept)
+            selected.append(f"# Source URL: {source}\n\n{body}" if source else body)
+
+    if stats is not None:
+        stats.update({
+            'passages': len(passages),
+            'selected': len(chosen),
+            'tokens_before': sum(estimate_tokens(text) for _, _, text in passages),
+            'tokens_after': used,
+        })
+    print(f"Selected {len(chosen)} of {len(passages)} passages (~{used} tokens) from {len(selected)} sources")
+    return selected
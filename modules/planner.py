@@ -0,0 +1,149 @@
+import os
+import json
+import threading
+
+# Planner configuration (overridable through the .env file)
+min_page_timeout = float(os.getenv("MIN_PAGE_TIMEOUT", "3"))
+max_page_timeout = float(os.getenv("MAX_PAGE_TIMEOUT", "15"))
+safety_margin = 0.1
+max_samples = 50
+# Lower bound (seconds) for any latency estimate; rounded fast runs record 0.0
+min_latency = 0.05
+
+latency_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search', 'stage_latencies.json')
+
+# Used until a stage has been measured at least once
+default_latencies = {
+    "web_search": 1.5,
+    "rerank": 0.5,
+    "scrape_page": 6.0,
+    "summarize_page": 3.0,
+}
+
+_samples = None
+_samples_lock = threading.Lock()
+
+
+def _load_samples():
+    global _samples
+    if _samples is None:
+        try:
+            with open(latency_path, 'r', encoding='utf-8') as f:
+                _samples = json.load(f)
+        except FileNotFoundError:
+            _samples = {}
+        except Exception as e:
+            print(f"Error reading stage latencies: {str(e)}")
+            _samples = {}
+    return _samples
+
+
+def record_latency(stage, seconds):
+    """
+    Adds a measured stage duration (seconds) to the rolling window for that stage.
+    Durations that round to zero (e.g. nothing was summarized) are ignored.
+    """
+    seconds = round(seconds, 3)
+    if seconds <= 0:
+        return
+    with _samples_lock:
+        samples = _load_samples().setdefault(stage, [])
+        samples.append(seconds)
+        del samples[:-max_samples]
+
+
+def recent_latency(stage, percentile=75):
+    """
+    Returns a recent latency estimate for a stage in seconds.
+
+    Uses the given percentile of the last measurements. Stages such as
+    'summarize_page:<model>' fall back to the generic 'summarize_page'
+    measurements, then to built-in defaults.
+    """
+    with _samples_lock:
+        samples = _load_samples()
+        # Older files may hold zero samples; they would make every estimate 0
+        values = ([value for value in samples.get(stage, []) if value > 0]
+                  or [value for value in samples.get(stage.split(':')[0], []) if value > 0])
+        if not values:
+            return default_latencies.get(stage.split(':')[0], 1.0)
+        values = sorted(values)
+    return max(values[min(len(values) - 1, int(len(values) * percentile / 100))], min_latency)
+
+
+def save_latencies():
+    """Persists the rolling latency windows to search/stage_latencies.json."""
+    with _samples_lock:
+        samples = dict(_load_samples())
+    try:
+        os.makedirs(os.path.dirname(latency_path), exist_ok=True)
+        temp_path = f"{latency_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(samples, f)
+        os.replace(temp_path, latency_path)
+    except Exception as e:
+        print(f"Error saving stage latencies: {str(e)}")
+
+
+def plan_search(deadline_seconds, tiers):
+    """
+    Deadline-driven Search Planner
+
+    Picks how many URLs to scrape, the per-page timeout and the model tier so
+    that search, scraping and summarization fit in `deadline_seconds`, using
+    recent measured stage latencies.
+
+    Planning Strategy:
+    -----------------
+    1. Reserve a safety margin and the expected search + rerank time
+    2. Scraping runs in parallel, so it costs one page timeout of wall time
+       (recent per-page latency x 1.5, clamped to MIN/MAX_PAGE_TIMEOUT)
+    3. The rest is the summary budget; summarization time grows with the
+       number of pages, so each tier gets as many URLs as its per-page
+       summary latency allows, up to the tier's maximum
+    4. Tiers are tried in the given order; the first one that fits at least
+       one URL wins, otherwise the last tier runs with a single URL
+
+    Parameters:
+    -----------
+    deadline_seconds : float
+        End-to-end latency budget for the search
+    tiers : list
+        Candidate tiers in order of preference, each a dict with 'name',
+        'model' and 'max_urls', e.g. the advanced then the simple settings
+
+    Returns:
+    --------
+    dict
+        The plan: 'tier', 'model', 'num_urls', 'page_timeout',
+        'scrape_budget', 'summary_budget' and 'deadline_seconds'
+
+    Example:
+    --------
+    plan = plan_search(20, [
+        {'name': 'complex', 'model': 'gemini-exp-1206', 'max_urls': 10},
+        {'name': 'simple', 'model': 'gemini-1.5-flash-002', 'max_urls': 5},
+    ])
+    """
+    budget = deadline_seconds * (1 - safety_margin) - recent_latency("web_search") - recent_latency("rerank")
+    page_timeout = min(max(recent_latency("scrape_page") * 1.5, min_page_timeout), max_page_timeout)
+    page_timeout = max(min(page_timeout, budget / 2), 1.0)
+    summary_budget = max(budget - page_timeout, 0)
+
+    plan = None
+    for tier in tiers:
+        per_page = max(recent_latency(f"summarize_page:{tier['model']}"), min_latency)
+        num_urls = min(int(tier['max_urls']), int(summary_budget // per_page))
+        plan = {
+            'tier': tier['name'],
+            'model': tier['model'],
+            'num_urls': max(num_urls, 1),
+            'page_timeout': round(page_timeout, 2),
+            'scrape_budget': round(page_timeout, 2),
+            'summary_budget': round(summary_budget, 2),
+            'deadline_seconds': deadline_seconds,
+        }
+        if num_urls >= 1:
+            break
+    print(f"Search plan for {deadline_seconds:.0f}s deadline: {plan}")
+    return plan
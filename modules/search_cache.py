@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# Search cache configuration (overridable through the .env file)
+search_cache_ttl_hours = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "6"))
+
+cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search', 'search_cache')
+
+# Writes also prune expired entries, at most this often per process
+prune_interval_seconds = 3600
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "shared": 0}
+_last_prune = [0.0]
+
+
+def normalize_query(query):
+    """Lowercases a query and collapses its whitespace."""
+    return " ".join(query.lower().split())
+
+
+def search_cache_key(query, params):
+    """
+    Returns the cache key for a query and its request parameters.
+
+    The query is normalized first, so 'Python  Tips' and 'python tips' with
+    identical parameters share one entry.
+    """
+    key_params = {k: v for k, v in params.items() if k != 'q'}
+    key_params['q'] = normalize_query(query)
+    return hashlib.sha256(json.dumps(key_params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _expired(entry):
+    return time.time() - entry.get('created', 0) > search_cache_ttl_hours * 3600
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read(key):
+    path = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading search cache entry {key}: {str(e)}")
+        return None
+    if _expired(entry):
+        _remove(path)
+        return None
+    return entry['response']
+
+
+def _write(key, query, params, data):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    entry = {'created': time.time(), 'query': query, 'params': params, 'response': data}
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+    with _inflight_lock:
+        prune = time.time() - _last_prune[0] > prune_interval_seconds
+        if prune:
+            _last_prune[0] = time.time()
+    if prune:
+        prune_search_cache()
+
+
+def prune_search_cache():
+    """
+    Deletes expired entries (and temporary files left by interrupted
+    writes) from search/search_cache. Returns the number of removed files.
+    """
+    removed = 0
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            if name.endswith(".tmp"):
+                if time.time() - os.path.getmtime(path) > 3600:
+                    _remove(path)
+                    removed += 1
+                continue
+            if not name.endswith(".json"):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if _expired(entry):
+                _remove(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+        except ValueError:
+            # Unreadable entry: _read would never serve it
+            _remove(path)
+            removed += 1
+        except Exception as e:
+            print(f"Error pruning search cache entry {name}: {str(e)}")
+    return removed
+
+
+def _single_flight(key, fn):
+    """Runs `fn` once per key at a time; concurrent callers wait for and share its result."""
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = {"event": threading.Event(), "result": None, "error": None}
+            _inflight[key] = call
+        else:
+            _stats["shared"] += 1
+
+    if not leader:
+        call["event"].wait()
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+    try:
+        call["result"] = fn()
+    except Exception as e:
+        call["error"] = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call["event"].set()
+    return call["result"]
+
+
+def cached_search(query, params, fetch):
+    """
+    Cached, Deduplicated Search Function
+
+    Returns the search API response for a query from the durable cache under
+    search/search_cache when a fresh entry exists. Otherwise calls `fetch`
+    once, even when several threads ask for the same query at the same time:
+    followers wait for the leader's upstream call and share its response.
+
+    Parameters:
+    -----------
+    query : str
+        The search query
+    params : dict
+        Request parameters sent upstream (part of the cache key)
+    fetch : callable
+        `fetch() -> (data, cacheable)`; only cacheable responses are stored
+
+    Returns:
+    --------
+    dict
+        The search API response
+
+    Example:
+    --------
+    data = cached_search('python tips', {'q': 'python tips'}, call_brave)
+    """
+    key = search_cache_key(query, params)
+    data = _read(key)
+    if data is not None:
+        with _inflight_lock:
+            _stats["hits"] += 1
+        print(f"Search results for '{query}' served from cache")
+        return data
+
+    def fetch_and_store():
+        # Another caller may have filled the cache while we waited for the lock
+        data = _read(key)
+        if data is not None:
+            return data
+        with _inflight_lock:
+            _stats["misses"] += 1
+        data, cacheable = fetch()
+        if cacheable:
+            try:
+                _write(key, query, params, data)
+            except Exception as e:
+                print(f"Error writing search cache entry: {str(e)}")
+        return data
+
+    return _single_flight(key, fetch_and_store)
+
+
+def search_cache_stats():
+    """Returns cache hits, upstream calls (misses) and calls shared with an in-flight request."""
+    with _inflight_lock:
+        return dict(_stats)
@@ -0,0 +1,211 @@
+import os
+import re
+import glob
+import sqlite3
+from .artifact_store import iter_pages
+from .database import transaction
+
+search_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search')
+index_path = os.path.join(search_dir, 'search_index.sqlite3')
+
+
+def _create_schema(connection):
+    connection.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+        "search_id UNINDEXED, kind UNINDEXED, url UNINDEXED, query, content, "
+        "tokenize='porter unicode61')"
+    )
+    # FTS5 cannot index search_id, so deletes go through this rowid map
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS document_owners ("
+        "doc_id INTEGER PRIMARY KEY, search_id TEXT NOT NULL, kind TEXT NOT NULL)"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS document_owners_search ON document_owners (search_id, kind)"
+    )
+    # One-time backfill for indexes created before the map existed
+    if (connection.execute("SELECT 1 FROM document_owners LIMIT 1").fetchone() is None
+            and connection.execute("SELECT 1 FROM documents LIMIT 1").fetchone() is not None):
+        connection.execute(
+            "INSERT INTO document_owners (doc_id, search_id, kind) "
+            "SELECT rowid, search_id, kind FROM documents"
+        )
+
+
+def _index():
+    """Returns a transaction on the full-text index, created on first use."""
+    return transaction(index_path, _create_schema)
+
+
+def _read(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _page_documents(key_dir):
+    """Yields (url, content) for every scraped page stored for a search."""
+    for url, content in iter_pages(key_dir):
+        if content:
+            yield url, content
+
+
+def index_search(search_id, query, key_dir):
+    """
+    Full-text Index Update Function
+
+    Adds the summary and scraped pages of one search to the full-text index,
+    replacing whatever was indexed for that search before, so calling it
+    again after a re-run never duplicates documents.
+
+    Parameters:
+    -----------
+    search_id : int or str
+        The search ID (the `key` of smart_search)
+    query : str
+        The search query, indexed alongside each document
+    key_dir : str
+        Directory of the search, containing summary.md and the stored pages
+
+    Returns:
+    --------
+    int
+        Number of indexed documents
+
+    Example:
+    --------
+    index_search(42, 'python tips', 'search/search_42')
+    """
+    documents = []
+    summary = _read(os.path.join(key_dir, "summary.md"))
+    if summary:
+        documents.append((str(search_id), "summary", "", query, summary))
+    for url, content in _page_documents(key_dir):
+        documents.append((str(search_id), "page", url, query, content))
+
+    with _index() as connection:
+        _delete_documents(connection, search_id)
+        for document in documents:
+            cursor = connection.execute(
+                "INSERT INTO documents (search_id, kind, url, query, content) VALUES (?, ?, ?, ?, ?)",
+                document,
+            )
+            connection.execute(
+                "INSERT INTO document_owners (doc_id, search_id, kind) VALUES (?, ?, ?)",
+                (cursor.lastrowid, document[0], document[1]),
+            )
+    return len(documents)
+
+
+def _delete_documents(connection, search_id, kind=None):
+    """Deletes the documents of one search (optionally of one kind) by rowid."""
+    sql = "SELECT doc_id FROM document_owners WHERE search_id = ?"
+    params = [str(search_id)]
+    if kind is not None:
+        sql += " AND kind = ?"
+        params.append(kind)
+    doc_ids = [(doc_id,) for doc_id, in connection.execute(sql, params)]
+    connection.executemany("DELETE FROM documents WHERE rowid = ?", doc_ids)
+    connection.executemany("DELETE FROM document_owners WHERE doc_id = ?", doc_ids)
+
+
+def remove_search_pages(search_id):
+    """Drops the page documents of one search (e.g. after its pages expired), keeping its summary."""
+    with _index() as connection:
+        _delete_documents(connection, search_id, kind="page")
+
+
+def _match_expression(text):
+    """Turns free text into a safe FTS5 query: every word must match, the last one as a prefix."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_documents(text, limit=20, kind=None):
+    """
+    Full-text Search Function
+
+    Searches past summaries and scraped pages, best matches first (BM25,
+    with query and content columns weighted 2:1), and returns a highlighted
+    snippet for every hit.
+
+    Parameters:
+    -----------
+    text : str
+        Words to search for; the last word also matches as a prefix
+    limit : int, optional
+        Maximum number of hits (default: 20)
+    kind : str, optional
+        Only 'summary' or only 'page' documents
+
+    Returns:
+    --------
+    list
+        Dicts with 'search_id', 'kind', 'url', 'query', 'snippet' and 'score'
+
+    Example:
+    --------
+    for hit in search_documents('rust async'):
+        print(hit['search_id'], hit['snippet'])
+    """
+    expression = _match_expression(text)
+    if expression is None:
+        return []
+    sql = ("SELECT search_id, kind, url, query, snippet(documents, 4, '**', '**', '…', 16), "
+           "bm25(documents, 0, 0, 0, 2.0, 1.0) AS score FROM documents WHERE documents MATCH ?")
+    params = [expression]
+    if kind is not None:
+        sql += " AND kind = ?"
+        params.append(kind)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+    try:
+        with _index() as connection:
+            rows = connection.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as e:
+        print(f"Error searching the full-text index: {str(e)}")
+        return []
+    return [
+        {'search_id': int(search_id) if search_id.isdigit() else search_id, 'kind': doc_kind, 'url': url,
+         'query': query, 'snippet': snippet, 'score': round(-score, 3)}
+        for search_id, doc_kind, url, query, snippet, score in rows
+    ]
+
+
+def rebuild_search_index(queries):
+    """
+    Indexes every existing search directory, e.g. after upgrading.
+
+    Parameters:
+    -----------
+    queries : dict
+        Maps search IDs to their queries, e.g. from the history store
+
+    Returns:
+    --------
+    int
+        Number of indexed searches
+    """
+    indexed = 0
+    for key_dir in glob.glob(os.path.join(search_dir, 'search_*')):
+        # Search directories are numbered; this skips search_cache and the index files
+        search_id = os.path.basename(key_dir)[len('search_'):]
+        if not search_id.isdigit() or not os.path.isdir(key_dir):
+            continue
+        search_id = int(search_id)
+        index_search(search_id, queries.get(search_id, ''), key_dir)
+        indexed += 1
+    print(f"Indexed {indexed} searches")
+    return indexed
+
+
+if __name__ == "__main__":
+    # python -m modules.search_index  (re-indexes all stored searches)
+    from .history_store import list_searches
+    rebuild_search_index({record['id']: record['query'] for record in list_searches()})
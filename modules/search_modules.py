@@ -1,32 +1,49 @@
-from bs4 import BeautifulSoup
 import json
 import time
 import os
-import re
+import threading
+import queue
 from datetime import datetime
-from fake_useragent import UserAgent
-import random
-import pandas as pd
-import numpy as np
-import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import google.generativeai as genai
+import math
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
-from selenium.webdriver import ActionChains
+from concurrent.futures import ThreadPoolExecutor, wait
 from .ai_modules import *
+from .driver_pool import get_driver_pool, apply_site_profile, content_selector
+from .search_cache import cached_search
+from .http_client import http_request
+from .embedding_store import get_embedding_store
+from .planner import plan_search, record_latency, save_latencies
+from .page_cache import get_cached_page, put_cached_page
+from .static_fetch import js_gate_reason
+from .async_scraper import fetch_pages
+from .passage_selection import select_passages
+from .dedup import new_dedupe_state, dedupe_next_page
+from .search_index import index_search
+from .artifact_store import store_page
+from .timings import span, start_run, record_span, write_timings, write_metrics_textfile
 
 # Initial Setup
 load_dotenv()
-ua = UserAgent()
-genai.configure(api_key=os.getenv("GEMINI_KEY"))
 brave_key=os.getenv("BRAVE_KEY")
+brave_api_url=os.getenv("BRAVE_API_URL", "https://api.search.brave.com/res/v1/web/search")
 mode=os.getenv("MODE")
 extract_instructions = os.getenv("SEARCH_SUMMARY_INSTRUCTIONS")
+embedding_model = "models/text-embedding-004"
+pipelined_mode = os.getenv("PIPELINED_SUMMARY", "false").lower() == "true"
+pipeline_deadline_seconds = float(os.getenv("PIPELINE_DEADLINE_SECONDS", "60"))
+condense_workers = int(os.getenv("CONDENSE_WORKERS", "4"))
+summary_mode = os.getenv("SUMMARY_MODE", "single").lower()
+passage_selection = os.getenv("PASSAGE_SELECTION", "false").lower() == "true"
+# Stop scraping once this many pages are saved (a fraction of the URLs when <= 1; 0 waits for all)
+scrape_quorum = float(os.getenv("SCRAPE_QUORUM", "0"))
+scrape_soft_deadline = float(os.getenv("SCRAPE_SOFT_DEADLINE_SECONDS", "0"))
+# Maximum texts per embedding API call
+embed_batch_size = 100
+
+# Process-wide counters of which scrape tier served each page
+scrape_tier_counts = {}
+scrape_tier_lock = threading.Lock()
+run_metadata_lock = threading.Lock()
 
 # Random viewport sizes for more human-like behavior
 viewport_widths = [1366, 1440, 1536, 1600, 1920]
@@ -87,9 +104,22 @@ def extract_urls_from_json(file_path):
         print(f"Error extracting URLs: {str(e)}")
         return None
 
+def embed_batch(texts):
+    """Embeds texts with the Gemini embedding model, at most `embed_batch_size` per API call."""
+    vectors = []
+    for start in range(0, len(texts), embed_batch_size):
+        batch = texts[start:start + embed_batch_size]
+        with span("embed", texts=len(batch)):
+            vectors.extend(get_genai().embed_content(model=embedding_model, content=batch)["embedding"])
+    return vectors
+
 def rerank_urls(query, urls):
     """
     Reranks a list of URLs based on their relevance to a given query.
+
+    Embeddings are served from the persistent embedding store; only the 
+    query and descriptions not seen before are sent to the embedding API, 
+    in a single batch.
     """
     if not urls:
         print("No URLs to rerank")
@@ -111,13 +141,15 @@ def rerank_urls(query, urls):
             print("No valid URLs with descriptions found")
             return urls  # Return original URLs if none have descriptions
             
-        # Get embeddings
-        query_embed = genai.embed_content(model="models/text-embedding-004", content=[query])
-        query_embed = np.array(query_embed["embedding"])
-        url_embeds = genai.embed_content(model="models/text-embedding-004", content=url_descriptions)
-        url_embeds = np.array(url_embeds["embedding"])
+        # Get embeddings, calling the API only for texts not in the embedding store
+        store = get_embedding_store(embedding_model)
+        embeds = store.embed([query] + url_descriptions, embed_batch)
+        query_embed = embeds[:1]
+        url_embeds = embeds[1:]
+        print(f"Embedding store: {store.stats()}")
         
         # Calculate scores and sort
+        import numpy as np
         url_scores = np.linalg.norm(url_embeds - query_embed, axis=1)
         
         # Create list of (score, url) tuples and sort
@@ -144,6 +176,7 @@ def web_search(query, key, num_searches=5):
     - Configurable number of search results
     - Saves search results to a JSON file for further processing
     - Extracts, reranks, and returns URLs from the search results
+    - Reuses cached Brave responses and shares in-flight identical queries
 
     Parameters:
     -----------
@@ -171,6 +204,9 @@ def web_search(query, key, num_searches=5):
     - Uses Brave Search API with subscription token.
     - Sets appropriate headers for JSON response.
     - Handles potential API request errors.
+    - Successful responses are cached under search/search_cache for 
+      SEARCH_CACHE_TTL_HOURS, keyed by the normalized query and parameters.
+    - Concurrent identical queries share a single upstream call.
 
     Example:
     --------
@@ -187,11 +223,11 @@ def web_search(query, key, num_searches=5):
     key_dir = os.path.join(data_dir, f"search_{key}")
     if not os.path.exists(key_dir):
         os.makedirs(key_dir)
+    start_run(key_dir)
     
     # Perform the search
     headers = {
         'Accept': 'application/json',
-        'Accept-Encoding': 'gzip',
         'X-Subscription-Token': brave_key,
     }
 
@@ -199,9 +235,14 @@ def web_search(query, key, num_searches=5):
         'q': query
     }
 
-    response = requests.get('https://api.search.brave.com/res/v1/web/search', params=params, headers=headers)
+    def call_brave():
+        response = http_request("brave", "GET", brave_api_url, params=params, headers=headers)
+        return response.json(), response.ok
 
-    data=response.json()
+    search_start = time.time()
+    with span("web_search", key_dir):
+        data = cached_search(query, params, call_brave)
+    record_latency("web_search", time.time() - search_start)
     
     file_path = os.path.join(key_dir, "web_search.json")
     with open(file_path, 'w', encoding='utf-8') as f:
@@ -211,7 +252,10 @@ def web_search(query, key, num_searches=5):
     
     # Extract and return URLs
     urls= extract_urls_from_json(file_path)
-    sorted_urls=rerank_urls(query, urls)
+    rerank_start = time.time()
+    with span("rerank", key_dir, urls=len(urls or [])):
+        sorted_urls=rerank_urls(query, urls)
+    record_latency("rerank", time.time() - rerank_start)
 
     file_path = os.path.join(key_dir, "web_search.json")
     with open(file_path, 'w', encoding='utf-8') as f:
@@ -221,7 +265,7 @@ def web_search(query, key, num_searches=5):
     
     return sorted_urls[:num_searches]
 
-def scrape_page(driver, url, key_dir):
+def scrape_page(driver, url, key_dir, timeout=10):
     """
     Web Page Scraping Function using Selenium WebDriver
 
@@ -230,7 +274,7 @@ def scrape_page(driver, url, key_dir):
 
     Key Features:
     - Utilizes Selenium WebDriver for dynamic web page interaction
-    - Employs BeautifulSoup for HTML parsing and content extraction
+    - Employs the single-pass extraction engine (lxml-backed when available)
     - Creates organized markdown files for scraped content
     - Handles various HTML elements with structured extraction
     - Supports error handling and logging
@@ -243,19 +287,24 @@ def scrape_page(driver, url, key_dir):
         The complete URL of the webpage to be scraped
     key_dir : str
         Directory path for storing scraped content
+    timeout : float, optional
+        Seconds allowed for navigation and for the page body to appear (default: 10)
 
     Content Extraction Strategy:
     ---------------------------
-    - Waits for page body to load completely
-    - Removes script and style tags to clean content
-    - Extracts and structures content from headings, paragraphs, and lists
-    - Converts extracted content to markdown format
+    - Serves the page from the cross-search page cache when a fresh copy exists
+    - With the lean browser profile, blocks images, fonts, media and ad/analytics 
+      hosts and waits only for the first heading, paragraph or list to appear; 
+      sites in LEAN_BROWSER_EXCLUDE_SITES load fully instead
+    - Skips script, style and noscript content
+    - Walks the document once, emitting headings, paragraphs, and lists in order
+    - Emits each text node once (nested lists become indented sub-bullets)
 
     File Management:
     ---------------
-    - Creates a unique directory for each URL based on its domain
-    - Generates markdown files with date-based naming
-    - Ensures safe filename creation by sanitizing special characters
+    - Stores the markdown through the artifact store: a compressed,
+      content-addressed blob referenced from the search's manifest.json
+      (ARTIFACT_STORE=files keeps one dated .md file per URL directory)
 
     Error Handling:
     --------------
@@ -265,60 +314,38 @@ def scrape_page(driver, url, key_dir):
     Example:
     --------
     scrape_page(selenium_driver, 'https://example.com', '/path/to/output')
-    # Creates a markdown file with structured page content
+    # Stores the structured page content for the search
     """
-    # Sanitize filename
-    filename = url.split('//')[-1]
-    filename = re.sub(r'[<>:"/\\|?*#]', '-', filename)
-    filename = filename.replace('.', '_')
-    
-    storage_path = os.path.join(key_dir, filename)
-    os.makedirs(storage_path, exist_ok=True)
-    
-    today_date = datetime.now().strftime("%d-%m-%Y")
-    output_file = os.path.join(storage_path, f"{today_date}.md")
+    if restore_cached_page(url, key_dir):
+        return
 
-    print(f"Saving content to: {output_file}")
+    # Selenium and the HTML parser are imported on first scrape, not at app start
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from .extraction import extract_markdown
 
     try:
         print(f"Navigating to URL: {url}")
-        driver.get(url)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
+        lean = apply_site_profile(driver, url)
+        with span("scrape_navigation", key_dir, url=url, lean=lean):
+            driver.set_page_load_timeout(timeout)
+            driver.get(url)
+            if lean:
+                # An eager load returns before subresources; wait for the text we extract
+                WebDriverWait(driver, timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, content_selector))
+                )
+            else:
+                WebDriverWait(driver, timeout).until(
+                    lambda page: page.execute_script("return document.readyState") == "complete"
+                )
         print(f"Page loaded successfully for {url}")
         
-        # Get page content
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove scripts and styles
-        for script in soup(["script", "style"]):
-            script.extract()
-        
-        # Extract content with structure
-        content = []
-        content.append(f"# Source URL: {url}\n")
-        content.append(f"# Scraped on: {today_date}\n\n")
-        
-        for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol']):
-            if element.name.startswith('h'):
-                heading_level = element.name[1]
-                content.append(f"\n{'#' * int(heading_level)} {element.get_text().strip()}\n")
-            elif element.name == 'p':
-                text = element.get_text().strip()
-                if text:
-                    content.append(f"{text}\n\n")
-            elif element.name in ['ul', 'ol']:
-                content.append("\n")
-                for li in element.find_all('li', recursive=False):
-                    content.append(f"* {li.get_text().strip()}\n")
-                content.append("\n")
-        
-        # Save content
-        text = '\n'.join(content)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(text)
+        # Extract and save content
+        with span("scrape_parse", key_dir, url=url, tier="selenium"):
+            body = extract_markdown(driver.page_source)
+            save_page_content(url, body, key_dir)
         
         print(f"Successfully saved content for {url}")
             
@@ -326,44 +353,223 @@ def scrape_page(driver, url, key_dir):
         print(f"Error scraping {url}: {str(e)}")
         raise  # Re-raise the exception to be caught by the caller
 
-def orchestrate_scraping(urls, key, key_dir):
+def save_page_content(url, body, key_dir):
+    """
+    Stores extracted markdown for a search, prefixed with the source URL and scrape date.
+    """
+    today_date = datetime.now().strftime("%d-%m-%Y")
+    header = [f"# Source URL: {url}\n", f"# Scraped on: {today_date}\n\n"]
+    text = '\n'.join(header) + '\n' + body
+    print(f"Saving content to: {store_page(key_dir, url, text)}")
+    put_cached_page(url, text)
+
+def restore_cached_page(url, key_dir):
+    """
+    Copies a page from the cross-search page cache into a search directory.
+    Returns True on a cache hit, False if the page has to be scraped.
+    """
+    content = get_cached_page(url)
+    if content is None:
+        return False
+    store_page(key_dir, url, content)
+    print(f"Served {url} from the page cache")
+    return True
+
+def save_static_page(url, html, key_dir):
+    """
+    Extracts statically fetched HTML and saves it unless it looks empty or JS-gated.
+    Returns True if the page was saved.
+    """
+    from .extraction import extract_markdown
+    with span("scrape_parse", key_dir, url=url, tier="http"):
+        body = extract_markdown(html)
+    reason = js_gate_reason(html, body)
+    if reason is not None:
+        print(f"Static fetch for {url} looks empty or JS-gated ({reason})")
+        return False
+    save_page_content(url, body, key_dir)
+    print(f"Successfully saved static content for {url}")
+    return True
+
+def record_scrape_tier(tier):
+    """Adds a URL's scrape tier to the process-wide tier counters."""
+    with scrape_tier_lock:
+        scrape_tier_counts[tier] = scrape_tier_counts.get(tier, 0) + 1
+
+def get_scrape_tier_stats():
+    """
+    Returns process-wide counts of pages served by each scrape tier
+    ('cache', 'http', 'selenium', 'failed') along with the HTTP-tier hit rate.
+    """
+    with scrape_tier_lock:
+        stats = dict(scrape_tier_counts)
+    total = sum(stats.values())
+    stats['http_hit_rate'] = stats.get('http', 0) / total if total else 0.0
+    return stats
+
+def write_run_metadata(key_dir, updates):
+    """
+    Merges `updates` into the search's run_metadata.json file.
+    """
+    metadata_file = os.path.join(key_dir, "run_metadata.json")
+    with run_metadata_lock:
+        metadata = {}
+        if os.path.exists(metadata_file):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except Exception as e:
+                print(f"Error reading run metadata: {str(e)}")
+        metadata.update(updates)
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=4)
+
+def quorum_size(quorum, total):
+    """Pages needed for a quorum: a fraction of `total` when <= 1, a count otherwise; None if disabled."""
+    if not quorum or quorum <= 0 or total == 0:
+        return None
+    if quorum <= 1:
+        return max(1, math.ceil(quorum * total))
+    return min(int(quorum), total)
+
+def orchestrate_scraping(urls, key, key_dir, on_page=None, page_timeout=None, quorum=None, soft_deadline=None,
+                         stop_event=None):
     """
     Web Scraping Orchestration Function
 
     This function manages the parallel scraping of multiple URLs using 
-    ThreadPoolExecutor and Selenium WebDriver, providing an efficient 
-    and scalable web content extraction mechanism.
+    ThreadPoolExecutor and a shared pool of Selenium WebDrivers, providing an 
+    efficient and scalable web content extraction mechanism.
+
+    URLs with a fresh copy in the cross-search page cache are served from 
+    disk. The rest are first fetched over plain HTTP by the asyncio fetch engine, 
+    which runs dozens of requests at once under global and per-host limits. 
+    Pages that fail or come back empty or JS-gated are escalated to a browser 
+    as soon as they miss, overlapping with the remaining HTTP fetches. Drivers 
+    are checked out from the process-wide pool and returned afterwards, so 
+    consecutive searches reuse warm browsers instead of paying a Chrome launch 
+    per page. The tier that served each URL is written to run_metadata.json.
+
+    If `on_page` is given, `on_page(url)` is called from a worker thread as 
+    soon as each page has been saved, so later stages can start early. 
+    `page_timeout` bounds each HTTP fetch and each browser navigation 
+    (default: STATIC_FETCH_TIMEOUT for HTTP, 10 seconds for Selenium).
+
+    Quorum mode returns early instead of waiting for the slowest site: once 
+    `quorum` pages are saved (a fraction of the URLs when <= 1, default 
+    SCRAPE_QUORUM) or `soft_deadline` seconds pass (default 
+    SCRAPE_SOFT_DEADLINE_SECONDS), outstanding HTTP fetches are cancelled, 
+    queued browser escalations are skipped before they take a driver, and 
+    browser loads in flight are abandoned (their drivers return to the pool 
+    when the navigation ends). Dropped URLs are recorded in run_metadata.json.
+    Setting `stop_event` (a threading.Event) from outside, e.g. to cancel a
+    background job, ends the scrape the same way.
+
+    Returns the URLs whose pages were saved in time, in `urls` order. A page 
+    an abandoned load saves afterwards still lands in the search directory, 
+    so summarize only the returned URLs.
     """
-    def scrape_with_new_driver(url):
-        print(f"\nStarting to scrape URL: {url}")
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--enable-javascript')
-        user_agent = ua.random
-        chrome_options.add_argument(f'user-agent={user_agent}')
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        
-        print(f"Using User-Agent: {user_agent}")
-        
+    pool = get_driver_pool()
+    tiers = {url: "failed" for url in urls}
+    scrape_start = time.time()
+    needed = quorum_size(scrape_quorum if quorum is None else quorum, len(urls))
+    soft_deadline = scrape_soft_deadline if soft_deadline is None else soft_deadline
+    if stop_event is None:
+        stop_event = threading.Event()
+    finished = threading.Event()
+    stop_reason = {}
+    saved_lock = threading.Lock()
+    saved_count = [0]
+    failed_urls = set()
+
+    def stop(reason):
+        if not stop_event.is_set():
+            stop_reason['reason'] = reason
+            stop_event.set()
+
+    def page_saved(url, tier):
+        if finished.is_set():
+            # A load abandoned by quorum mode that completed afterwards
+            return
+        tiers[url] = tier
+        if tier != "cache":
+            record_latency("scrape_page", time.time() - scrape_start)
+        with saved_lock:
+            saved_count[0] += 1
+            if needed is not None and saved_count[0] >= needed:
+                stop("quorum")
+        if on_page is not None:
+            on_page(url)
+
+    def scrape_with_pooled_driver(url):
+        if stop_event.is_set():
+            tiers[url] = "dropped"
+            return
+        print(f"\nEscalating {url} to Selenium")
         try:
-            driver = webdriver.Chrome(options=chrome_options)
-            print(f"Created new WebDriver instance for {url}")
-            scrape_page(driver, url, key_dir)
+            checkout_start = time.time()
+            with pool.checkout() as driver:
+                # Waiting for a free driver plus launching one if the pool had none idle
+                record_span(key_dir, "scrape_driver_start", time.time() - checkout_start, url=url)
+                scrape_page(driver, url, key_dir, timeout=page_timeout or 10)
             print(f"Successfully scraped {url}")
+            page_saved(url, "selenium")
         except Exception as e:
+            failed_urls.add(url)
             print(f"Error processing {url}: {str(e)}")
-        finally:
-            if 'driver' in locals():
-                driver.quit()
-                print(f"Closed WebDriver instance for {url}")
 
-    print(f"\nStarting parallel scraping for {len(urls)} URLs...")
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        executor.map(scrape_with_new_driver, urls)
-    print("\nCompleted scraping all URLs")
+    def save_fetched_page(url, html):
+        saved = save_static_page(url, html, key_dir)
+        if saved:
+            page_saved(url, "http")
+        return saved
+
+    for url in urls:
+        if restore_cached_page(url, key_dir):
+            page_saved(url, "cache")
+    pending = [url for url in urls if tiers[url] != "cache"]
+
+    print(f"\nStarting parallel scraping for {len(pending)} URLs ({len(urls) - len(pending)} cached)...")
+    deadline_timer = None
+    if soft_deadline and soft_deadline > 0:
+        deadline_timer = threading.Timer(soft_deadline, stop, args=("deadline",))
+        deadline_timer.daemon = True
+        deadline_timer.start()
+    escalations = []
+    executor = ThreadPoolExecutor(max_workers=pool.max_size)
+    try:
+        with span("scrape_http", key_dir, urls=len(pending)):
+            fetch_pages(pending, save_fetched_page, timeout=page_timeout, cancel_event=stop_event,
+                        on_miss=lambda url: escalations.append(executor.submit(scrape_with_pooled_driver, url)))
+        outstanding = escalations
+        while outstanding and not stop_event.is_set():
+            outstanding = list(wait(outstanding, timeout=0.1).not_done)
+    finally:
+        finished.set()
+        if deadline_timer is not None:
+            deadline_timer.cancel()
+        # Without a quorum stop every escalation has finished; otherwise do not wait for stragglers
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if stop_event.is_set():
+        stop_reason.setdefault('reason', "stopped")
+    dropped = [url for url in urls if stop_event.is_set() and tiers[url] == "failed" and url not in failed_urls]
+    for url in dropped:
+        tiers[url] = "dropped"
+    if dropped:
+        print(f"\nScraping stopped early ({stop_reason['reason']}) after {time.time() - scrape_start:.2f}s, "
+              f"dropped {len(dropped)} URLs")
+
+    for tier in tiers.values():
+        record_scrape_tier(tier)
+    write_run_metadata(key_dir, {"scrape_tiers": tiers, "quorum": {
+        "needed": needed,
+        "soft_deadline": soft_deadline or None,
+        "stopped_by": stop_reason.get('reason'),
+        "dropped": [url for url in urls if tiers[url] == "dropped"],
+    }})
+    print(f"\nCompleted scraping all URLs (tiers: {get_scrape_tier_stats()}, driver pool: {pool.stats()})")
+    return [url for url in urls if tiers[url] in ("cache", "http", "selenium")]
 
 def scrape_url(url, chrome_options, key_dir):
     """
@@ -373,7 +579,7 @@ def scrape_url(url, chrome_options, key_dir):
     managing the lifecycle of a Selenium WebDriver for a single URL.
 
     Key Features:
-    - Initializes a new Chrome WebDriver instance
+    - Checks out a Chrome WebDriver from the pool matching the given options
     - Calls the main scraping function for a specific URL
     - Ensures proper WebDriver resource management
     - Provides a clean, abstracted interface for URL scraping
@@ -389,15 +595,15 @@ def scrape_url(url, chrome_options, key_dir):
 
     Workflow:
     ---------
-    1. Initialize Chrome WebDriver with specified options
+    1. Check out a pooled Chrome WebDriver for the specified options
     2. Call scrape_page function to extract content
-    3. Automatically close the WebDriver after scraping
+    3. Automatically return the WebDriver to the pool after scraping
     4. Handles potential exceptions during scraping process
 
     Resource Management:
     -------------------
-    - Creates and destroys WebDriver instance for each URL
-    - Prevents resource leaks by explicitly closing the driver
+    - Reuses pooled WebDriver instances across URLs and searches
+    - Prevents resource leaks by always returning the driver to the pool
     - Supports concurrent scraping through thread-safe design
 
     Example:
@@ -405,11 +611,219 @@ def scrape_url(url, chrome_options, key_dir):
     scrape_url('https://example.com', chrome_options, '/output/directory')
     # Scrapes the URL and saves content in the specified directory
     """
-    driver = webdriver.Chrome(options=chrome_options)
-    scrape_page(driver, url, key_dir)
-    driver.quit()
+    with get_driver_pool(chrome_options).checkout() as driver:
+        scrape_page(driver, url, key_dir)
+
+def pipelined_summary(query, key, links, key_dir, model):
+    """
+    Pipelined Scrape-to-Summarize Function
+
+    Overlaps scraping with model time. Scraped pages flow through a queue 
+    to a bounded pool of condensation workers that reduce each page to 
+    query-relevant notes as soon as it lands. The final synthesis runs when 
+    the last page arrives or PIPELINE_DEADLINE_SECONDS pass, whichever is 
+    first; pages still loading at the deadline are left out of the summary 
+    but keep scraping in the background, and condensations still running 
+    at the deadline are abandoned. Unless DEDUPE_PAGES=false, each page is 
+    deduplicated against the pages that arrived before it.
+
+    Parameters:
+    -----------
+    query : str
+        The search query to be summarized
+    key : str
+        Unique identifier for the search session
+    links : list
+        URLs to scrape
+    key_dir : str
+        Directory for storing scraped content
+    model : str
+        Model used for condensation and synthesis
 
-def smart_search(query, key, urls, model):
+    Returns:
+    --------
+    str
+        The generated summary, or the standard fallback message
+    """
+    local = mode == "Local"
+    deadline = time.time() + pipeline_deadline_seconds
+    pages = queue.Queue()
+
+    def scrape_all():
+        try:
+            orchestrate_scraping(links, key, key_dir, on_page=pages.put)
+        finally:
+            pages.put(None)
+
+    def condense(url, content):
+        try:
+            with span("condense_page", key_dir, url=url, model=model):
+                return condense_page(query, content, model, local)
+        except Exception as e:
+            print(f"Failed to condense {url}, using raw content: {str(e)}")
+            return content
+
+    threading.Thread(target=scrape_all, daemon=True).start()
+
+    condensed = {}
+    deadline_hit = False
+    dedupe_state = new_dedupe_state()
+    executor = ThreadPoolExecutor(max_workers=condense_workers)
+    try:
+        while True:
+            remaining = deadline - time.time()
+            try:
+                url = pages.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                deadline_hit = True
+                print(f"\nPipeline deadline reached with {len(condensed)} pages")
+                break
+            if url is None:
+                break
+            content = read_scraped_pages([url], key_dir, dedupe=False)
+            if content and dedupe_enabled:
+                # Against the pages seen so far; read_scraped_pages only sees this one
+                content = [dedupe_next_page(content[0], dedupe_state)]
+            if content and content[0]:
+                print(f"Condensing {url} while scraping continues...")
+                condensed[url] = executor.submit(condense, url, content[0])
+
+        # Only notes finished by the deadline make it into the summary
+        done = wait(list(condensed.values()), timeout=max(deadline - time.time(), 0)).done
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    notes = [condensed[url].result() for url in links if url in condensed and condensed[url] in done]
+    if len(notes) < len(condensed):
+        deadline_hit = True
+        print(f"\nPipeline deadline reached with {len(condensed) - len(notes)} pages still condensing")
+    write_run_metadata(key_dir, {"pipeline": {
+        "pages_condensed": len(notes),
+        "pages_abandoned": len(condensed) - len(notes),
+        "deadline_hit": deadline_hit,
+    }, "dedup": dedupe_state['stats'] if dedupe_enabled else {}})
+    with span("summarize", key_dir, mode="pipelined", model=model):
+        return synthesize_summary(query, notes, model, local)
+
+def summarize_pages(query, key, links, key_dir, model):
+    """
+    Runs the configured summarizer (Ollama in Local mode, Gemini otherwise) 
+    and records its per-page latency for the search planner.
+
+    With SUMMARY_MODE=map_reduce the pages are condensed in parallel by 
+    CONDENSE_WORKERS workers and reduced into the summary; otherwise the 
+    single-shot summarizer sees all pages in one prompt. With 
+    PASSAGE_SELECTION=true either path only gets the passages most relevant 
+    to the query, within PASSAGE_TOKEN_BUDGET. Token counts and timings, 
+    and what deduplication and passage selection removed, are logged and 
+    stored in run_metadata.json.
+    """
+    summarize_start = time.time()
+    dedupe_stats = {}
+    pages = read_scraped_pages(links, key_dir, stats=dedupe_stats)
+    pages_read = len(pages)
+    passage_stats = {}
+    if passage_selection:
+        try:
+            store = get_embedding_store(embedding_model)
+            pages = select_passages(query, pages, lambda texts: store.embed(texts, embed_batch), stats=passage_stats)
+        except Exception as e:
+            print(f"Passage selection failed, summarizing full pages: {str(e)}")
+    if summary_mode == "map_reduce":
+        stats = {'mode': "map_reduce"}
+        with span("summarize", key_dir, mode="map_reduce", model=model):
+            summary = map_reduce_summary(query, pages, model,
+                                         local=mode == "Local", workers=condense_workers, stats=stats)
+    else:
+        stats = {'mode': "single", 'input_tokens': sum(estimate_tokens(page) for page in pages)}
+        with span("summarize", key_dir, mode="single", model=model):
+            if mode=="Local":
+                summary = ollama_model(query, links, key, key_dir,model, pages=pages)
+            else:
+                summary = gemini_smart_summary(query, links, key, key_dir,model, pages=pages)
+        stats['output_tokens'] = estimate_tokens(summary or "")
+    stats['seconds'] = round(time.time() - summarize_start, 2)
+    print(f"Summarization stats: {stats}")
+    write_run_metadata(key_dir, {"summary": stats, "dedup": dedupe_stats, "passages": passage_stats})
+    # Per page actually summarized; a run with nothing to summarize says nothing about the model
+    if pages_read:
+        record_latency(f"summarize_page:{model}", (time.time() - summarize_start) / pages_read)
+    return summary
+
+def planned_summary(query, key, links, key_dir, plan, deadline_at):
+    """
+    Deadline-enforced Scrape-and-Summarize Function
+
+    Runs scraping and summarization under a plan from `plan_search`, 
+    enforcing the end-to-end deadline.
+
+    Workflow:
+    ---------
+    1. Scrape the plan's number of URLs with the plan's per-page timeout
+    2. Stop waiting for scraping once only the summary budget remains; 
+       slower pages keep loading in the background but are left out
+    3. Summarize the pages saved so far with the plan's model
+    4. If the model has not answered by the deadline (or fails), return an 
+       extractive digest of the scraped pages instead
+
+    Parameters:
+    -----------
+    query : str
+        The search query to be summarized
+    key : str
+        Unique identifier for the search session
+    links : list
+        Candidate URLs, best first
+    key_dir : str
+        Directory for storing scraped content
+    plan : dict
+        Plan returned by `plan_search`
+    deadline_at : float
+        Absolute deadline as a `time.time()` timestamp
+
+    Returns:
+    --------
+    str
+        The best summary available by the deadline
+    """
+    links = links[:plan['num_urls']]
+    saved = set()
+    scraper = threading.Thread(
+        target=orchestrate_scraping,
+        args=(links, key, key_dir),
+        kwargs={'page_timeout': plan['page_timeout'], 'on_page': saved.add},
+        daemon=True,
+    )
+    scraper.start()
+    scraper.join(timeout=max(deadline_at - plan['summary_budget'] - time.time(), 0))
+    scrape_completed = not scraper.is_alive()
+    if not scrape_completed:
+        print("\nScrape budget exhausted, summarizing the pages saved so far")
+    # Pages that keep loading in the background are left out, also from the fallback
+    served = [url for url in links if url in saved]
+
+    result = {}
+
+    def summarize():
+        result['summary'] = summarize_pages(query, key, served, key_dir, plan['model'])
+
+    summarizer = threading.Thread(target=summarize, daemon=True)
+    summarizer.start()
+    summarizer.join(timeout=max(deadline_at - time.time(), 0))
+
+    summary = result.get('summary')
+    deadline_met = summary is not None and summary != summary_error
+    if not deadline_met:
+        print("\nModel summary not available by the deadline, returning an extractive digest")
+        summary = fallback_summary(query, read_scraped_pages(served, key_dir))
+
+    write_run_metadata(key_dir, {
+        "plan": plan,
+        "scrape_completed": scrape_completed,
+        "model_summary_in_time": deadline_met,
+    })
+    return summary
+
+def smart_search(query, key, urls, model, pipelined=None, plan=None, deadline_at=None, progress=None):
     """
     Smart Search Orchestration Function
 
@@ -433,6 +847,16 @@ def smart_search(query, key, urls, model):
         Pre-existing list of URLs to process (if not provided by web search)
     model : str
         AI model version for summarization
+    pipelined : bool, optional
+        Condense pages while scraping is still running and synthesize at the 
+        end (default: PIPELINED_SUMMARY environment setting, off if unset)
+    progress : callable, optional
+        `progress(stage, fraction, message)` is called as the search moves 
+        through its stages (scraping, summarizing, indexing). Exceptions it 
+        raises before summarizing abort the search, which is how background 
+        jobs are cancelled; one raised for a per-page update stops the 
+        scrape and is re-raised once it has wound down. After the summary 
+        exists it is always saved and indexed, so exceptions are ignored
 
     Search Workflow:
     ---------------
@@ -472,20 +896,48 @@ def smart_search(query, key, urls, model):
     key_dir = os.path.join(data_dir, f"search_{key}")
     if not os.path.exists(key_dir):
         os.makedirs(key_dir)
+    start_run(key_dir)
         
     start_time = time.time()
     
     print(f"\nStarting smart search for query: '{query}'...")
     links = [url['url'] for url in urls]
     
-    # Scrape webpages
-    orchestrate_scraping(links, key, key_dir)
+    if pipelined is None:
+        pipelined = pipelined_mode
+    
+    def report(stage, fraction, message=""):
+        if progress is not None:
+            progress(stage, fraction, message)
+    
+    scraped = []
+    stop_scraping = threading.Event()
+    page_errors = []
     
-    # Generate summary
-    if mode=="Local":
-        summary = ollama_model(query, links, key, key_dir,model)
+    def page_done(url):
+        scraped.append(url)
+        if stop_scraping.is_set():
+            return
+        try:
+            report("scraping", 0.6 * len(scraped) / max(len(links), 1), f"{len(scraped)}/{len(links)} pages")
+        except Exception as e:
+            page_errors.append(e)
+            stop_scraping.set()
+    
+    # Scrape webpages and generate summary
+    if plan is not None and deadline_at is not None:
+        report("scraping and summarizing", 0.0, f"{len(links)} pages, {plan['tier']} plan")
+        summary = planned_summary(query, key, links, key_dir, plan, deadline_at)
+    elif pipelined:
+        report("scraping and summarizing", 0.0, f"{len(links)} pages")
+        summary = pipelined_summary(query, key, links, key_dir, model)
     else:
-        summary = gemini_smart_summary(query, links, key, key_dir,model)
+        report("scraping", 0.0, f"0/{len(links)} pages")
+        served = orchestrate_scraping(links, key, key_dir, on_page=page_done, stop_event=stop_scraping)
+        if page_errors:
+            raise page_errors[0]
+        report("summarizing", 0.6, f"{len(served)} pages scraped")
+        summary = summarize_pages(query, key, served, key_dir, model)
     
     if summary:
         summary_file = os.path.join(key_dir, "summary.md")
@@ -493,8 +945,31 @@ def smart_search(query, key, urls, model):
             f.write(summary)
         print(f"\nSummary saved to: {summary_file}")
     
+    # The summary has been paid for: keep it even if the search was cancelled meanwhile
+    try:
+        report("indexing", 0.95)
+    except Exception as e:
+        print(f"Finishing the search after a progress error: {str(e)}")
+    
+    # Make the summary and scraped pages searchable from the History page
+    try:
+        with span("index", key_dir):
+            indexed = index_search(key, query, key_dir)
+        print(f"Indexed {indexed} documents for full-text search")
+    except Exception as e:
+        print(f"Error updating the full-text index: {str(e)}")
+    
+    save_latencies()
+    
     end_time = time.time()
     execution_time = end_time - start_time
     print(f"\nSmart search completed in {execution_time:.2f} seconds")
     
+    # Per-stage timings of this search next to summary.md, aggregates for Prometheus
+    record_span(None, "smart_search", execution_time)
+    timings = write_timings(key_dir)
+    if timings:
+        print(f"Stage timings: { {stage: values['total'] for stage, values in timings['stages'].items()} }")
+    write_metrics_textfile()
+    
     return summary
@@ -0,0 +1,54 @@
+import os
+import re
+
+# Static fetch configuration (overridable through the .env file)
+min_static_text_chars = int(os.getenv("MIN_STATIC_TEXT_CHARS", "500"))
+
+# Markers of pages that only render their content with JavaScript, with the reason they name
+js_gate_patterns = [
+    (re.compile(r"<noscript[^>]*>[^<]*(enable|requires?|turn on)[^<]*javascript", re.IGNORECASE),
+     "noscript notice"),
+    (re.compile(r"<div[^>]+id=[\"'](root|app|__next|__nuxt)[\"'][^>]*>\s*</div>", re.IGNORECASE),
+     "empty app shell"),
+]
+
+
+def js_gate_reason(html, content):
+    """
+    Returns why a statically fetched page needs a real browser, or None.
+
+    Only pages whose extracted text is shorter than MIN_STATIC_TEXT_CHARS
+    are escalated. The JavaScript markers (an empty single-page-app shell,
+    a noscript notice asking for JavaScript) are only looked at for those
+    pages, to name the reason: server-rendered pages often carry a stock
+    noscript notice and must keep the cheap HTTP tier.
+    """
+    if len(content.strip()) >= min_static_text_chars:
+        return None
+    for pattern, reason in js_gate_patterns:
+        if pattern.search(html):
+            return reason
+    return "too little text"
+
+
+def looks_js_gated(html, content):
+    """
+    Decides whether a statically fetched page needs a real browser.
+
+    A page is considered JS-gated when the extracted text is shorter than
+    MIN_STATIC_TEXT_CHARS, whatever markers the HTML carries; see
+    `js_gate_reason` for why a page was escalated.
+
+    Parameters:
+    -----------
+    html : str
+        The raw HTML returned by the static fetch
+    content : str
+        The text extracted from that HTML
+
+    Returns:
+    --------
+    bool
+        True if the page should be re-scraped with Selenium
+    """
+    return js_gate_reason(html, content) is not None
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+search_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'search')
+
+# Metrics configuration (overridable through the .env file)
+metrics_textfile = os.getenv("METRICS_TEXTFILE", os.path.join(search_dir, 'metrics.prom'))
+# Histogram counts of every process (app, job workers, batch runs) are summed here
+metrics_db_path = os.path.join(search_dir, 'metrics.sqlite3')
+
+timings_file_name = "timings.json"
+
+# Upper bounds (seconds) of the histogram buckets; +Inf is implicit
+histogram_buckets = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_runs = {}
+_histograms = {}
+# Histogram counts already added to the shared metrics database
+_flushed = {}
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+
+
+def start_run(run):
+    """
+    Starts collecting spans for a search (identified by its directory).
+
+    Calling it again for a run in progress keeps the original start time.
+    """
+    with _lock:
+        _runs.setdefault(run, {'started': time.time(), 'spans': []})
+
+
+def record_span(run, stage, seconds, **attributes):
+    """
+    Records one timed span.
+
+    Every span feeds the process-wide histogram of its stage. Spans of a
+    started `run` are also kept for that search's timings.json; spans that
+    arrive after the run was written (e.g. pages still loading past a
+    deadline) only count towards the histograms.
+    """
+    now = time.time()
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = {'buckets': [0] * len(histogram_buckets), 'count': 0, 'sum': 0.0}
+        for index, bound in enumerate(histogram_buckets):
+            if seconds <= bound:
+                histogram['buckets'][index] += 1
+        histogram['count'] += 1
+        histogram['sum'] += seconds
+        if run in _runs:
+            _runs[run]['spans'].append(dict(attributes, stage=stage, end=now, seconds=round(seconds, 3)))
+
+
+@contextmanager
+def span(stage, run=None, **attributes):
+    """
+    Times the enclosed block as a span of `stage`.
+
+    The span is recorded even if the block raises, with `error` set.
+
+    Example:
+    --------
+    with span("web_search", key_dir):
+        data = cached_search(query, params, call_brave)
+    """
+    start = time.time()
+    try:
+        yield
+    except Exception:
+        attributes['error'] = True
+        raise
+    finally:
+        record_span(run, stage, time.time() - start, **attributes)
+
+
+def stage_breakdown(spans):
+    """Aggregates spans into {stage: {'count', 'total', 'max'}} ordered by first appearance."""
+    stages = {}
+    for item in spans:
+        stage = stages.setdefault(item['stage'], {'count': 0, 'total': 0.0, 'max': 0.0})
+        stage['count'] += 1
+        stage['total'] = round(stage['total'] + item['seconds'], 3)
+        stage['max'] = max(stage['max'], item['seconds'])
+    return stages
+
+
+def write_timings(run):
+    """
+    Writes the spans recorded for a search to timings.json in its directory.
+
+    Span times are stored as `start` offsets (seconds) from `start_run`,
+    so the file reads as a timeline. The run is forgotten afterwards.
+    Returns the written timings, or None if nothing was recorded.
+    """
+    with _lock:
+        recorded = _runs.pop(run, None)
+    if not recorded or not recorded['spans']:
+        return None
+    started = recorded['started']
+    spans = []
+    for item in sorted(recorded['spans'], key=lambda item: item['end'] - item['seconds']):
+        item = dict(item)
+        item['start'] = round(max(item.pop('end') - item['seconds'] - started, 0), 3)
+        spans.append(item)
+    timings = {
+        'total_seconds': round(time.time() - started, 3),
+        'stages': stage_breakdown(spans),
+        'spans': spans,
+    }
+    try:
+        with open(os.path.join(run, timings_file_name), 'w', encoding='utf-8') as f:
+            json.dump(timings, f, ensure_ascii=False, indent=4)
+    except Exception as e:
+        print(f"Error writing timings: {str(e)}")
+    return timings
+
+
+def histogram_stats():
+    """Returns a copy of the process-wide histograms: {stage: {'buckets', 'count', 'sum'}}."""
+    with _lock:
+        return {stage: {'buckets': list(h['buckets']), 'count': h['count'], 'sum': h['sum']}
+                for stage, h in _histograms.items()}
+
+
+def prometheus_text(histograms=None):
+    """Renders stage histograms (default: this process's) in the Prometheus text exposition format."""
+    histograms = histogram_stats() if histograms is None else histograms
+    lines = [
+        "# HELP searchupp_stage_duration_seconds Duration of SearchUpp pipeline stages.",
+        "# TYPE searchupp_stage_duration_seconds histogram",
+    ]
+    for stage, histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram_buckets, histogram['buckets']):
+            lines.append(f'searchupp_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'searchupp_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+        lines.append(f'searchupp_stage_duration_seconds_sum{{stage="{stage}"}} {histogram["sum"]:.6f}')
+        lines.append(f'searchupp_stage_duration_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def _flush_histograms(connection):
+    """
+    Adds what this process recorded since its last flush to the shared
+    histograms and returns the new totals of all processes. Runs inside the
+    caller's transaction; `_flushed` is only advanced once it commits.
+    """
+    current = histogram_stats()
+    flushed = {}
+    for stage, histogram in current.items():
+        previous = _flushed.get(stage, {'buckets': [0] * len(histogram_buckets), 'count': 0, 'sum': 0.0})
+        if histogram['count'] == previous['count']:
+            continue
+        row = connection.execute("SELECT buckets, count, sum FROM stage_histograms WHERE stage = ?",
+                                 (stage,)).fetchone()
+        buckets, count, total = (json.loads(row[0]), row[1], row[2]) if row else ([0] * len(histogram_buckets), 0, 0.0)
+        buckets = [stored + now - before
+                   for stored, now, before in zip(buckets, histogram['buckets'], previous['buckets'])]
+        connection.execute(
+            "INSERT OR REPLACE INTO stage_histograms (stage, buckets, count, sum) VALUES (?, ?, ?, ?)",
+            (stage, json.dumps(buckets), count + histogram['count'] - previous['count'],
+             total + histogram['sum'] - previous['sum']),
+        )
+        flushed[stage] = histogram
+    totals = {
+        stage: {'buckets': json.loads(buckets), 'count': count, 'sum': total}
+        for stage, buckets, count, total in connection.execute("SELECT stage, buckets, count, sum FROM stage_histograms")
+    }
+    return totals, flushed
+
+
+def write_metrics_textfile(path=None):
+    """
+    Writes the stage histograms to a Prometheus textfile (METRICS_TEXTFILE,
+    default search/metrics.prom) for node_exporter's textfile collector.
+
+    The Streamlit app, background job workers and batch runs all write the
+    same file, so each process first adds its new observations to shared
+    counters in search/metrics.sqlite3 and the file always shows the sum of
+    all processes. Flushing and rewriting happen in one write transaction,
+    so concurrent writers never publish counts that go backwards, and the
+    file is replaced atomically so the collector never reads half of it.
+    """
+    path = path or metrics_textfile
+    if not path:
+        return
+    try:
+        with _flush_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            os.makedirs(search_dir, exist_ok=True)
+            connection = sqlite3.connect(metrics_db_path, timeout=30, isolation_level=None)
+            try:
+                connection.execute("CREATE TABLE IF NOT EXISTS stage_histograms "
+                                   "(stage TEXT PRIMARY KEY, buckets TEXT, count INTEGER, sum REAL)")
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    totals, flushed = _flush_histograms(connection)
+                    temp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        f.write(prometheus_text(totals))
+                    os.replace(temp_path, path)
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+            finally:
+                connection.close()
+            _flushed.update(flushed)
+    except Exception as e:
+        print(f"Error writing metrics textfile: {str(e)}")
@@ -0,0 +1,82 @@
+import os
+import json
+import toml
+import streamlit as st
+from dotenv import load_dotenv
+
+project_dir = os.path.dirname(os.path.dirname(__file__))
+theme_config_path = os.path.join(project_dir, '.streamlit', 'config.toml')
+env_path = os.path.join(project_dir, '.env')
+
+# How long the list of installed Ollama models is reused
+ollama_models_ttl_seconds = 60
+
+
+def file_version(path):
+    """Returns (mtime, size) of a file, or None if it does not exist; part of every cache key."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _theme_config(path, version):
+    with open(path, 'r') as f:
+        return toml.load(f)
+
+
+def load_theme_config(path=theme_config_path):
+    """
+    Returns the parsed .streamlit/config.toml.
+
+    The file is parsed again only when its modification time or size
+    changes, e.g. after the theme is updated on the Settings page.
+    """
+    return _theme_config(path, file_version(path))
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_env(path, version):
+    load_dotenv(path)
+    return version
+
+
+def load_env(path=env_path):
+    """Loads the .env file into the environment once per change of the file, not on every rerun."""
+    _load_env(path, file_version(path))
+
+
+@st.cache_data(show_spinner=False, ttl=ollama_models_ttl_seconds)
+def list_ollama_models():
+    """Returns the names of the installed Ollama models, refreshed at most once a minute."""
+    import ollama
+    return [model["model"] for model in ollama.list()["models"]]
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _json_file(path, version):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_json(path):
+    """
+    Returns the parsed contents of a per-search JSON artifact.
+
+    Cached per (path, mtime, size), so reruns do no I/O while a rewritten
+    file is picked up immediately.
+    """
+    return _json_file(path, file_version(path))
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _text_file(path, version):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def load_text(path):
+    """Returns the contents of a per-search markdown artifact, cached like `load_json`."""
+    return _text_file(path, file_version(path))
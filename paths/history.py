@@ -1,30 +1,77 @@
 import streamlit as st
-import os
-import pandas as pd
-import datetime
+from modules.history_store import page_searches, get_search, history_page_size
+from modules.search_index import search_documents
 
 st.title("History 📜")
 
-history_path=os.path.join("search","search_history.csv")
+# Full-text search inside past summaries and scraped pages
+content_query = st.text_input("Search inside summaries and pages", key="history_content_query")
+if content_query:
+    hits = search_documents(content_query)
+    if not hits:
+        st.write("No summaries or pages match")
+    for hit_idx, hit in enumerate(hits):
+        col1, col2 = st.columns([3,1])
+        with col1:
+            source = "Summary" if hit['kind'] == "summary" else hit['url']
+            st.write(f"**Query:** {hit['query']}  \n**{source}**")
+            st.markdown(f"> {' '.join(hit['snippet'].split())}")
+        with col2:
+            record = get_search(hit['search_id'])
+            if record and st.button('View Details', key=f"hit_{hit_idx}"):
+                st.session_state.clicked_history_row = record
+                st.switch_page("paths/past.py")
+    st.divider()
 
-if os.path.exists(history_path):
-    history=pd.read_csv(history_path)
-    history=history.sort_values(by="datetime",ascending=False)
-    
-    # Convert DataFrame to a list of dictionaries for easier handling
-    history_records = history.to_dict('records')
-    
+# Filters are applied by the history database, not in the page
+filter_col, date_col, size_col = st.columns([2,2,1])
+with filter_col:
+    text_filter = st.text_input("Filter by query", key="history_text_filter")
+with date_col:
+    date_range = st.date_input("Date range", value=(), key="history_date_range")
+with size_col:
+    page_sizes = sorted({10, 20, 50, 100, history_page_size})
+    page_size = st.selectbox("Per page", page_sizes, index=page_sizes.index(history_page_size),
+                             key="history_page_size")
+
+date_from = date_range[0] if len(date_range) > 0 else None
+date_to = date_range[1] if len(date_range) > 1 else date_from
+
+# Cursors of the pages visited so far; reset whenever the filters change
+filters = (text_filter, date_from, date_to, page_size)
+if st.session_state.get("history_filters") != filters:
+    st.session_state.history_filters = filters
+    st.session_state.history_cursors = [None]
+
+cursors = st.session_state.history_cursors
+history_records, next_cursor = page_searches(page_size, cursors[-1], date_from, date_to, text_filter)
+
+if history_records:
     # Display each record with a button
-    for idx, record in enumerate(history_records):
+    for record in history_records:
         col1, col2 = st.columns([3,1])
         with col1:
             st.write(f"**Query:** {record['query']}")
             st.write(f"**Date & Time:** {record['datetime']}")
         with col2:
-            if st.button('View Details', key=f'btn_{idx}'):
+            if st.button('View Details', key=f"btn_{record['id']}"):
                 st.session_state.clicked_history_row = record
                 st.switch_page("paths/past.py")
         st.divider()
 
+    prev_col, page_col, next_col = st.columns([1,2,1])
+    with prev_col:
+        if st.button("← Newer", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with page_col:
+        st.write(f"Page {len(cursors)}")
+    with next_col:
+        if st.button("Older →", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+elif text_filter or date_from:
+    st.write("No searches match the filters")
 else:
-    st.write("No history found")
\ No newline at end of file
+    st.write("No history found")
@@ -0,0 +1,42 @@
+import streamlit as st
+import datetime
+from modules.jobs import list_jobs, cancel_job
+from modules.history_store import get_search
+
+st.title("Jobs ⏳")
+st.write("Searches running in the background. This page refreshes itself every few seconds.")
+
+status_icons = {"queued": "🕒", "running": "⚙️", "done": "✅", "failed": "❌", "cancelled": "🚫"}
+
+
+# Only this fragment reruns while polling; the rest of the page stays put
+@st.fragment(run_every=2)
+def show_jobs():
+    jobs = list_jobs()
+    if not jobs:
+        st.write("No background searches yet")
+        return
+    for job in jobs:
+        col1, col2 = st.columns([3,1])
+        with col1:
+            started = datetime.datetime.fromtimestamp(job['created']).strftime("%d-%m-%Y %H:%M:%S")
+            st.write(f"{status_icons.get(job['status'], '')} **Query:** {job['query']}  \n**Submitted:** {started}")
+            if job['status'] in ("queued", "running"):
+                label = "Cancelling..." if job['cancel_requested'] else job['stage'].capitalize()
+                st.progress(min(max(job['progress'], 0.0), 1.0), text=label)
+            elif job['status'] == "failed":
+                st.error(job['message'] or "Failed")
+        with col2:
+            if job['status'] in ("queued", "running"):
+                if st.button("Cancel", key=f"cancel_{job['id']}", disabled=job['cancel_requested']):
+                    cancel_job(job['id'])
+                    st.rerun(scope="fragment")
+            elif job['status'] == "done":
+                record = get_search(job['search_id'])
+                if record and st.button('View Details', key=f"view_{job['id']}"):
+                    st.session_state.clicked_history_row = record
+                    st.switch_page("paths/past.py")
+        st.divider()
+
+
+show_jobs()
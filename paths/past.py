@@ -1,18 +1,15 @@
 import streamlit as st
 import os
-import pandas as pd
 import datetime
 import json
 import toml
 
 import streamlit.components.v1 as components
+from modules.ui_cache import load_theme_config, load_json, load_text
+from modules.timings import timings_file_name
 
-# Load current theme
-config_path = os.path.join(os.path.dirname(__file__), '..', '.streamlit', 'config.toml')
-
-# Load existing configuration
-with open(config_path, 'r') as f:
-    config = toml.load(f)
+# Load current theme (parsed again only when config.toml changes)
+config = load_theme_config()
 
 # Set current theme values from config
 base = config.get('theme', {}).get('base', 'light')
@@ -40,10 +37,10 @@ if 'clicked_history_row' in st.session_state:
     
     # Display file contents if they exist
     st.divider()
-    results, summary=st.tabs(["Search Results", "Summary"])
+    results, summary, timings=st.tabs(["Search Results", "Summary", "Timings"])
     with results:
         if os.path.exists(record['search_path']):
-            search_content = json.load(open(record['search_path'], encoding='utf-8'))
+            search_content = load_json(record['search_path'])
             urls = search_content
             
             for url in urls:
@@ -65,8 +62,7 @@ if 'clicked_history_row' in st.session_state:
     # Check and display summary file contents
     with summary:
         if os.path.exists(record['summary_path']):
-            with open(record['summary_path'], 'r', encoding='utf-8') as f:
-                summary_content = f.read()
+            summary_content = load_text(record['summary_path'])
             # Create the HTML component
             copy_component = f"""
             <style>
@@ -131,5 +127,24 @@ if 'clicked_history_row' in st.session_state:
         else:
             st.warning("Summary file not found")
 
+    # Per-stage breakdown written by smart_search next to summary.md
+    with timings:
+        timings_path = os.path.join(os.path.dirname(record['summary_path']), timings_file_name)
+        if os.path.exists(timings_path):
+            timings_content = load_json(timings_path)
+            stages = timings_content['stages']
+            st.write(f"**Total:** {timings_content['total_seconds']:.2f} seconds")
+            st.bar_chart({"stage": list(stages), "seconds": [values['total'] for values in stages.values()]},
+                         x="stage", y="seconds", horizontal=True)
+            st.dataframe(
+                [{"stage": stage, "calls": values['count'], "total (s)": values['total'], "slowest (s)": values['max']}
+                 for stage, values in stages.items()],
+                hide_index=True, use_container_width=True,
+            )
+            with st.expander("All spans"):
+                st.dataframe(timings_content['spans'], use_container_width=True)
+        else:
+            st.warning("No timings recorded for this search")
+
 else:
     st.warning("No search details selected. Please select a record from the History page.")
\ No newline at end of file
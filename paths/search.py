@@ -1,8 +1,10 @@
 import streamlit as st
 import os
-import pandas as pd
 from datetime import datetime
 from modules.search_modules import *
+from modules.history_store import add_search
+from modules.jobs import submit_search_job
+from modules.ui_cache import load_env, load_theme_config, load_json, load_text
 from dotenv import load_dotenv
 import toml
 import time
@@ -10,8 +12,8 @@ import json
 
 import streamlit.components.v1 as components
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (only when the file changed)
+load_env()
 
 # Set default values for environment variables if not present
 if not os.getenv('SIMPLE_SEARCH_NUMBER'):
@@ -28,13 +30,13 @@ if not os.getenv('SEARCH_SUMMARY_INSTRUCTIONS'):
     os.environ['SEARCH_SUMMARY_INSTRUCTIONS'] = '''You are a skilled research assistant specializing in analyzing and summarizing information. Your task is to process content from multiple webpages scraped in response to a user query, then summarize and structure the information clearly and logically in 1000–4000 words based on the query's complexity and the depth of the content. Follow these steps to ensure high-quality output:** Understand the Query: Analyze the user's input to determine its intent, complexity, and specific focus areas. Synthesize Information: Combine relevant data from all sources to create a coherent narrative. Avoid repeating redundant details and ensure consistency across all information presented. Organize Structurally: Present the content in a well-structured format, including: Title: A concise and accurate title summarizing the content. Introduction: Provide a brief overview of the topic and what the user will learn. Main Sections: Divide the content into logically ordered sections with clear headings and subheadings. Each section should cover a distinct aspect of the topic. Details and Examples: Where relevant, include examples, statistics, or quotes to enrich the content. Conclusion: Summarize the key points and, if applicable, suggest next steps or resources for further exploration. Ensure Clarity: Write in clear, professional language appropriate for the target audience, avoiding technical jargon unless necessary. Cite Implicitly: Attribute key insights or data to their general source categories without directly quoting the webpages verbatim. Guidelines: Prioritize accuracy and relevance. Include only verifiable and pertinent information. Adjust the level of detail to suit the query's complexity. For simple topics, focus on clarity and conciseness. For complex ones, provide in-depth analysis and context. Eliminate bias or subjective opinions unless explicitly requested. Example Queries: 'Explain the impact of climate change on Arctic wildlife' or 'Summarize recent advancements in quantum computing.' Apply these instructions dynamically to address a wide range of topics'''
 if not os.getenv('MODE'):
     os.environ['MODE'] = 'Cloud'
+if not os.getenv('SEARCH_DEADLINE_SECONDS'):
+    os.environ['SEARCH_DEADLINE_SECONDS'] = '0'
+if not os.getenv('BACKGROUND_SEARCH'):
+    os.environ['BACKGROUND_SEARCH'] = 'false'
 
-# Load current theme
-config_path = os.path.join(os.path.dirname(__file__), '..', '.streamlit', 'config.toml')
-
-# Load existing configuration
-with open(config_path, 'r') as f:
-    config = toml.load(f)
+# Load current theme (parsed again only when config.toml changes)
+config = load_theme_config()
 
 # Set current theme values from config
 base = config.get('theme', {}).get('base', 'light')
@@ -49,22 +51,13 @@ simple_search_number=int(os.getenv("SIMPLE_SEARCH_NUMBER"))
 complex_search_number=int(os.getenv("COMPLEX_SEARCH_NUMBER"))
 simple_llm_model=os.getenv("SIMPLE_LLM_MODEL")
 complex_llm_model=os.getenv("COMPLEX_LLM_MODEL")
+search_deadline=float(os.getenv("SEARCH_DEADLINE_SECONDS"))
+background_default=os.getenv("BACKGROUND_SEARCH").lower() in ("1", "true", "yes")
 
-# Reading the existing search history for appending new queries to history
-search_history_path = os.path.join("search", "search_history.csv")
-if os.path.exists(search_history_path):
-    history = pd.read_csv(search_history_path)
-    current_index=history.shape[0]
-
-elif not os.path.exists(search_history_path):
-    if not os.path.exists("search"):
-        os.makedirs("search")
-    history=pd.DataFrame(columns=["datetime","query","search_path","summary_path"])
-    history.to_csv(search_history_path,index=False)
-    current_index=0
-
-search_query_path = os.path.join("search", f"search_{current_index}", "web_search.json")
-summary_path = os.path.join("search", f"search_{current_index}", "summary.md")
+# A new search gets its ID from the history database when it is submitted
+current_index=None
+search_query_path = ""
+summary_path = ""
 query=None
 
 # Start of the Streamlit UI
@@ -75,6 +68,8 @@ with st.form(key="search_form",clear_on_submit=True):
     submitted=st.form_submit_button("Search")
 
 pro_search=st.toggle("Advanced Search")
+background=st.toggle("Run in background", value=background_default,
+                     help="Queue the search and follow it on the Jobs page")
 
 if pro_search:
     num_searches=complex_search_number
@@ -83,23 +78,38 @@ else:
     num_searches=simple_search_number
     model=simple_llm_model
 
+# With a latency budget, let the planner pick the URL count and model tier
+plan=None
+if search_deadline > 0:
+    tiers=[{"name": "simple", "model": simple_llm_model, "max_urls": simple_search_number}]
+    if pro_search:
+        tiers.insert(0, {"name": "complex", "model": complex_llm_model, "max_urls": complex_search_number})
+    plan=plan_search(search_deadline, tiers)
+    num_searches=plan["num_urls"]
+    model=plan["model"]
 
 
 results, summary=st.tabs(["Search Results", "Summary"])
 with results:
-    if submitted and query:
+    if submitted and query and background:
+        record = add_search(query)
+        submit_search_job(query, record["id"], num_searches, model, plan=plan,
+                          deadline_seconds=search_deadline)
+        st.success(f"Queued: {query}")
+        st.page_link("paths/jobs.py", label="Follow it on the Jobs page", icon="⏳")
+    elif submitted and query:
         st.write(f"Query: {query}")
         start_time = time.time()
         
-        now = datetime.now()
-        formatted_datetime = now.strftime("%d-%m-%Y %H:%M:%S")
+        record = add_search(query)
+        current_index = record["id"]
+        search_query_path = record["search_path"]
+        summary_path = record["summary_path"]
         with st.spinner('Searching...'):
             urls = web_search(query, current_index, num_searches)
-        new_entry = [formatted_datetime, query, search_query_path, summary_path]
-        pd.DataFrame([new_entry], columns=["datetime", "query", "search_path", "summary_path"]).to_csv(search_history_path, mode="a", index=False, header=False)
 
     if os.path.exists(search_query_path):
-        search_content = json.load(open(search_query_path, encoding='utf-8'))
+        search_content = load_json(search_query_path)
         urls = search_content[:num_searches]
         try:
             for url in urls:
@@ -122,17 +132,18 @@ with results:
         
         
 with summary:
-    summary_file_path = os.path.join("search", f"search_{current_index}", "summary.md")
+    summary_file_path = summary_path
     
     if os.path.exists(search_query_path) and not os.path.exists(summary_path):
-        search_content = json.load(open(search_query_path, encoding='utf-8'))
+        search_content = load_json(search_query_path)
         urls = search_content[:num_searches]
         with st.spinner('Generating summary...'):
-            summary = smart_search(query, current_index, urls, model)
+            deadline_at = start_time + search_deadline if plan else None
+            summary = smart_search(query, current_index, urls, model, plan=plan, deadline_at=deadline_at)
             query=None
     
     if os.path.exists(summary_file_path):
-        summary_content = open(summary_file_path, 'r', encoding='utf-8').read()
+        summary_content = load_text(summary_file_path)
         end_time = time.time()
         elapsed_time = end_time - start_time
         st.divider()
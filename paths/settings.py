@@ -2,13 +2,13 @@ import streamlit as st
 import os
 from dotenv import load_dotenv, set_key
 from modules.modify_theme import modify_theme
+from modules.ui_cache import load_env, load_theme_config, list_ollama_models
 import toml
-import ollama
 
 st.title("Settings ⚙️")
 
-# Load current environment variables
-load_dotenv()
+# Load current environment variables (only when the .env file changed)
+load_env()
 
 def update_env_var(key, value):
     """Update a single environment variable in .env file"""
@@ -16,10 +16,8 @@ def update_env_var(key, value):
     set_key(env_path, key, value)
     os.environ[key] = value  # Update runtime environment
 
-# Load theme settings from config.toml
-config_path = os.path.join(os.path.dirname(__file__), '..', '.streamlit', 'config.toml')
-with open(config_path, 'r') as f:
-    config = toml.load(f)
+# Load theme settings from config.toml (parsed again only when it changes)
+config = load_theme_config()
 
 # Set current theme values from config
 base = config.get('theme', {}).get('base', 'light')
@@ -88,12 +86,19 @@ with search_settings:
         max_value=20,
         value=int(os.getenv("COMPLEX_SEARCH_NUMBER", 0))
     )
+    search_deadline = st.number_input(
+        "Latency Budget in Seconds (0 = no limit)",
+        min_value=0,
+        max_value=300,
+        value=int(float(os.getenv("SEARCH_DEADLINE_SECONDS", 0)))
+    )
     
     # Save Settings Button
     if st.button("Save Settings",key="search_settings"):
         # Update all environment variables
         update_env_var("SIMPLE_SEARCH_NUMBER", str(simple_search_num))
         update_env_var("COMPLEX_SEARCH_NUMBER", str(complex_search_num))
+        update_env_var("SEARCH_DEADLINE_SECONDS", str(search_deadline))
         
         st.success("Settings saved successfully! Please restart the application for changes to take effect.")
 
@@ -103,8 +108,7 @@ with model_settings:
     mode=st.selectbox("How to run LLMs?",["Local","Cloud"],index=0 if os.getenv("MODE") == "Local" else 1)
 
     if mode=="Local": 
-        available_local_models=ollama.list()
-        available_local_models=[model["model"] for model in available_local_models["models"]]
+        available_local_models=list_ollama_models()
         simple_model=st.selectbox(label="Simple Search Model (Local)",options=available_local_models,key="local_simple_model")
         complex_model=st.selectbox(label="Advanced Search Model (Local)",options=available_local_models,key="local_complex_model")
     
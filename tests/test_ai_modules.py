@@ -0,0 +1,77 @@
+import pytest
+
+from modules import ai_modules, artifact_store, page_cache
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "search_dir", str(tmp_path))
+    monkeypatch.setattr(artifact_store, "blobs_dir", str(tmp_path / "blobs"))
+    monkeypatch.setattr(artifact_store, "artifact_store_mode", "blobs")
+    monkeypatch.setattr(page_cache, "cache_dir", str(tmp_path / "page_cache"))
+    monkeypatch.setattr(page_cache, "pages_dir", str(tmp_path / "page_cache" / "pages"))
+    monkeypatch.setattr(page_cache, "index_path", str(tmp_path / "page_cache" / "index.sqlite3"))
+    return tmp_path
+
+
+def test_read_scraped_pages_prefers_the_search_copy(store_dir):
+    key_dir = store_dir / "search_1"
+    key_dir.mkdir()
+    artifact_store.store_page(str(key_dir), "https://a.example", "what this search scraped")
+    page_cache.put_cached_page("https://a.example", "re-scraped later by another search")
+    page_cache.put_cached_page("https://b.example", "only in the page cache")
+
+    pages = ai_modules.read_scraped_pages(["https://a.example", "https://b.example", "https://c.example"],
+                                          str(key_dir), dedupe=False)
+
+    assert pages == ["what this search scraped", "only in the page cache"]
+
+
+def test_split_into_chunks_keeps_paragraphs_and_splits_long_lines():
+    paragraphs = ["a" * 20, "b" * 20, "c" * 40]
+    content = "\n\n".join(paragraphs) + "\n\n" + "d" * 100
+
+    chunks = ai_modules.split_into_chunks(content, 16)
+
+    assert all(len(chunk) <= 64 for chunk in chunks)
+    assert chunks[:2] == ["a" * 20 + "\n\n" + "b" * 20, "c" * 40]
+    assert chunks[2:] == ["d" * 64, "d" * 36]
+    assert ai_modules.split_into_chunks("short page", 16) == ["short page"]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    calls = {"condense": [], "synthesize": []}
+
+    def condense_page(query, content, model, local=False):
+        calls["condense"].append(content)
+        return content[:40]
+
+    def synthesize_summary(query, notes, model, local=False):
+        calls["synthesize"].append(notes)
+        return "# Summary"
+
+    monkeypatch.setattr(ai_modules, "condense_page", condense_page)
+    monkeypatch.setattr(ai_modules, "synthesize_summary", synthesize_summary)
+    monkeypatch.setattr(ai_modules, "map_chunk_tokens", 25)
+    monkeypatch.setattr(ai_modules, "reduce_max_tokens", 25)
+    return calls
+
+
+def test_map_reduce_condenses_every_chunk_and_collapses_oversized_notes(fake_llm):
+    pages = ["\n\n".join(["x" * 90] * 3), "y" * 90]
+    stats = {}
+
+    assert ai_modules.map_reduce_summary("q", pages, "m", stats=stats) == "# Summary"
+
+    assert stats["map"]["pages"] == 2
+    assert stats["map"]["chunks"] == 4
+    assert stats["reduce"]["collapse_rounds"] == 1
+    assert len(fake_llm["condense"]) == 4 + 2
+    assert len(fake_llm["synthesize"]) == 1
+    assert sum(ai_modules.estimate_tokens(note) for note in fake_llm["synthesize"][0]) <= 25
+
+
+def test_map_reduce_without_content_returns_the_fallback(fake_llm):
+    assert ai_modules.map_reduce_summary("q", [], "m") == ai_modules.summary_error
+    assert fake_llm["condense"] == [] and fake_llm["synthesize"] == []
@@ -0,0 +1,149 @@
+import os
+import time
+
+import pytest
+
+from modules import artifact_store, database, page_cache, search_cache, search_index
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "search_dir", str(tmp_path))
+    monkeypatch.setattr(artifact_store, "blobs_dir", str(tmp_path / "blobs"))
+    monkeypatch.setattr(artifact_store, "artifact_store_mode", "blobs")
+    monkeypatch.setattr(page_cache, "cache_dir", str(tmp_path / "page_cache"))
+    monkeypatch.setattr(page_cache, "pages_dir", str(tmp_path / "page_cache" / "pages"))
+    monkeypatch.setattr(page_cache, "index_path", str(tmp_path / "page_cache" / "index.sqlite3"))
+    monkeypatch.setattr(search_index, "search_dir", str(tmp_path))
+    monkeypatch.setattr(search_index, "index_path", str(tmp_path / "search_index.sqlite3"))
+    monkeypatch.setattr(search_cache, "cache_dir", str(tmp_path / "search_cache"))
+    return tmp_path
+
+
+def make_search(root, search_id, pages, age_days=0):
+    key_dir = root / f"search_{search_id}"
+    key_dir.mkdir()
+    results_file = key_dir / "web_search.json"
+    results_file.write_text("{}", encoding="utf-8")
+    for url, text in pages.items():
+        artifact_store.store_page(str(key_dir), url, text)
+    if age_days:
+        created = time.time() - age_days * 86400
+        os.utime(results_file, (created, created))
+    return str(key_dir)
+
+
+def age_blobs(root, seconds):
+    past = time.time() - seconds
+    for shard in (root / "blobs").iterdir():
+        for path in shard.iterdir():
+            os.utime(path, (past, past))
+
+
+def blob_count(root):
+    return sum(len(list(shard.iterdir())) for shard in (root / "blobs").iterdir())
+
+
+def test_store_and_read_page_dedupes_identical_content(store_dir):
+    first = make_search(store_dir, 1, {"https://a.example": "same text"})
+    second = make_search(store_dir, 2, {"https://b.example": "same text"})
+    assert artifact_store.read_page(first, "https://a.example") == "same text"
+    assert artifact_store.read_page(second, "https://b.example") == "same text"
+    assert artifact_store.read_page(first, "https://missing.example") is None
+    assert blob_count(store_dir) == 1
+    assert dict(artifact_store.iter_pages(first)) == {"https://a.example": "same text"}
+
+
+@pytest.mark.parametrize("codec", ["gz", "zst"])
+def test_blob_round_trip_per_codec(monkeypatch, codec):
+    if codec == "zst" and artifact_store.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    monkeypatch.setattr(artifact_store, "blob_codec", codec)
+    data = "ünïcode page ".encode("utf-8") * 100
+    digest, stored_codec = artifact_store.put_blob(data)
+    assert stored_codec == codec
+    assert artifact_store.get_blob(digest, codec) == data
+
+
+def test_gc_expires_old_searches_and_deletes_unreferenced_blobs(store_dir):
+    old = make_search(store_dir, 1, {"https://old.example": "old page"}, age_days=40)
+    new = make_search(store_dir, 2, {"https://new.example": "new page"})
+    age_blobs(store_dir, 2 * artifact_store.gc_grace_seconds)
+
+    stats = artifact_store.collect_garbage(retention_days=30, max_mb=0)
+
+    assert stats["expired_searches"] == 1
+    assert stats["expired_pages"] == 1
+    assert stats["deleted_blobs"] == 1
+    assert artifact_store.read_page(old, "https://old.example") is None
+    assert os.path.exists(os.path.join(old, "web_search.json"))
+    assert artifact_store.read_page(new, "https://new.example") == "new page"
+
+
+def test_gc_size_budget_expires_oldest_first(store_dir):
+    oldest = make_search(store_dir, 1, {"https://a.example": os.urandom(700_000).hex()}, age_days=3)
+    newest = make_search(store_dir, 2, {"https://b.example": os.urandom(700_000).hex()}, age_days=1)
+    age_blobs(store_dir, 2 * artifact_store.gc_grace_seconds)
+
+    stats = artifact_store.collect_garbage(retention_days=0, max_mb=1)
+
+    assert stats["expired_searches"] == 1
+    assert artifact_store.read_page(oldest, "https://a.example") is None
+    assert artifact_store.read_page(newest, "https://b.example") is not None
+
+
+def test_gc_keeps_young_unreferenced_blobs(store_dir):
+    artifact_store.put_blob(b"written by a search that has not saved its manifest yet")
+    stats = artifact_store.collect_garbage(retention_days=0, max_mb=0)
+    assert stats["deleted_blobs"] == 0
+    assert blob_count(store_dir) == 1
+
+
+def test_gc_keeps_blobs_referenced_by_the_page_cache(store_dir):
+    page_cache.put_cached_page("https://cached.example", "cached page")
+    age_blobs(store_dir, 2 * artifact_store.gc_grace_seconds)
+
+    assert artifact_store.collect_garbage(retention_days=0, max_mb=0)["deleted_blobs"] == 0
+    assert page_cache.get_cached_page("https://cached.example/") == "cached page"
+    assert artifact_store.artifact_stats()["page_cache_blobs"] == 1
+
+
+def test_page_cache_migrates_markdown_files_into_blobs(store_dir):
+    page_cache.put_cached_page("https://legacy.example", "placeholder")
+    key = page_cache.hashlib.sha256(page_cache.normalize_url("https://legacy.example").encode()).hexdigest()
+    with page_cache._index() as connection:
+        connection.execute("UPDATE pages SET blob = NULL, codec = NULL WHERE key = ?", (key,))
+    os.makedirs(page_cache.pages_dir)
+    with open(os.path.join(page_cache.pages_dir, f"{key}.md"), "w", encoding="utf-8") as f:
+        f.write("legacy markdown")
+    # As if the cache were opened by a new process
+    database._initialized_paths.discard(page_cache.index_path)
+
+    assert page_cache.get_cached_page("https://legacy.example") == "legacy markdown"
+    assert not os.path.exists(page_cache.pages_dir)
+
+
+def test_migrate_moves_legacy_page_directories(store_dir, monkeypatch):
+    monkeypatch.setattr(artifact_store, "artifact_store_mode", "files")
+    key_dir = make_search(store_dir, 1, {"https://legacy.example/a": "# Source URL: https://legacy.example/a\n\nbody"})
+    assert artifact_store.read_manifest(key_dir) == {"pages": {}}
+
+    assert artifact_store.migrate_search_dirs() == 1
+    assert artifact_store.read_page(key_dir, "https://legacy.example/a").endswith("body")
+    assert list(artifact_store._legacy_pages(key_dir)) == []
+
+
+def test_page_cache_eviction_deletes_unshared_blobs(store_dir, monkeypatch):
+    monkeypatch.setattr(artifact_store, "release_grace_seconds", 0)
+    monkeypatch.setattr(page_cache, "page_cache_max_mb", 1)
+    key_dir = make_search(store_dir, 1, {"https://shared.example": "a" * 600_000})
+    page_cache.put_cached_page("https://shared.example", "a" * 600_000)
+    page_cache.put_cached_page("https://only-cached.example", "b" * 600_000)
+    assert blob_count(store_dir) == 2
+
+    page_cache.put_cached_page("https://newest.example", "c" * 600_000)
+
+    assert page_cache.page_cache_stats()["pages"] == 1
+    assert artifact_store.read_page(key_dir, "https://shared.example") == "a" * 600_000
+    assert blob_count(store_dir) == 2
+    assert page_cache.get_cached_page("https://newest.example") == "c" * 600_000
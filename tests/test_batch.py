@@ -0,0 +1,32 @@
+from modules import batch
+
+
+def test_run_batch_plans_with_default_tiers(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(batch, "add_search", lambda query: {"id": 1, "summary_path": str(tmp_path / "summary.md")})
+    monkeypatch.setattr(batch, "web_search", lambda query, key, num: [{"url": "https://a.example"}] * num)
+    monkeypatch.setattr(batch, "get_scrape_tier_stats", lambda: {})
+
+    def smart_search(query, key, urls, model, plan=None, deadline_at=None):
+        calls.append((len(urls), model, plan))
+        return "# Summary"
+
+    monkeypatch.setattr(batch, "smart_search", smart_search)
+    report = batch.run_batch(["python tips"], 5, "unused", concurrency=1, deadline_seconds=60)
+
+    assert report["results"][0]["ok"], report["results"][0]["error"]
+    num_urls, model, plan = calls[0]
+    assert plan is not None and plan["tier"] == "simple"
+    assert model == batch.simple_llm_model
+    assert 1 <= num_urls <= batch.simple_search_number
+
+
+def test_default_tiers_puts_complex_first():
+    assert [tier["name"] for tier in batch.default_tiers()] == ["simple"]
+    assert [tier["name"] for tier in batch.default_tiers(advanced=True)] == ["complex", "simple"]
+
+
+def test_percentile_nearest_rank():
+    assert batch.percentile([], 0.5) == 0.0
+    assert batch.percentile([3, 1, 2, 4], 0.5) == 2
+    assert batch.percentile([3, 1, 2, 4], 0.95) == 4
@@ -0,0 +1,25 @@
+from modules import database
+
+
+def test_schema_and_after_create_run_once_per_path(tmp_path):
+    calls = []
+    path = str(tmp_path / "nested" / "test.sqlite3")
+
+    def create_schema(connection):
+        calls.append("schema")
+        connection.execute("CREATE TABLE IF NOT EXISTS items (name TEXT)")
+
+    def after_create():
+        calls.append("after")
+        # May use the database it follows without recursing into the setup
+        with database.transaction(path, create_schema, after_create) as connection:
+            connection.execute("INSERT INTO items VALUES ('imported')")
+
+    for _ in range(3):
+        with database.transaction(path, create_schema, after_create) as connection:
+            rows = connection.execute("SELECT name FROM items").fetchall()
+
+    assert calls == ["schema", "after"]
+    assert rows == [("imported",)]
+    with database.transaction(path, create_schema) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
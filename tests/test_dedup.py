@@ -0,0 +1,53 @@
+from modules import dedup
+
+paragraph = ("Rust guarantees memory safety without a garbage collector by checking "
+             "ownership and borrowing rules at compile time for every program")
+
+
+def page(url, *lines):
+    return "\n".join((f"# Source URL: {url}", "# Scraped on: 01-01-2025", "") + lines)
+
+
+def test_boilerplate_is_removed_only_within_a_domain():
+    pages = [
+        page("https://a.example/one", "Home | Docs | Blog", "First article about tokio runtimes and schedulers"),
+        page("https://www.a.example/two", "Home | Docs | Blog", "Second article about async io and executors"),
+        page("https://b.example/one", "Home | Docs | Blog", "Unrelated page about gardening tools"),
+    ]
+    cleaned, stats = dedup.dedupe_pages(pages)
+    assert "Home | Docs | Blog" not in cleaned[0]
+    assert "Home | Docs | Blog" not in cleaned[1]
+    assert "Home | Docs | Blog" in cleaned[2]
+    assert stats["boilerplate_lines"] == 2
+    assert all(text.startswith("# Source URL:") for text in cleaned)
+
+
+def test_near_duplicate_paragraphs_are_kept_once():
+    pages = [
+        page("https://a.example", paragraph),
+        page("https://b.example", paragraph.replace("every program", "every program."), "Something else entirely here"),
+    ]
+    cleaned, stats = dedup.dedupe_pages(pages)
+    assert paragraph in cleaned[0]
+    assert "ownership" not in cleaned[1]
+    assert "Something else entirely here" in cleaned[1]
+    assert stats["duplicate_paragraphs"] == 1
+    assert stats["chars_after"] < stats["chars_before"]
+
+
+def test_distinct_paragraphs_are_kept():
+    other = ("Go uses a concurrent garbage collector and goroutines scheduled by the runtime "
+             "which makes network services simple to write and deploy")
+    cleaned, stats = dedup.dedupe_pages([page("https://a.example", paragraph), page("https://b.example", other)])
+    assert paragraph in cleaned[0] and other in cleaned[1]
+    assert stats["duplicate_paragraphs"] == 0
+
+
+def test_dedupe_next_page_matches_across_calls():
+    state = dedup.new_dedupe_state()
+    first = dedup.dedupe_next_page(page("https://a.example/1", "Subscribe to our newsletter", paragraph), state)
+    second = dedup.dedupe_next_page(page("https://a.example/2", "Subscribe to our newsletter", paragraph), state)
+    assert "Subscribe to our newsletter" in first and paragraph in first
+    assert "Subscribe" not in second and "ownership" not in second
+    assert state["stats"]["boilerplate_lines"] == 1
+    assert state["stats"]["duplicate_paragraphs"] == 1
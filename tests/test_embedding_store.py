@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+
+from modules import embedding_store
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_store, "store_dir", str(tmp_path))
+    return tmp_path
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+def test_only_missing_texts_are_embedded():
+    embedder = FakeEmbedder()
+    store = embedding_store.EmbeddingStore("m")
+    first = store.embed(["a", "bb", "a"], embedder)
+    second = store.embed(["bb", "ccc"], embedder)
+    assert embedder.calls == [["a", "bb"], ["ccc"]]
+    assert first.shape == (3, 3) and first.dtype == np.float32
+    np.testing.assert_array_equal(first[1], second[0])
+    assert store.stats()['stored'] == 3
+
+
+def test_other_instances_see_appended_rows():
+    embedder = FakeEmbedder()
+    writer = embedding_store.EmbeddingStore("m")
+    reader = embedding_store.EmbeddingStore("m")
+    writer.embed(["one"], embedder)
+    writer.embed(["two"], embedder)
+    reader.embed(["one", "two"], embedder)
+    assert embedder.calls == [["one"], ["two"]]
+
+
+def test_index_is_appended_not_rewritten(store_dir):
+    store = embedding_store.EmbeddingStore("m")
+    store.embed(["one"], FakeEmbedder())
+    index_path = store_dir / "m.index.jsonl"
+    before = index_path.read_bytes()
+    store.embed(["two"], FakeEmbedder())
+    assert index_path.read_bytes().startswith(before)
+
+
+def test_store_starts_over_at_max_rows():
+    embedder = FakeEmbedder()
+    store = embedding_store.EmbeddingStore("m", max_rows=3)
+    store.embed(["a", "b", "c"], embedder)
+    vectors = store.embed(["a", "d"], embedder)
+    stats = store.stats()
+    assert stats['rotations'] == 1
+    assert stats['stored'] == 1
+    np.testing.assert_array_equal(vectors[0], embedder(["a"])[0])
+
+
+def test_legacy_json_index_is_migrated(store_dir):
+    vectors = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.float32)
+    (store_dir / "m.f32").write_bytes(vectors.tobytes())
+    rows = {embedding_store.text_key("x"): 0, embedding_store.text_key("y"): 1}
+    (store_dir / "m.index.json").write_text(json.dumps({'model': "m", 'dim': 3, 'rows': rows}))
+    embedder = FakeEmbedder()
+    store = embedding_store.EmbeddingStore("m")
+    np.testing.assert_array_equal(store.embed(["y"], embedder)[0], vectors[1])
+    store.embed(["z"], embedder)
+    reopened = embedding_store.EmbeddingStore("m")
+    np.testing.assert_array_equal(reopened.embed(["x", "y"], embedder), vectors)
+    assert embedder.calls == [["z"]]
+    assert not (store_dir / "m.index.json").exists()
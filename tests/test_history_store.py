@@ -0,0 +1,73 @@
+import csv
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from modules import history_store
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, "search_dir", str(tmp_path))
+    monkeypatch.setattr(history_store, "history_db_path", str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(history_store, "legacy_csv_path", str(tmp_path / "search_history.csv"))
+    return tmp_path
+
+
+def test_add_and_get_search():
+    record = history_store.add_search("python tips", when=datetime(2025, 3, 1, 9, 30))
+    assert record["datetime"] == "01-03-2025 09:30:00"
+    assert (record["search_path"], record["summary_path"]) == history_store.search_paths(record["id"])
+    assert history_store.get_search(record["id"]) == record
+    assert history_store.get_search(record["id"] + 1) is None
+    assert history_store.count_searches() == 1
+
+
+def test_legacy_csv_is_imported_once_keeping_ids(history_dir):
+    csv_path = history_dir / "search_history.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["datetime", "query", "search_path", "summary_path"])
+        writer.writeheader()
+        writer.writerow({"datetime": "01-01-2025 10:00:00", "query": "first", "search_path": "", "summary_path": ""})
+        writer.writerow({"datetime": "02-01-2025 10:00:00", "query": "second", "search_path": "", "summary_path": ""})
+
+    assert history_store.count_searches() == 2
+    assert not csv_path.exists()
+    assert (history_dir / "search_history.csv.imported").exists()
+    assert history_store.get_search(1)["query"] == "second"
+    assert history_store.get_search(1)["datetime"] == "02-01-2025 10:00:00"
+    assert history_store.add_search("third")["id"] == 2
+
+
+def test_keyset_pages_cover_every_record_once():
+    start = datetime(2025, 1, 1)
+    for index in range(7):
+        # Two searches share each timestamp so the id tiebreak is exercised
+        history_store.add_search(f"query {index}", when=start + timedelta(hours=index // 2))
+
+    seen = []
+    records, cursor = history_store.page_searches(3)
+    seen.extend(records)
+    while cursor is not None:
+        records, cursor = history_store.page_searches(3, cursor)
+        seen.extend(records)
+
+    assert [record["query"] for record in seen] == [f"query {index}" for index in reversed(range(7))]
+    assert [record["id"] for record in seen] == [record["id"] for record in history_store.list_searches()]
+
+
+def test_page_filters_by_date_range_and_text():
+    history_store.add_search("Python packaging", when=datetime(2025, 1, 1, 12))
+    history_store.add_search("python typing", when=datetime(2025, 1, 2, 23, 59))
+    history_store.add_search("rust async", when=datetime(2025, 1, 2, 8))
+    history_store.add_search("100%_literal", when=datetime(2025, 1, 3, 8))
+
+    records, cursor = history_store.page_searches(10, text="PYTHON")
+    assert [record["query"] for record in records] == ["python typing", "Python packaging"]
+    assert cursor is None
+
+    records, _ = history_store.page_searches(10, date_from=date(2025, 1, 2), date_to=date(2025, 1, 2))
+    assert [record["query"] for record in records] == ["python typing", "rust async"]
+
+    records, _ = history_store.page_searches(10, text="%_")
+    assert [record["query"] for record in records] == ["100%_literal"]
@@ -0,0 +1,93 @@
+import time
+import email.utils
+
+import pytest
+
+from modules import http_client
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls += 1
+        response = self.responses.pop(0) if self.responses else FakeResponse(503)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(http_client, "_sessions", {})
+    monkeypatch.setattr(http_client, "_services", {})
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+
+
+def install(monkeypatch, name, responses):
+    session = FakeSession(responses)
+    monkeypatch.setattr(http_client, "get_session", lambda service: session)
+    http_client._service(name)
+    return session
+
+
+def test_retry_delay_is_jittered_and_capped():
+    for attempt in range(10):
+        delay = http_client.retry_delay(attempt)
+        assert 0 <= delay <= min(http_client.backoff_cap, http_client.backoff_base * 2 ** attempt)
+
+
+def test_retry_delay_honours_retry_after_seconds_and_dates():
+    assert http_client.retry_delay(0, FakeResponse(429, {'Retry-After': '2'})) == 2.0
+    assert http_client.retry_delay(0, FakeResponse(429, {'Retry-After': '600'})) == http_client.backoff_cap
+    future = email.utils.formatdate(time.time() + 3, usegmt=True)
+    assert 1 <= http_client.retry_delay(0, FakeResponse(503, {'Retry-After': future})) <= 3
+
+
+def test_malformed_retry_after_falls_back_to_backoff():
+    delay = http_client.retry_delay(1, FakeResponse(503, {'Retry-After': 'garbage'}))
+    assert 0 <= delay <= http_client.backoff_base * 2
+
+
+def test_retries_transient_status_then_succeeds(monkeypatch):
+    session = install(monkeypatch, "svc", [FakeResponse(503), FakeResponse(200)])
+    response = http_client.http_request("svc", "GET", "http://example.com", retries=2)
+    assert response.status_code == 200
+    assert session.calls == 2
+    assert http_client._services["svc"]["retries"] == 1
+
+
+def test_non_idempotent_methods_are_not_retried(monkeypatch):
+    session = install(monkeypatch, "svc", [FakeResponse(503), FakeResponse(200)])
+    response = http_client.http_request("svc", "POST", "http://example.com", retries=2)
+    assert response.status_code == 503
+    assert session.calls == 1
+
+
+def test_retry_budget_limits_retries_during_an_outage(monkeypatch):
+    install(monkeypatch, "svc", [])
+    for _ in range(50):
+        http_client.http_request("svc", "GET", "http://example.com", retries=3)
+    service = http_client._services["svc"]
+    assert service["budget_exhausted"] > 0
+    # Starting tokens plus what 50 requests earned
+    assert service["retries"] <= http_client.min_retry_tokens + 50 * http_client.retry_budget_ratio + 1
+
+
+def test_banked_retry_tokens_are_capped_after_a_long_healthy_run(monkeypatch):
+    install(monkeypatch, "svc", [FakeResponse(200) for _ in range(5000)])
+    for _ in range(5000):
+        http_client.http_request("svc", "GET", "http://example.com")
+    assert http_client._services["svc"]["retry_tokens"] <= http_client.max_retry_tokens
@@ -0,0 +1,98 @@
+import pytest
+
+from modules import ai_modules, jobs, search_modules
+
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "search_dir", str(tmp_path))
+    monkeypatch.setattr(jobs, "jobs_db_path", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(search_modules, "web_search", lambda query, key, num: [{"url": "https://a.example"}])
+    return tmp_path
+
+
+def queue_job(job_id="job1"):
+    with jobs._jobs_db() as connection:
+        connection.execute(
+            "INSERT INTO jobs (id, search_id, query, params, status, stage, progress, message, "
+            "cancel_requested, pid, created, updated) VALUES (?, 1, 'q', ?, 'queued', 'queued', 0, '', 0, NULL, 0, 0)",
+            (job_id, '{"num_searches": 1, "model": "m"}'),
+        )
+    return job_id
+
+
+@pytest.mark.parametrize("summary, status", [
+    ("# Summary", "done"),
+    (ai_modules.summary_error, "failed"),
+    (None, "failed"),
+])
+def test_job_status_follows_summary(monkeypatch, summary, status):
+    monkeypatch.setattr(search_modules, "smart_search", lambda *args, **kwargs: summary)
+    job_id = queue_job()
+    assert jobs.run_search_job(job_id) == status
+    job = jobs.get_job(job_id)
+    assert job["status"] == status
+    assert bool(job["message"]) == (status == "failed")
+
+
+def test_cancelled_job_does_not_run(monkeypatch):
+    monkeypatch.setattr(search_modules, "smart_search", lambda *args, **kwargs: pytest.fail("ran"))
+    job_id = queue_job()
+    assert jobs.cancel_job(job_id)
+    assert jobs.run_search_job(job_id) == "cancelled"
+
+
+class FakePool:
+    def __init__(self, broken=False, error=None):
+        self.broken = broken
+        self.error = error
+        self.submitted = []
+
+    def submit(self, function, *args):
+        if self.broken:
+            raise jobs.BrokenProcessPool("worker died")
+        if self.error is not None:
+            raise self.error
+        self.submitted.append(args)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_broken_pool_is_replaced_and_the_job_resubmitted(monkeypatch):
+    broken = FakePool(broken=True)
+    replacement = FakePool()
+    monkeypatch.setattr(jobs, "_executor", broken)
+    monkeypatch.setattr(jobs, "ProcessPoolExecutor", lambda **kwargs: replacement)
+
+    job = jobs.submit_search_job("q", 1, 1, "m")
+
+    assert jobs._executor is replacement
+    assert job["status"] == "queued"
+    assert (job["id"],) in replacement.submitted
+
+
+def test_job_that_cannot_be_submitted_is_marked_failed(monkeypatch):
+    monkeypatch.setattr(jobs, "_executor", FakePool(error=RuntimeError("cannot schedule new futures")))
+    job = jobs.submit_search_job("q", 1, 1, "m")
+    assert job["status"] == "failed"
+    assert "cannot schedule" in job["message"]
+
+
+def test_job_submitted_twice_runs_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(search_modules, "smart_search", lambda *args, **kwargs: calls.append(1) or "# Summary")
+    job_id = queue_job()
+    assert jobs.run_search_job(job_id) == "done"
+    assert jobs.run_search_job(job_id) == "done"
+    assert len(calls) == 1
+
+
+def test_cancel_after_the_summary_keeps_it(monkeypatch):
+    def smart_search(*args, **kwargs):
+        jobs.cancel_job("job1")
+        return "# Summary"
+
+    monkeypatch.setattr(search_modules, "smart_search", smart_search)
+    assert jobs.run_search_job(queue_job()) == "done"
+    assert jobs.get_job("job1")["message"]
@@ -0,0 +1,49 @@
+import numpy as np
+
+from modules import ai_modules, passage_selection
+
+
+def embed(texts):
+    return np.array([[1.0, 0.0] if "rust" in text else [0.0, 1.0] for text in texts])
+
+
+def page(source, sections):
+    body = "\n".join(f"## {title}\n{text}" for title, text in sections)
+    return f"# Source URL: {source}\n\n{body}"
+
+
+pages = [
+    page("https://a.example", [("intro", "cooking pasta"), ("one", "rust ownership"), ("two", "rust lifetimes"),
+                               ("three", "rust traits")]),
+    page("https://b.example", [("guide", "rust async"), ("misc", "gardening tips")]),
+]
+
+
+def test_per_source_quota_keeps_other_pages_in_original_order():
+    stats = {}
+    selected = passage_selection.select_passages("rust", pages, embed, token_budget=1000, per_source=2, stats=stats)
+
+    assert len(selected) == 2
+    assert selected[0].startswith("# Source URL: https://a.example")
+    assert selected[1].startswith("# Source URL: https://b.example")
+    assert "rust async" in selected[1]
+    first = selected[0]
+    assert "cooking pasta" not in first
+    kept = [text for text in ("rust ownership", "rust lifetimes", "rust traits") if text in first]
+    assert len(kept) == 2
+    assert first.index(kept[0]) < first.index(kept[1])
+    assert stats["passages"] == 6
+    assert stats["selected"] == 4
+
+
+def test_token_budget_bounds_the_selection():
+    passage = "## one\nrust ownership"
+    budget = 2 * ai_modules.estimate_tokens(passage)
+    stats = {}
+
+    selected = passage_selection.select_passages("rust", pages, embed, token_budget=budget, per_source=6, stats=stats)
+
+    assert stats["selected"] == 2
+    assert stats["tokens_after"] <= budget
+    assert stats["tokens_before"] > budget
+    assert all("gardening" not in text and "pasta" not in text for text in selected)
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from modules import planner
+
+
+@pytest.fixture(autouse=True)
+def latency_file(tmp_path, monkeypatch):
+    path = tmp_path / "stage_latencies.json"
+    monkeypatch.setattr(planner, "latency_path", str(path))
+    monkeypatch.setattr(planner, "_samples", None)
+    return path
+
+
+tiers = [
+    {'name': 'complex', 'model': 'big', 'max_urls': 10},
+    {'name': 'simple', 'model': 'small', 'max_urls': 5},
+]
+
+
+def test_defaults_without_measurements():
+    assert planner.recent_latency("web_search") == planner.default_latencies["web_search"]
+    assert planner.recent_latency("summarize_page:small") == planner.default_latencies["summarize_page"]
+    assert planner.recent_latency("unknown_stage") == 1.0
+
+
+def test_model_stage_falls_back_to_generic_stage():
+    planner.record_latency("summarize_page", 2.0)
+    assert planner.recent_latency("summarize_page:small") == 2.0
+    planner.record_latency("summarize_page:small", 4.0)
+    assert planner.recent_latency("summarize_page:small") == 4.0
+
+
+def test_rolling_window_is_bounded():
+    for index in range(planner.max_samples + 10):
+        planner.record_latency("rerank", index + 1)
+    assert len(planner._samples["rerank"]) == planner.max_samples
+    assert min(planner._samples["rerank"]) == 11
+
+
+def test_zero_latency_samples_are_ignored():
+    planner.record_latency("summarize_page:small", 0.0001)
+    planner.record_latency("summarize_page:small", 0)
+    assert planner.recent_latency("summarize_page:small") == planner.default_latencies["summarize_page"]
+
+
+def test_zero_samples_on_disk_do_not_crash_the_planner(latency_file):
+    latency_file.write_text(json.dumps({"summarize_page:small": [0.0, 0.0], "summarize_page:big": [0.0]}))
+    plan = planner.plan_search(20, tiers)
+    assert plan['tier'] == 'complex'
+    assert 1 <= plan['num_urls'] <= 10
+
+
+def test_plan_prefers_first_tier_that_fits():
+    planner.record_latency("summarize_page:big", 100)
+    planner.record_latency("summarize_page:small", 1)
+    plan = planner.plan_search(20, tiers)
+    assert plan['tier'] == 'simple'
+    assert plan['model'] == 'small'
+    assert plan['num_urls'] == 5
+    assert planner.min_page_timeout <= plan['page_timeout'] <= planner.max_page_timeout
+
+
+def test_plan_falls_back_to_one_url_of_last_tier():
+    planner.record_latency("summarize_page:big", 100)
+    planner.record_latency("summarize_page:small", 100)
+    plan = planner.plan_search(5, tiers)
+    assert plan['tier'] == 'simple'
+    assert plan['num_urls'] == 1
+
+
+def test_save_and_reload(latency_file):
+    planner.record_latency("web_search", 0.8)
+    planner.save_latencies()
+    planner._samples = None
+    assert json.loads(latency_file.read_text())["web_search"] == [0.8]
+    assert planner.recent_latency("web_search") == 0.8
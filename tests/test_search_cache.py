@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from modules import search_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_cache, "cache_dir", str(tmp_path))
+    return tmp_path
+
+
+def write_entry(root, name, age_hours):
+    entry = {"created": time.time() - age_hours * 3600, "query": name, "params": {}, "response": {"q": name}}
+    (root / f"{name}.json").write_text(json.dumps(entry), encoding="utf-8")
+
+
+def test_expired_entry_is_deleted_when_read(cache_dir):
+    key = search_cache.search_cache_key("old query", {})
+    write_entry(cache_dir, key, search_cache.search_cache_ttl_hours + 1)
+    assert search_cache._read(key) is None
+    assert not (cache_dir / f"{key}.json").exists()
+
+
+def test_prune_removes_expired_unreadable_and_stale_temp_files(cache_dir):
+    write_entry(cache_dir, "fresh", 0)
+    write_entry(cache_dir, "expired", search_cache.search_cache_ttl_hours + 1)
+    (cache_dir / "broken.json").write_text("{", encoding="utf-8")
+    stale = cache_dir / "x.json.1-2.tmp"
+    stale.write_text("", encoding="utf-8")
+    os.utime(stale, (time.time() - 7200, time.time() - 7200))
+    (cache_dir / "y.json.1-2.tmp").write_text("", encoding="utf-8")
+
+    assert search_cache.prune_search_cache() == 3
+    assert sorted(os.listdir(cache_dir)) == ["fresh.json", "y.json.1-2.tmp"]
+
+
+def test_concurrent_identical_queries_make_one_upstream_call():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.3)
+        return {"results": ["a"]}, False
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(search_cache.cached_search("same", {}, fetch)))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"results": ["a"]}, {"results": ["a"]}]
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from modules import artifact_store, search_index
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "search_dir", str(tmp_path))
+    monkeypatch.setattr(search_index, "index_path", str(tmp_path / "search_index.sqlite3"))
+    monkeypatch.setattr(artifact_store, "search_dir", str(tmp_path))
+    monkeypatch.setattr(artifact_store, "blobs_dir", str(tmp_path / "blobs"))
+    monkeypatch.setattr(artifact_store, "artifact_store_mode", "blobs")
+    return tmp_path
+
+
+def make_search(root, search_id, summary, pages):
+    key_dir = root / f"search_{search_id}"
+    key_dir.mkdir()
+    (key_dir / "summary.md").write_text(summary, encoding="utf-8")
+    for url, text in pages.items():
+        artifact_store.store_page(str(key_dir), url, f"# Source URL: {url}\n\n{text}")
+    return str(key_dir)
+
+
+def owners(root):
+    connection = sqlite3.connect(str(root / "search_index.sqlite3"))
+    try:
+        return connection.execute("SELECT search_id, kind FROM document_owners ORDER BY doc_id").fetchall()
+    finally:
+        connection.close()
+
+
+def test_index_and_search_summaries_and_pages(index_dir):
+    key_dir = make_search(index_dir, 1, "Rust async runtimes compared", {
+        "https://a.example": "Tokio is the most popular async runtime",
+    })
+    assert search_index.index_search(1, "rust async", key_dir) == 2
+    hits = search_index.search_documents("tokio")
+    assert [(hit['search_id'], hit['kind'], hit['url']) for hit in hits] == [(1, "page", "https://a.example")]
+    assert "**Tokio**" in hits[0]['snippet']
+    assert [hit['kind'] for hit in search_index.search_documents("runtime", kind="summary")] == ["summary"]
+
+
+def test_last_word_matches_as_prefix_and_punctuation_is_ignored(index_dir):
+    key_dir = make_search(index_dir, 1, "Python packaging guide", {})
+    search_index.index_search(1, "python", key_dir)
+    assert len(search_index.search_documents("pack")) == 1
+    assert len(search_index.search_documents('"python" (packag*')) == 1
+    assert search_index.search_documents("!!!") == []
+
+
+def test_reindexing_replaces_documents(index_dir):
+    key_dir = make_search(index_dir, 1, "first summary about llamas", {"https://a.example": "llamas page"})
+    other_dir = make_search(index_dir, 2, "unrelated llamas summary", {})
+    search_index.index_search(1, "q", key_dir)
+    search_index.index_search(2, "q", other_dir)
+    search_index.index_search(1, "q", key_dir)
+    assert len(search_index.search_documents("llamas")) == 3
+    assert sorted(owners(index_dir)) == [("1", "page"), ("1", "summary"), ("2", "summary")]
+
+
+def test_remove_search_pages_keeps_summary(index_dir):
+    key_dir = make_search(index_dir, 1, "summary of otters", {"https://a.example": "otters page"})
+    search_index.index_search(1, "q", key_dir)
+    search_index.remove_search_pages(1)
+    assert [hit['kind'] for hit in search_index.search_documents("otters")] == ["summary"]
+    assert owners(index_dir) == [("1", "summary")]
+
+
+def test_existing_index_is_backfilled(index_dir):
+    connection = sqlite3.connect(str(index_dir / "search_index.sqlite3"))
+    with connection:
+        connection.execute("CREATE VIRTUAL TABLE documents USING fts5(search_id UNINDEXED, kind UNINDEXED, "
+                           "url UNINDEXED, query, content, tokenize='porter unicode61')")
+        connection.execute("INSERT INTO documents VALUES ('7', 'summary', '', 'q', 'old badgers summary')")
+    connection.close()
+    key_dir = make_search(index_dir, 7, "new badgers summary", {})
+    search_index.index_search(7, "q", key_dir)
+    hits = search_index.search_documents("badgers")
+    assert len(hits) == 1 and "new" in hits[0]['snippet']
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from modules import search_modules
+
+urls = [f"https://site{index}.example" for index in range(4)]
+
+
+class FakeDriverPool:
+    max_size = 2
+
+    @contextmanager
+    def checkout(self):
+        yield object()
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def stubbed_scrapers(monkeypatch):
+    monkeypatch.setattr(search_modules, "get_driver_pool", lambda *args: FakeDriverPool())
+    monkeypatch.setattr(search_modules, "restore_cached_page", lambda url, key_dir: False)
+    monkeypatch.setattr(search_modules, "save_static_page", lambda url, html, key_dir: True)
+    monkeypatch.setattr(search_modules, "record_latency", lambda *args: None)
+
+
+def use_fetcher(monkeypatch, fetch):
+    monkeypatch.setattr(search_modules, "fetch_pages",
+                        lambda pending, on_page, timeout=None, cancel_event=None, on_miss=None:
+                        fetch(pending, on_page, cancel_event, on_miss))
+
+
+def quorum_metadata(key_dir):
+    with open(key_dir / "run_metadata.json", encoding="utf-8") as f:
+        metadata = json.load(f)
+    return metadata["scrape_tiers"], metadata["quorum"]
+
+
+def test_quorum_returns_the_first_pages(monkeypatch, tmp_path):
+    def fetch(pending, on_page, cancel_event, on_miss):
+        for url in pending:
+            if cancel_event.is_set():
+                return
+            on_page(url, "<html></html>")
+
+    use_fetcher(monkeypatch, fetch)
+    served = search_modules.orchestrate_scraping(urls, 1, str(tmp_path), quorum=2, soft_deadline=0)
+
+    assert served == urls[:2]
+    tiers, quorum = quorum_metadata(tmp_path)
+    assert [tiers[url] for url in urls] == ["http", "http", "dropped", "dropped"]
+    assert quorum["needed"] == 2 and quorum["stopped_by"] == "quorum"
+    assert quorum["dropped"] == urls[2:]
+
+
+def test_soft_deadline_drops_slow_pages(monkeypatch, tmp_path):
+    def fetch(pending, on_page, cancel_event, on_miss):
+        on_page(pending[0], "<html></html>")
+        cancel_event.wait(5)
+
+    use_fetcher(monkeypatch, fetch)
+    start = time.time()
+    served = search_modules.orchestrate_scraping(urls, 1, str(tmp_path), quorum=0, soft_deadline=0.2)
+
+    assert time.time() - start < 2
+    assert served == urls[:1]
+    _, quorum = quorum_metadata(tmp_path)
+    assert quorum["stopped_by"] == "deadline"
+    assert quorum["dropped"] == urls[1:]
+
+
+def test_page_saved_after_the_quorum_is_not_served(monkeypatch, tmp_path):
+    escalated = threading.Event()
+    saved_late = []
+
+    def slow_browser(driver, url, key_dir, timeout=10):
+        escalated.set()
+        time.sleep(0.3)
+        saved_late.append(url)
+
+    def fetch(pending, on_page, cancel_event, on_miss):
+        on_miss(pending[0])
+        escalated.wait(2)
+        on_page(pending[1], "<html></html>")
+        on_page(pending[2], "<html></html>")
+
+    monkeypatch.setattr(search_modules, "scrape_page", slow_browser)
+    use_fetcher(monkeypatch, fetch)
+    served = search_modules.orchestrate_scraping(urls[:3], 1, str(tmp_path), quorum=2, soft_deadline=0)
+    time.sleep(0.5)
+
+    assert served == urls[1:3]
+    assert saved_late == urls[:1]
+    tiers, _ = quorum_metadata(tmp_path)
+    assert tiers[urls[0]] == "dropped"
+
+
+def test_stop_event_ends_the_scrape(monkeypatch, tmp_path):
+    stop = threading.Event()
+
+    def fetch(pending, on_page, cancel_event, on_miss):
+        for url in pending:
+            if cancel_event.is_set():
+                return
+            on_page(url, "<html></html>")
+
+    use_fetcher(monkeypatch, fetch)
+    served = search_modules.orchestrate_scraping(urls, 1, str(tmp_path), on_page=lambda url: stop.set(),
+                                                 quorum=0, soft_deadline=0, stop_event=stop)
+
+    assert served == urls[:1]
+    _, quorum = quorum_metadata(tmp_path)
+    assert quorum["stopped_by"] == "stopped"
@@ -0,0 +1,23 @@
+import pytest
+
+from modules import static_fetch
+
+noscript = "<noscript>Please enable JavaScript to use this site.</noscript>"
+app_shell = '<div id="root"></div>'
+
+
+@pytest.mark.parametrize("html", [noscript, app_shell, "<p>article</p>"])
+def test_pages_with_enough_text_stay_on_http(html):
+    content = "word " * static_fetch.min_static_text_chars
+    assert not static_fetch.looks_js_gated(html, content)
+    assert static_fetch.js_gate_reason(html, content) is None
+
+
+@pytest.mark.parametrize("html, reason", [
+    (noscript, "noscript notice"),
+    (app_shell, "empty app shell"),
+    ("<p>tiny</p>", "too little text"),
+])
+def test_short_pages_are_escalated_with_a_reason(html, reason):
+    assert static_fetch.looks_js_gated(html, "tiny")
+    assert static_fetch.js_gate_reason(html, "tiny") == reason